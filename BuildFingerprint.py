@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                               BuildFingerprint.py
+#
+# Author: C. Anderson
+# Origin date : June 12, 2020
+#############################################################################
+#
+# Copyright  2020 Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+#
+# Utility routines used by CMakeRunner to decide whether the inputs to a
+# build step have changed since the step was last run.
+#
+# Hashes are hex strings of sha256 digests. Stamp files are small JSON
+# files holding the hashes recorded when a step last succeeded.
+#
+
+import os
+import json
+import shutil
+import hashlib
+
+#
+# Environment variables that select or configure the compilers
+#
+TOOLCHAIN_ENV_VARS = ("CC","CXX","CFLAGS","CXXFLAGS","LDFLAGS","CMAKE_GENERATOR","CMAKE_TOOLCHAIN_FILE","MKLROOT")
+
+def hashFile(fileName):
+    h = hashlib.sha256()
+    try:
+        f = open(fileName,'rb')
+    except OSError:
+        return None
+    for block in iter(lambda : f.read(1 << 16), b""):
+        h.update(block)
+    f.close()
+    return h.hexdigest()
+
+def hashStrings(strings):
+    h = hashlib.sha256()
+    for s in strings:
+        h.update(str(s).encode('utf-8'))
+        h.update(b"\0")
+    return h.hexdigest()
+
+#
+# Returns a hash identifying the compilers that cmake will find: the
+# compiler related environment variables and the resolved location of
+# the compilers.
+#
+def hashToolchain():
+    values = []
+    for var in TOOLCHAIN_ENV_VARS:
+        values.append(var + "=" + os.environ.get(var,""))
+    values.append(str(shutil.which(os.environ.get("CC","cc"))))
+    values.append(str(shutil.which(os.environ.get("CXX","c++"))))
+    return hashStrings(values)
+
+#
+# Returns a hash of the names, sizes and modification times of the files 
+# contained in the specified directories. Directories whose names are in
+# ignoreNames are not searched, nor are hidden directories.
+#
+def hashDirectoryTrees(directories, ignoreNames = ()):
+    values = []
+    for directory in sorted(set(directories)):
+        if(not os.path.isdir(directory)): 
+            values.append(directory + " : missing")
+            continue
+        for (dirPath, dirNames, fileNames) in os.walk(directory):
+            dirNames[:] = sorted([d for d in dirNames if ((d not in ignoreNames) and (not d.startswith(".")))])
+            for name in sorted(fileNames):
+                if(name in ignoreNames): continue
+                fileName = os.path.join(dirPath,name)
+                try:
+                    st = os.stat(fileName)
+                except OSError:
+                    continue
+                values.append(fileName + " " + str(st.st_size) + " " + str(st.st_mtime_ns))
+    return hashStrings(values)
+
+def readStamp(fileName):
+    try:
+        f = open(fileName,'r')
+        stamp = json.load(f)
+        f.close()
+    except (OSError, ValueError):
+        return None
+    if(not isinstance(stamp,dict)): return None
+    return stamp
+
+def writeStamp(fileName, stamp):
+    f = open(fileName,'w')
+    json.dump(stamp, f, indent=2, sort_keys=True)
+    f.close()
+
+def removeStamp(fileName):
+    if(os.path.isfile(fileName)): os.remove(fileName)
+
+#
+# A persistent record, stored as a JSON file, of the input fingerprint 
+# and the result of the last run of each project and build type (the 
+# compilation mode, None if the project is not compiled), so that runs of 
+# the debug and release builds of a project do not replace each other's 
+# results. 
+#
+class FingerprintStore(object):
+    
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.entries  = readStamp(fileName)
+        if(self.entries == None): self.entries = {}
+        
+    def getEntry(self, project, buildType):
+        results = self.entries.get(project)
+        if(not isinstance(results, dict)): return None
+        entry = results.get(str(buildType))
+        if(not isinstance(entry, dict)): return None
+        return entry
+        
+    def isUpToDate(self, project, buildType, fingerprint):
+        entry = self.getEntry(project, buildType)
+        if(entry == None): return False
+        return ((entry.get("fingerprint") == fingerprint) and (entry.get("status") == "passed"))
+    
+    def getStatus(self, project, buildType):
+        entry = self.getEntry(project, buildType)
+        if(entry == None): return None
+        return entry.get("status")
+        
+    def getFailedTests(self, project, buildType):
+        entry = self.getEntry(project, buildType)
+        if(entry == None): return []
+        return entry.get("failedTests",[])
+        
+    def setResult(self, project, buildType, fingerprint, status, failedTests = ()):
+        results = self.entries.get(project)
+        if((not isinstance(results, dict)) or ("fingerprint" in results)): 
+            results = {}     # no entry, or an entry written before build types were recorded
+            self.entries[project] = results
+        results[str(buildType)] = {"fingerprint" : fingerprint, "status" : status, "failedTests" : list(failedTests)}
+        
+    def save(self):
+        writeStamp(self.fileName, self.entries)
@@ -26,13 +26,18 @@
  
 
 import os
+import re
 import sys
+import glob
 import argparse
 import subprocess
 from datetime import datetime
 
+import xml.etree.ElementTree as ET
+
 
 from XML_ParameterListArray import XML_ParameterListArray
+from ParameterSchema import ParameterSchema
 from string import Template
 
 import sys
@@ -62,6 +67,25 @@ except Exception as e:
 #
 # python -m CMakeCreator -b 
 #
+# By default the CMakeLists.txt file defines "debug" and "release" targets 
+# that re-run cmake with the corresponding CMAKE_BUILD_TYPE. With the -c option
+# these targets are omitted, and each build type is to be configured in its own 
+# build directory (build/Debug and build/Release when run with CMakeRunner).
+#
+# The CMakeLists.txt files of many projects can be created with a single 
+# invocation using the --batch option 
+#
+# python3 -m CMakeCreator --batch <CMakeRunner XML file or CMakeCreator XML files> -j 4
+#
+# For a CMakeRunner XML file, the CMakeCreator XML file in each <ProjectDir> is
+# used. Glob patterns (e.g. 'Projects/*/*.xml') may be specified. Each 
+# CMakeLists.txt file is created in the directory containing its XML file, 
+# without prompting. With -j the files are created by a pool of processes. 
+#
+# An existing CMakeLists.txt file is not rewritten if the only difference from
+# the new contents is the Date line, so that its modification time does not 
+# trigger cmake to reconfigure the project. 
+#
 # 
 # Changes to the default values used to create CMakeLists.txt files can
 # be implemented by modifying the contents of the CMake code snippets stored 
@@ -69,7 +93,168 @@ except Exception as e:
 #
 # Chris Anderson : June, 3, 2020 
 #
+
+#
+# Schema of CMakeCreator XML files. The input file is validated before the 
+# CMakeLists.txt file is created so that all of its errors are reported 
+# together. 
+#
+PLATFORM_OPTIONS = {"parameters" : {"linuxOption"        : {"type" : "string", "multiple" : True},
+                                    "visualStudioOption" : {"type" : "string", "multiple" : True},
+                                    "macOption"          : {"type" : "string", "multiple" : True}}}
+DIRECTORIES      = {"multiple" : True, "parameters" : {"dir" : {"type" : "string", "multiple" : True}}}
+
+CMAKE_CREATOR_SCHEMA = ParameterSchema("CMakeCreator_ParameterLists", {
+  "Common" : {"required" : True, "parameters" : {
+    "required_cmake"           : {"type" : "version", "required" : True},
+    "project"                  : {"type" : "string",  "required" : True},
+    "sharedObjects"            : {"type" : "bool", "default" : True},
+    "unityBuild"               : {"type" : "bool", "default" : False},
+    "unityBuildBatchSize"      : {"type" : "int"},
+    "precompileHeader"         : {"type" : "string", "multiple" : True},
+    "IncludeDirs"              : DIRECTORIES,
+    "CMakeModulesDir"          : DIRECTORIES,
+    "AdditionalDebugOptions"   : PLATFORM_OPTIONS,
+    "AdditionalReleaseOptions" : PLATFORM_OPTIONS,
+    "Library"                  : {"multiple" : True, "parameters" : {
+      "libName"    : {"type" : "string", "required" : True},
+      "libDir"     : {"type" : "string"},
+      "libLinkDir" : {"type" : "string"}}}}},
+  "Options" : {"other" : {"type" : "bool"}},
+  "BuildTargets" : {"required" : True, "parameters" : {
+    "Target" : {"multiple" : True, "parameters" : {
+      "main"                 : {"type" : "string", "required" : True},
+      "additionalSource"     : {"type" : "string", "multiple" : True},
+      "additionalIncludeDir" : {"type" : "string", "multiple" : True},
+      "precompileHeader"     : {"type" : "string", "multiple" : True},
+      "unityBuild"           : {"type" : "bool"},
+      "ctest"                : {"type" : "bool"},
+      "ctestArguments"       : {"type" : "string"},
+      "inputFile"            : {"type" : "string", "multiple" : True},
+      "defaultXML"           : {"type" : "bool"},
+      "ctestCost"            : {"type" : "float"},
+      "ctestProcessors"      : {"type" : "int"},
+      "ctestTimeout"         : {"type" : "float"},
+      "ctestResourceGroups"  : {"type" : "resourceGroups"}}}}}})
+
+# Returns the tag of the root element of an XML file, or None if the file cannot be parsed
+
+def getXMLRootTag(fileName):
+  try:
+    with open(fileName,'rb') as f:
+      for (event, element) in ET.iterparse(f, events=("start",)):
+        return element.tag
+  except (ET.ParseError, OSError):
+    return None
+  return None
+
+#
+# Creates the CMakeLists.txt file for a CMakeCreator XML file in the 
+# directory containing the XML file. Used by --batch, possibly in a separate
+# process. options is (xmlFile, CMakeCreatorDataDir, timeStampFlag, configDirsFlag). 
+# Returns (xmlFile, status) where status is "created", "updated", "unchanged" 
+# or "failed". 
+#
+def createBatchCMakeLists(options):
+  (xmlFile, dataDir, timeStampFlag, configDirsFlag) = options
+  cmakeCreator = CMakeCreator()
+  cmakeCreator.CMakeCreatorDataDir = dataDir
+  cmakeCreator.timeStampFlag       = timeStampFlag
+  cmakeCreator.configDirsFlag      = configDirsFlag
+  try:
+    cmakeContents = cmakeCreator.createCMakeLists(xmlFile, os.path.basename(xmlFile))
+  except (SystemExit, Exception) as err:
+    print (' === Error ===')
+    print ("CMakeLists.txt not created for " + xmlFile)
+    if(not isinstance(err, SystemExit)): print(err)
+    return (xmlFile, "failed")
+    
+  return (xmlFile, writeCMakeLists(Path(xmlFile).parent/"CMakeLists.txt", cmakeContents))
+
+#
+# Returns the contents of a CMakeLists.txt file without the Date line of 
+# the header (the first lines of comments) 
+#
+def removeTimeStamp(cmakeContents):
+  headerEnd = 0
+  for i in range(10):
+    headerEnd = cmakeContents.find("\n", headerEnd) + 1
+    if(headerEnd == 0): 
+      headerEnd = len(cmakeContents)
+      break
+  header = re.sub(r"^#\s*Date\s*:.*\n", "", cmakeContents[:headerEnd], flags=re.MULTILINE)
+  return header + cmakeContents[headerEnd:]
+
+#
+# Writes cmakeContents to the file cmakeListsFile unless the file exists 
+# and, apart from the Date line, has the same contents. Leaving the file
+# untouched keeps its modification time, so that cmake and make do not 
+# reconfigure and rebuild the project. Returns "created", "updated" or 
+# "unchanged". 
+#
+def writeCMakeLists(cmakeListsFile, cmakeContents):
+  status = "created"
+  if(os.path.isfile(cmakeListsFile)):
+    f = open(cmakeListsFile,'r')
+    oldContents = f.read()
+    f.close()
+    if(removeTimeStamp(oldContents) == removeTimeStamp(cmakeContents)): return "unchanged"
+    status = "updated"
+  f = open(cmakeListsFile,'w')
+  f.write(cmakeContents)
+  f.close()
+  return status
         
+#
+# The CMake code fragments (*.dat) and template fragments (*.tpl) of a data 
+# directory. The files are read once per process, when the first fragment 
+# is requested. Each template is compiled when it is read and its placeholders
+# are recorded, so the data substituted into a template is checked without 
+# re-scanning it. Invalid placeholders are reported when the templates are read.
+#
+class FragmentRegistry(object):
+
+  def __init__(self, dataDir):
+    self.dataDir      = dataDir
+    self.fragments    = {}   # file name : contents
+    self.templates    = {}   # file name : string.Template
+    self.placeholders = {}   # file name : set of the placeholder names of the template
+    try:
+      fileNames = sorted(os.listdir(dataDir))
+      for fileName in fileNames:
+        if(not fileName.endswith((".dat",".tpl"))): continue
+        f = open(os.path.join(dataDir, fileName),'r')
+        self.fragments[fileName] = f.read()
+        f.close()
+    except OSError as err:
+      print (' === Error ===')
+      print (" Data files cannot be read")
+      print (err)
+      exit()
+    for fileName in self.fragments:
+      if(fileName.endswith(".tpl")): self.addTemplate(fileName)
+      
+  def addTemplate(self, fileName):
+    template     = Template(self.fragments[fileName])
+    placeholders = set()
+    for m in template.pattern.finditer(template.template):
+      if(m.group("invalid") != None):
+        lineNumber = template.template.count("\n", 0, m.start("invalid")) + 1
+        print (' === Error ===')
+        print (" Invalid placeholder in template fragment file " + fileName + " (line " + str(lineNumber) + ")")
+        print (" Use $$ for a $ that is not a placeholder")
+        exit()
+      name = m.group("named") or m.group("braced")
+      if(name != None): placeholders.add(name)
+    self.templates[fileName]    = template
+    self.placeholders[fileName] = placeholders
+
+FRAGMENT_REGISTRIES = {}   # data directory : FragmentRegistry
+
+def getFragmentRegistry(dataDir):
+  if(dataDir not in FRAGMENT_REGISTRIES): FRAGMENT_REGISTRIES[dataDir] = FragmentRegistry(dataDir)
+  return FRAGMENT_REGISTRIES[dataDir]
+
 class CMakeCreator(object):
   
   def __init__(self):
@@ -87,6 +272,9 @@ class CMakeCreator(object):
         self.visualStudioReleaseOptions    = None
         self.macReleaseOptions             = None 
         self.forceOverwriteFlag            = False     
+        self.configDirsFlag                = False
+        self.batchFiles                    = []
+        self.jobs                          = 1
 
         
   def parseOptions(self):
@@ -97,6 +285,9 @@ class CMakeCreator(object):
       parser.add_argument('--verbose',"-v",action='store_true', dest='verboseFlag', help="Output to screen and CMakeLists.txt file")
       parser.add_argument('--force',"-f",action='store_true', dest='forceFlag', help="Force automatic overwrite of existing CMakeLists.txt file")
       parser.add_argument('--notimestamp',"-n",action='store_true', dest='noStampFlag', help="Don't add timestamp to CMakeLists.txt file")
+      parser.add_argument('--configDirs',"-c",action='store_true', dest='configDirsFlag', help="Use a separate build directory for each build type instead of debug and release targets")
+      parser.add_argument('--batch',            dest='batchFiles', default=[], nargs='+', help="Create the CMakeLists.txt files of the projects of a CMakeRunner XML file or of CMakeCreator XML files (glob patterns allowed)")
+      parser.add_argument('--jobs',"-j",        dest='jobs', default=1, type=int, help="Number of processes used with --batch")
       
       args = parser.parse_args()
       if(args.samplefileFlag):
@@ -136,8 +327,15 @@ class CMakeCreator(object):
       self.CMakeListDataFile   = args.xmldatafile
       self.verboseFlag         = args.verboseFlag
       self.forceOverwriteFlag  = args.forceFlag
+      self.configDirsFlag      = args.configDirsFlag
+      self.batchFiles          = args.batchFiles
       if(args.noStampFlag) : 
         self.timeStampFlag = False
+      if(args.jobs < 1):
+          print (' === Error ===')
+          print ("Number of processes (-j) must be >= 1")
+          exit(1)
+      self.jobs = args.jobs
       
     
   def run(self): 
@@ -146,18 +344,89 @@ class CMakeCreator(object):
     self.CMakeCreatorDataDir = self.get_script_path() + "/data"
     
     self.parseOptions()
+    if(self.batchFiles):
+      self.runBatch()
+      return
+    
     if(self.CMakeListDataFile  == None):
       print("Desired file containing CMakeLists data specified with -x option ")
       sys.exit(1)
 
+    cmakeContents = self.createCMakeLists(self.CMakeListDataFile, self.CMakeListDataFile)
           
-    paramList = XML_ParameterListArray(self.CMakeListDataFile)
+    if(self.verboseFlag): 
+      print(cmakeContents)
+    if(os.path.isfile("CMakeLists.txt")):
+      f = open("CMakeLists.txt",'r')
+      oldContents = f.read()
+      f.close()
+      if(removeTimeStamp(oldContents) == removeTimeStamp(cmakeContents)):
+        print("CMakeLists.txt unchanged : file not written")
+        return
+      if(not self.forceOverwriteFlag):
+        yesOrNo = input("Overwrite existing CMakeLists.txt ? y)es n)o [n]  :  ")
+        if(yesOrNo != "y"):
+          exit(0)       
+      
+    writeCMakeLists("CMakeLists.txt", cmakeContents)
+    print("File created : CMakeLists.txt")
+    
+  #
+  # Returns the contents of the CMakeLists.txt file specified by the XML 
+  # file xmlFile. xmlInputName is the name of the XML file recorded in 
+  # the CMakeLists.txt file. 
+  #
+  def createCMakeLists(self, xmlFile, xmlInputName): 
+    
+    paramList = XML_ParameterListArray(xmlFile)
+    
+    (parameterValues, errors) = CMAKE_CREATOR_SCHEMA.validate(paramList)
+    if(errors):
+      print (' === Error ===')
+      print ("Invalid parameters in " + xmlInputName + " :")
+      for error in errors: print ("   " + error)
+      exit(1)
+    
+    #
+    # The CMakeLists.txt file is created from the typed parameter values 
+    # returned by the schema
+    #
+    common  = parameterValues["Common"]
+    options = parameterValues["Options"]
+    targets = parameterValues["BuildTargets"]["Target"]
     
     fragmentFile = "CMakeBaseFrag.tpl"
+    if(self.configDirsFlag) : fragmentFile = "CMakeBaseConfigDirsFrag.tpl"
     fragmentData = {}
-    fragmentData["required_cmake"]      = paramList.getParameterValueOrText("required_cmake","Common")
-    fragmentData["project"]             = paramList.getParameterValueOrText("project","Common")
-    fragmentData["XML_InputFile"]       = self.CMakeListDataFile
+    fragmentData["required_cmake"]      = common["required_cmake"]
+    
+    #
+    # Additional sources used by more than one target are compiled once in an
+    # OBJECT library. Linking the OBJECT library requires cmake 3.12.
+    #
+    sharedSourceGroups = []
+    if(common["sharedObjects"]):
+      sharedSourceGroups = self.getSharedSourceGroups(targets)
+    if(len(sharedSourceGroups) != 0):
+      fragmentData["required_cmake"] = self.requireCMakeVersion(fragmentData["required_cmake"], "3.12")
+    
+    #
+    # Unity builds, precompiled headers and test resource groups require cmake 3.16
+    #
+    unityBuildFlag  = common["unityBuild"]
+    unityBatchSize  = None
+    if(common["unityBuildBatchSize"] != None):
+      unityBatchSize = str(common["unityBuildBatchSize"])
+    commonPrecompileHeaders = self.getPrecompileHeaders(common["precompileHeader"])
+    
+    cmake316Flag = (unityBuildFlag or (commonPrecompileHeaders != ""))
+    for target in targets:
+      if(target["ctestResourceGroups"] != None): cmake316Flag = True
+      if((target["unityBuild"] == True) or target["precompileHeader"]): cmake316Flag = True
+    if(cmake316Flag):
+      fragmentData["required_cmake"] = self.requireCMakeVersion(fragmentData["required_cmake"], "3.16")
+    fragmentData["project"]             = common["project"]
+    fragmentData["XML_InputFile"]       = xmlInputName
     
     if(self.timeStampFlag):
       fragmentData["Date"]              =  '{0:%Y-%m-%d }'.format(datetime.now())
@@ -188,104 +457,56 @@ class CMakeCreator(object):
     cmakeContents += "list(APPEND IncludeDirs \"${CMAKE_SOURCE_DIR}\")\n" 
     
 
-    commonList = paramList.getParameterList("Common")
-      
-    if(commonList != None):
-        for p in commonList:
-            if(p.tag == "IncludeDirs"):
-                directories = p.findall("dir")
-                for q in directories:
-                    cmakeContents += "list(APPEND IncludeDirs \"${CMAKE_SOURCE_DIR}/" + paramList.getValueOrText(q) + "\")\n"                   
+    for includeDirs in common["IncludeDirs"]:
+        for d in includeDirs["dir"]:
+            cmakeContents += "list(APPEND IncludeDirs \"${CMAKE_SOURCE_DIR}/" + d + "\")\n"                   
     
     #
     # Capture additional compiler options  
     #
-    options = ""
-    self.linuxDebugOptions         = ""
-    self.visualStudioDebugOptions  = ""
-    self.macDebugOptions           = ""
-    if(commonList != None):
-        for p in commonList:
-            if(p.tag == "AdditionalDebugOptions"):
-                optionValues = None
-                optionValues = p.findall("linuxOption")
-                for q in optionValues:
-                    options = paramList.getValueOrText(q)
-                    if(options != None) : optionSplit = options.split(",")
-                    else                : optionSplit = {}
-                    for r in optionSplit :
-                      self.linuxDebugOptions += "\"" + r.strip().replace("\"","\\\"") + "\" "
-                
-                optionValues = None
-                optionValues = p.findall("visualStudioOption")
-                for q in optionValues:
-                    options = paramList.getValueOrText(q)
-                    if(options != None) : optionSplit = options.split(",")
-                    else                : optionSplit = {}
-                    for r in optionSplit :
-                      self.visualStudioDebugOptions += "\"" + r.strip().replace("\"","\\\"") + "\" "
-                      
-                optionValues = None       
-                optionValues = p.findall("macOption")
-                for q in optionValues:
-                    options = paramList.getValueOrText(q)
-                    if(options != None) : optionSplit = options.split(",")
-                    else                : optionSplit = {}
-                    for r in optionSplit :
-                      self.macDebugOptions += "\"" + r.strip().replace("\"","\\\"") + "\" "       
-     
-    self.linuxReleaseOptions         = ""
-    self.visualStudioReleaseOptions  = ""
-    self.macReleaseOptions           = ""
-    
-    if(commonList != None):
-        for p in commonList:
-            if(p.tag == "AdditionalReleaseOptions"):
-                optionValues = None
-                optionValues = p.findall("linuxOption")
-                for q in optionValues:
-                    options = paramList.getValueOrText(q)
-                    if(options != None) : optionSplit = options.split(",")
-                    else                : optionSplit = {}
-                    for r in optionSplit :
-                      self.linuxReleaseOptions += "\"" + r.strip().replace("\"","\\\"") + "\" "
-                    
-                optionValues = None
-                optionValues = p.findall("visualStudioOption")
-                for q in optionValues:
-                    options = paramList.getValueOrText(q)
-                    if(options != None) : optionSplit = options.split(",")
-                    else                : optionSplit = {}
-                    for r in optionSplit :
-                      self.visualStudioReleaseOptions += "\"" + r.strip().replace("\"","\\\"") + "\" "
-                      
-                optionValues = None      
-                optionValues = p.findall("macOption")
-                for q in optionValues:
-                    options = paramList.getValueOrText(q)
-                    if(options != None) : optionSplit = options.split(",")
-                    else                : optionSplit = {}
-                    for r in optionSplit :
-                      self.macReleaseOptions += "\"" + r.strip().replace("\"","\\\"") + "\" "
+    debugOptions   = common["AdditionalDebugOptions"]
+    releaseOptions = common["AdditionalReleaseOptions"]
+    self.linuxDebugOptions           = self.getCompilerOptions(debugOptions, "linuxOption")
+    self.visualStudioDebugOptions    = self.getCompilerOptions(debugOptions, "visualStudioOption")
+    self.macDebugOptions             = self.getCompilerOptions(debugOptions, "macOption")
+    self.linuxReleaseOptions         = self.getCompilerOptions(releaseOptions, "linuxOption")
+    self.visualStudioReleaseOptions  = self.getCompilerOptions(releaseOptions, "visualStudioOption")
+    self.macReleaseOptions           = self.getCompilerOptions(releaseOptions, "macOption")
                            
     #                                 
     # Specify cmake modules directory paths
     #
     
     CMakeModulesDirSet = False
-    if(commonList != None):
-        for p in commonList:
-            if(p.tag == "CMakeModulesDir"):
-                cmakeContents += "\n"
-                cmakeContents += "#\n"
-                cmakeContents += "# Cmake modules directories \n"
-                cmakeContents += "#\n"
-                cmakeContents += "\n"
-                directories = p.findall("dir")
-                for q in directories:
-                    cmakeContents += "list(APPEND CMAKE_MODULE_PATH \"${CMAKE_SOURCE_DIR}/" + paramList.getValueOrText(q) + "\")\n"
-                    CMakeModulesDirSet = True
+    for modulesDirs in common["CMakeModulesDir"]:
+        cmakeContents += "\n"
+        cmakeContents += "#\n"
+        cmakeContents += "# Cmake modules directories \n"
+        cmakeContents += "#\n"
+        cmakeContents += "\n"
+        for d in modulesDirs["dir"]:
+            cmakeContents += "list(APPEND CMAKE_MODULE_PATH \"${CMAKE_SOURCE_DIR}/" + d + "\")\n"
+            CMakeModulesDirSet = True
     
+    #
+    # The compiler cache option is specified before the supporting libraries
+    # so that the compiler launcher is applied to them as well. 
+    #
+    
+    OptionNames = []
+    if(options != None): OptionNames = list(options)
+      
+    if("USE_CCACHE" in OptionNames):
+        OptionNames.remove("USE_CCACHE")
+        toggleVal = "OFF"
+        if(options["USE_CCACHE"] == True) : toggleVal = "ON"
+        cmakeContents += "\n"
+        cmakeContents += "#####################################################\n"
+        cmakeContents += "# Compiler cache \n"
+        cmakeContents += "#####################################################\n"
+        cmakeContents += "\nOPTION(USE_CCACHE  \"Option USE_CCACHE\"  " + toggleVal + ")\n\n" 
+        cmakeContents += self.getFragment("CCacheFrag.dat")
+        
     #
     #################################################################
     # Specify libraries to be built as specified by option values 
@@ -296,35 +517,31 @@ class CMakeCreator(object):
     externalLibLinkDirFlag = False
     libraryCount        = 0
     toggleVal           = "OFF"
-    if(commonList != None):
-        for p in commonList:
-            if(p.tag == "Library"): 
-                libraryCount += 1
-                if(libraryCount == 1):
-                    cmakeContents += "\n"
-                    cmakeContents += "\n"
-                    cmakeContents += "#####################################################\n"
-                    cmakeContents += "# Invoke build of supporting libraries (projects)    \n"
-                    cmakeContents += "#####################################################\n"
-                    cmakeContents += "\n"
-                    cmakeContents += "include_directories(${IncludeDirs})\n"
-    
-                externalLibraryFlag = True            
-                cmakeContents += "\n"
-                libDir  = p.find("libDir")
-                libLinkDir = p.find("libLinkDir")
-                if(libDir != None) :
-                    cmakeContents += "add_subdirectory(\"${CMAKE_SOURCE_DIR}/" + paramList.getValueOrText(libDir) + "\" "
-                    cmakeContents += "\"${CMAKE_SOURCE_DIR}/" + paramList.getValueOrText(libDir) + "/build\")\n"
-                if(libLinkDir != None):
-                    cmakeContents +=  "list(APPEND ExternalLibLinkDirs \"" + paramList.getValueOrText(libLinkDir) +  "\")\n" 
-                    externalLibLinkDirFlag = True               
-                libName = p.find("libName")
-                cmakeContents +=  "list(APPEND ExternalLibs \"" + paramList.getValueOrText(libName) +  "\")\n"
-      
-    OptionNames = []
-    if(paramList.isParameterList("Options")):
-      OptionNames = paramList.getParameterNames("Options")
+    for library in common["Library"]:
+        libraryCount += 1
+        if(libraryCount == 1):
+            cmakeContents += "\n"
+            cmakeContents += "\n"
+            cmakeContents += "#####################################################\n"
+            cmakeContents += "# Invoke build of supporting libraries (projects)    \n"
+            cmakeContents += "#####################################################\n"
+            cmakeContents += "\n"
+            cmakeContents += "include_directories(${IncludeDirs})\n"
+    
+        externalLibraryFlag = True            
+        cmakeContents += "\n"
+        libDir     = library["libDir"]
+        libLinkDir = library["libLinkDir"]
+        if(libDir != None) :
+            cmakeContents += "add_subdirectory(\"${CMAKE_SOURCE_DIR}/" + libDir + "\" "
+            if(self.configDirsFlag):
+                cmakeContents += "\"${CMAKE_SOURCE_DIR}/" + libDir + "/build/${CMAKE_BUILD_TYPE}\")\n"
+            else:
+                cmakeContents += "\"${CMAKE_SOURCE_DIR}/" + libDir + "/build\")\n"
+        if(libLinkDir != None):
+            cmakeContents +=  "list(APPEND ExternalLibLinkDirs \"" + libLinkDir +  "\")\n" 
+            externalLibLinkDirFlag = True               
+        cmakeContents +=  "list(APPEND ExternalLibs \"" + library["libName"] +  "\")\n"
     
     if(OptionNames != []):
         cmakeContents += "\n"
@@ -337,10 +554,11 @@ class CMakeCreator(object):
         cmakeContents += "# to override default\n"
         cmakeContents += "#\n"
 
+    # An option without a value has the value of the preceding option 
+
     for p in OptionNames :
-        val = str(paramList.getParameterValueOrText(p,"Options")).strip()
-        if(val in self.TRUE_VALS) : toggleVal = "ON"
-        if(val in self.FALSE_VALS): toggleVal = "OFF"
+        if(options[p] == True) : toggleVal = "ON"
+        if(options[p] == False): toggleVal = "OFF"
         cmakeContents += "\nOPTION(" + p + "  \"Option " + p + "\"  " + toggleVal + ")" 
     
     lapackFlag = False
@@ -370,17 +588,10 @@ class CMakeCreator(object):
 
     # Enable testing if specified in any of the targets
     
-    targetParamsTemp = paramList.getParameterList("BuildTargets")
-    targetParams = []
-    for p in targetParamsTemp:
-      if(p.tag == "Target") : targetParams.append(p)
-        
     ctestingFlag    = False
-    for p in targetParams:
-        ctestFlagParam = p.find("ctest")
-        if(ctestFlagParam != None) : 
-            ctestingFlag = False
-            ctestingFlag = (str(paramList.getValueOrText(ctestFlagParam)) in self.TRUE_VALS)
+    for target in targets:
+        if(target["ctest"] != None) : 
+            ctestingFlag = target["ctest"]
             
 
     if(ctestingFlag) :
@@ -397,12 +608,6 @@ class CMakeCreator(object):
     #################################################################
     #################################################################
     
-    
-    targetParamsTemp = paramList.getParameterList("BuildTargets")
-    targetParams = []
-    for p in targetParamsTemp:
-      if(p.tag == "Target") : targetParams.append(p)
-    
     # 
     #  Create a list of main sources and directories for testing
     # output
@@ -411,24 +616,12 @@ class CMakeCreator(object):
 
     Main_Sources = ""
     
-    ctestingFlag    = False
-    for p in targetParams:
-        mainSource     = None
-        mainParam      = p.find("main")
-
-        if(mainParam == None):
-            raise Exception("\nError:  <main = ... > parameter specifying main source\n        not specified in <Target>  \n ")
-            
-        mainSource     = paramList.getValueOrText(mainParam)
+    for target in targets:
+        mainSource     = target["main"]
         Main_Sources   += "\"" + mainSource + "\" "
         
-        ctestFlagParam = p.find("ctest")
-        if(ctestFlagParam != None) : 
-            ctestFlag = False
-            ctestFlag = (str(paramList.getValueOrText(ctestFlagParam)) in self.TRUE_VALS)
-            if(ctestFlag) : 
-                ctestingFlag = True 
-                cmakeContents += "file(MAKE_DIRECTORY \"${CMAKE_SOURCE_DIR}/Testing/" + mainSource.split(".")[0] + "\")\n"
+        if(target["ctest"] == True) : 
+            cmakeContents += "file(MAKE_DIRECTORY \"${CMAKE_SOURCE_DIR}/Testing/" + mainSource.split(".")[0] + "\")\n"
                 
         
     cmakeContents += "\n"
@@ -443,179 +636,60 @@ class CMakeCreator(object):
 
     #
     #################################################################
-    # Loop over targets, specifying target specific information 
+    # Settings applied to every target are collected in the function
+    # cmakecreator_setup_target, which is invoked for each target
     #################################################################
     #
     
-    cmakeContents +=  "\n#\n"
-    cmakeContents +=  "#   Loop over build commands for each target  \n"
-    cmakeContents +=  "#\n"
+    cmakeContents += "\n"
+    cmakeContents += "#####################################################\n"
+    cmakeContents += "# Settings applied to every target \n"
+    cmakeContents += "#####################################################\n"
+    cmakeContents += "\n"
+    cmakeContents += "function(cmakecreator_setup_target mainExecName)\n"
     
+    if(len(OptionNames) != 0) : 
+        cmakeContents +=  "#\n"
+        cmakeContents +=  "#     Supporting libraries and include directories \n"
+        cmakeContents +=  "#\n"
     
-    cmakeContents += "\n"  
-    cmakeContents +=  "foreach(mainFile ${Main_Sources} )\n"
-    cmakeContents +=  "string( REPLACE \".cpp\" \"\" mainExecName ${mainFile} )\n\n"
+    # Make sure FFTW comes first to avoid conflicts with MKL versions 
     
-
-    for p in targetParams:
-        mainSource            = None
-        additionalSources     = []
-        additionalIncludeDirs = []
-        ctestFlag             = False
-        inputFiles            = []
-        commandLineArguments  = None
-        defaultXML            = False
-            
-        sourceFileList = ""  
-        if(p.tag == "Target"):
-            
-            mainParam      = p.find("main")
-
-            if(mainParam == None):
-                raise Exception("\nError:  <main = ... > parameter specifying main source\n        not specified in <Target>  \n ")
-            
-            mainSource      = paramList.getValueOrText(mainParam)
-            sourceFileList += "\"" + mainSource + "\" "
-            
-            additionalSourceParam = p.findall("additionalSource")
-            for q in additionalSourceParam :
-                additionalSources.append(paramList.getValueOrText(q))
-            for q in additionalSources :
-                sourceFileList +=   "\"" + q + "\" "  
-            
+    for q in OptionNames :       
+        if((q == "USE_FFTW")):
+            cmakeContents += "      if(USE_FFTW) \n"
+            cmakeContents += "          target_link_libraries(${mainExecName}  PUBLIC  ${FFTW_LIBRARIES})\n"
+            cmakeContents += "          target_include_directories(${mainExecName}  PUBLIC  ${FFTW_INCLUDES})\n"
+            cmakeContents += "      endif()\n\n"
+        
+    for q in OptionNames :    
+        if((q == "USE_LAPACK")):
+            cmakeContents += "      if(USE_LAPACK) \n"
+            cmakeContents += "          target_link_libraries(${mainExecName}  PUBLIC  ${LAPACK_LIBRARIES})\n"
+            cmakeContents += "      endif()\n\n"                    
             
-            cmakeContents +=  "##################################################################\n"
-            cmakeContents +=  "#   Target :  " + mainSource.split(".")[0]  + "\n"
-            cmakeContents +=  "##################################################################\n"
-    
-            cmakeContents += "\n"
-            cmakeContents += "    if(\"${mainExecName}.cpp\" STREQUAL \"" + mainSource + "\")\n"
-            cmakeContents += "      add_executable( ${mainExecName} " + sourceFileList + ")\n"
+        if((q == "USE_OPENMP")):
+            cmakeContents += "      if(OpenMP_CXX_FOUND) \n"
+            cmakeContents += "         target_link_libraries(${mainExecName} PUBLIC OpenMP::OpenMP_CXX)\n"
+            cmakeContents += "      endif()\n\n"
             
+        if((q == "USE_SQLITE3")):
+            cmakeContents += "      if(USE_SQLITE3) \n"
+            cmakeContents += "          target_link_libraries(${mainExecName}  PUBLIC  ${SQLite3_LIBRARIES})\n"
+            cmakeContents += "          target_include_directories(${mainExecName} PUBLIC  ${SQLite3_INCLUDE_DIRS})\n"
+            cmakeContents += "      endif()\n\n"
+              
+    if(externalLibraryFlag):
+        cmakeContents += "\n"
+        cmakeContents += "      target_link_libraries(${mainExecName} PUBLIC ${ExternalLibs})\n"
 
-            if(len(OptionNames) != 0) : 
-                cmakeContents +=  "#\n"
-                cmakeContents +=  "#     Supporting libraries and include directories \n"
-                cmakeContents +=  "#\n"
-            
-            # Make sure FFTW comes first to avoid conflicts with MKL versions 
-            
-            for q in OptionNames :       
-                if((q == "USE_FFTW")):
-                    #if(not lapackFlag) : cmakeContents += "      target_link_libraries(${mainExecName}  PUBLIC  ${LAPACK_LIBRARIES})\n"
-                    cmakeContents += "      if(USE_FFTW) \n"
-                    cmakeContents += "          target_link_libraries(${mainExecName}  PUBLIC  ${FFTW_LIBRARIES})\n"
-                    cmakeContents += "          target_include_directories(${mainExecName}  PUBLIC  ${FFTW_INCLUDES})\n"
-                    cmakeContents += "      endif()\n\n"
-                
-            
-            for q in OptionNames :    
-                if((q == "USE_LAPACK")):
-                    cmakeContents += "      if(USE_LAPACK) \n"
-                    cmakeContents += "          target_link_libraries(${mainExecName}  PUBLIC  ${LAPACK_LIBRARIES})\n"
-                    cmakeContents += "      endif()\n\n"                    
-                    
-                if((q == "USE_OPENMP")):
-                    cmakeContents += "      if(OpenMP_CXX_FOUND) \n"
-                    cmakeContents += "         target_link_libraries(${mainExecName} PUBLIC OpenMP::OpenMP_CXX)\n"
-                    cmakeContents += "      endif()\n\n"
-                    
-                    
-                if((q == "USE_SQLITE3")):
-                    cmakeContents += "      if(USE_SQLITE3) \n"
-                    cmakeContents += "          target_link_libraries(${mainExecName}  PUBLIC  ${SQLite3_LIBRARIES})\n"
-                    cmakeContents += "          target_include_directories(${mainExecName} PUBLIC  ${SQLite3_INCLUDE_DIRS})\n"
-                    cmakeContents += "      endif()\n\n"
-                      
-            if(externalLibraryFlag):
-                cmakeContents += "\n"
-                cmakeContents += "      target_link_libraries(${mainExecName} PUBLIC ${ExternalLibs})\n"
- 
-            if(externalLibLinkDirFlag):
-                cmakeContents += "\n"
-                cmakeContents += "      target_link_directories(${mainExecName} PUBLIC ${ExternalLibLinkDirs})\n"          
-                    
-            cmakeContents += "\n"
-            cmakeContents += "      target_include_directories(${mainExecName} PUBLIC ${IncludeDirs} ) \n"
-            
-                      
-            additionalIncludeParam = p.findall("additionalIncludeDir")
-            for q in additionalIncludeParam :
-                additionalIncludeDirs.append(paramList.getValueOrText(q))
-            for q in additionalIncludeDirs :
-                cmakeContents += "      target_include_directories(${mainExecName} PUBLIC \"" + q +"\" )\n"
-                
-            ctestFlagParam = p.find("ctest")
-            if(ctestFlagParam != None) : 
-                ctestFlag = False
-                ctestFlag = (str(paramList.getValueOrText(ctestFlagParam)) in self.TRUE_VALS)
-                 
+    if(externalLibLinkDirFlag):
+        cmakeContents += "\n"
+        cmakeContents += "      target_link_directories(${mainExecName} PUBLIC ${ExternalLibLinkDirs})\n"          
             
-            if(ctestFlag):
-                
-                cmakeContents +=  "\n"
-                cmakeContents +=  "#      --- Commands for ctest setup ---  \n"
-
-                #cmakeContents +=  "\n"
-                #cmakeContents +=  "#     Command to induce the creation of Testing/"+ mainSource.split(".")[0]  + " directory \n"
-                
-                
-                #cmakeContents += "\n"
-                #cmakeContents += "      add_custom_target(\"createTestOutputDir_${mainExecName}\" ALL \n"
-                #cmakeContents += "      COMMAND ${CMAKE_COMMAND} -E make_directory \"${CMAKE_SOURCE_DIR}/Testing/${mainExecName}\")\n"
-                
-                inputFilesParam = p.findall("inputFile")
-                for q in inputFilesParam :
-                    inputFiles.append(paramList.getValueOrText(q))
-                if(len(inputFiles) != 0) : 
-                    cmakeContents += "\n"
-                    cmakeContents +=  "#     Copy test input files to Testing/"+ mainSource.split(".")[0]  + " \n\n"
-                    
-                    
-                for q in inputFiles :
-                    cmakeContents += "      file(COPY \""+ q + "\"  DESTINATION \"${CMAKE_SOURCE_DIR}/Testing/${mainExecName}\")\n"
-                
-                defaultXMLParam = p.find("defaultXML")
-                if(defaultXMLParam != None) :
-                  defaultXML = False
-                  defaultXML = (str(paramList.getValueOrText(defaultXMLParam)) in self.TRUE_VALS)
-                  
-                if(defaultXML):
-                    cmakeContents += "\n"
-                    cmakeContents +=  "#     defaultXML : If "+ mainSource.split(".")[0]  + ".xml exists then copy to testing   \n"
-                    cmakeContents +=  "#     directory and construct command line input \"-f "+ mainSource.split(".")[0]  + ".xml\"  \n"
-                    cmakeContents += self.getFragment("DefaultXMLtestDataFrag.dat")
-                    cmakeContents += "\n"
-                else:      
-                    ctestArgumentsParam = p.find("ctestArguments")
-                    if(ctestArgumentsParam != None) : 
-                      cmakeContents += "\n"
-                      cmakeContents +=  "#     Specify command line arguments  \n"
-                    
-                      ctestArguments = paramList.getValueOrText(ctestArgumentsParam)  
-                      cmakeContents += "\n"
-                      cmakeContents += "      set (ctestArguments " + ctestArguments + " )\n"
-                      cmakeContents += "\n"
-                      cmakeContents +=  "#     Add target to test set \n"
-                      cmakeContents += "\n"
-                      cmakeContents += "      add_test(NAME  ${mainExecName} WORKING_DIRECTORY \"${CMAKE_SOURCE_DIR}/Testing/${mainExecName}\"\n"
-                      cmakeContents += "      COMMAND \"${CMAKE_SOURCE_DIR}/${CMAKE_BUILD_TYPE}/${mainExecName}\" ${ctestArguments} )\n"
-                    else:
-                      cmakeContents +=  "\n#     Add target to test set \n"
-                      cmakeContents += "\n"
-                      cmakeContents += "      add_test(NAME  ${mainExecName} WORKING_DIRECTORY \"${CMAKE_SOURCE_DIR}/Testing/${mainExecName}\"\n"
-                      cmakeContents += "      COMMAND \"${CMAKE_SOURCE_DIR}/${CMAKE_BUILD_TYPE}/${mainExecName}\")\n"
-                      
-
-            cmakeContents += "\n    endif()\n\n"
-            cmakeContents +=  "#----------------------------------------------------------------#\n"
-            cmakeContents += "\n"
-    
-    #
-    #################################################################
-    # Specify compiler properties applied to every target 
-    #################################################################
-    #
+    cmakeContents += "\n"
+    cmakeContents += "      target_include_directories(${mainExecName} PUBLIC ${IncludeDirs} ) \n"
+    cmakeContents += "\n"
     
     cmakeContents +=  self.getFragment("CompileFeaturesFrag.dat")
     
@@ -670,19 +744,248 @@ class CMakeCreator(object):
     cmakeContents += "    target_compile_options(${mainExecName} PUBLIC \"$<$<CONFIG:RELEASE>:${ADDITIONAL_RELEASE_OPTIONS}>\")\n"
     
     cmakeContents += "\n"
-    cmakeContents += "endforeach()   # Loop over targets \n"
-          
-    if(self.verboseFlag): 
-      print(cmakeContents)
-    if(os.path.isfile("CMakeLists.txt") and (not self.forceOverwriteFlag)):
-        yesOrNo = input("Overwrite existing CMakeLists.txt ? y)es n)o [n]  :  ")
-        if(yesOrNo != "y"):
-          exit(0)       
+    cmakeContents += "endfunction()\n"
+    cmakeContents += "\n"
+
+    #
+    #################################################################
+    # Unity build and precompiled header shared by all targets 
+    #################################################################
+    #
+    
+    if(unityBuildFlag):
+        cmakeContents += "#\n"
+        cmakeContents += "# Unity (jumbo) build of every target \n"
+        cmakeContents += "#\n"
+        cmakeContents += "\n"
+        cmakeContents += "set(CMAKE_UNITY_BUILD ON)\n"
+        if(unityBatchSize != None):
+            cmakeContents += "set(CMAKE_UNITY_BUILD_BATCH_SIZE " + unityBatchSize + ")\n"
+        cmakeContents += "\n"
+    
+    pchLibName = "${PROJECT_NAME}_pch"
+    if(commonPrecompileHeaders != ""):
+        cmakeContents +=  "##################################################################\n"
+        cmakeContents +=  "#   Precompiled header reused by every target \n"
+        cmakeContents +=  "##################################################################\n"
+        cmakeContents += "\n"
+        cmakeContents += "    if(NOT EXISTS \"${CMAKE_BINARY_DIR}/" + pchLibName + ".cpp\")\n"
+        cmakeContents += "      file(WRITE \"${CMAKE_BINARY_DIR}/" + pchLibName + ".cpp\" \"\")\n"
+        cmakeContents += "    endif()\n"
+        cmakeContents += "    add_library(" + pchLibName + " OBJECT \"${CMAKE_BINARY_DIR}/" + pchLibName + ".cpp\")\n"
+        cmakeContents += "    cmakecreator_setup_target(" + pchLibName + ")\n"
+        cmakeContents += "    target_precompile_headers(" + pchLibName + " PRIVATE " + commonPrecompileHeaders + ")\n"
+        cmakeContents += "\n"
+        cmakeContents +=  "#----------------------------------------------------------------#\n"
+        cmakeContents += "\n"
+        
+    #
+    #################################################################
+    # Specify OBJECT libraries for sources shared by several targets
+    #################################################################
+    #
+    
+    sharedSources = {}
+    for i in range(len(sharedSourceGroups)):
+        (execNames, sources, includeDirs) = sharedSourceGroups[i]
+        objectLibName = "${PROJECT_NAME}_shared" + str(i+1)
+        
+        cmakeContents +=  "##################################################################\n"
+        cmakeContents +=  "#   Sources shared by targets : " + " ".join(execNames) + "\n"
+        cmakeContents +=  "##################################################################\n"
+        cmakeContents += "\n"
+        cmakeContents += "    add_library(" + objectLibName + " OBJECT "
+        for q in sources :
+            cmakeContents += "\"" + q + "\" "
+        cmakeContents += ")\n"
+        cmakeContents += "    cmakecreator_setup_target(" + objectLibName + ")\n"
+        if(commonPrecompileHeaders != ""):
+            cmakeContents += "    target_precompile_headers(" + objectLibName + " REUSE_FROM " + pchLibName + ")\n"
+        for q in includeDirs :
+            cmakeContents += "    target_include_directories(" + objectLibName + " PUBLIC \"" + q +"\" )\n"
+        cmakeContents += "\n"
+        cmakeContents +=  "#----------------------------------------------------------------#\n"
+        cmakeContents += "\n"
+        
+        for q in sources :
+            sharedSources[q] = objectLibName
+
+    #
+    #################################################################
+    # Specify each target in its own block 
+    #################################################################
+    #
+
+    for target in targets:
+        mainSource      = target["main"]
+        sourceFileList  = "\"" + mainSource + "\" "
+            
+        objectLibNames = []
+        for q in target["additionalSource"] :
+            if(q in sharedSources):
+                if(sharedSources[q] not in objectLibNames): objectLibNames.append(sharedSources[q])
+            else:
+                sourceFileList +=   "\"" + q + "\" "  
+        for q in objectLibNames :
+            sourceFileList +=   "$<TARGET_OBJECTS:" + q + "> "  
+        
+        
+        cmakeContents +=  "##################################################################\n"
+        cmakeContents +=  "#   Target :  " + mainSource.split(".")[0]  + "\n"
+        cmakeContents +=  "##################################################################\n"
+    
+        cmakeContents += "\n"
+        cmakeContents += "    set(mainExecName " + mainSource.replace(".cpp","") + ")\n"
+        cmakeContents += "    add_executable( ${mainExecName} " + sourceFileList + ")\n"
+        cmakeContents += "    cmakecreator_setup_target(${mainExecName})\n"
+        
+        targetPrecompileHeaders = self.getPrecompileHeaders(target["precompileHeader"])
+        if(targetPrecompileHeaders != ""):
+            cmakeContents += "    target_precompile_headers(${mainExecName} PRIVATE " + targetPrecompileHeaders + ")\n"
+        elif(commonPrecompileHeaders != ""):
+            cmakeContents += "    target_precompile_headers(${mainExecName} REUSE_FROM " + pchLibName + ")\n"
+            
+        if(target["unityBuild"] == True):
+            cmakeContents += "    set_target_properties(${mainExecName} PROPERTIES UNITY_BUILD ON)\n"
+        elif(target["unityBuild"] == False):
+            cmakeContents += "    set_target_properties(${mainExecName} PROPERTIES UNITY_BUILD OFF)\n"
+        
+        for q in target["additionalIncludeDir"] :
+            cmakeContents += "    target_include_directories(${mainExecName} PUBLIC \"" + q +"\" )\n"
+             
+        if(target["ctest"] == True):
+            
+            cmakeContents +=  "\n"
+            cmakeContents +=  "#      --- Commands for ctest setup ---  \n"
+            
+            inputFiles = target["inputFile"]
+            if(len(inputFiles) != 0) : 
+                cmakeContents += "\n"
+                cmakeContents +=  "#     Copy test input files to Testing/"+ mainSource.split(".")[0]  + " \n\n"
+                
+                
+            for q in inputFiles :
+                cmakeContents += "      file(COPY \""+ q + "\"  DESTINATION \"${CMAKE_SOURCE_DIR}/Testing/${mainExecName}\")\n"
+            
+            if(target["defaultXML"] == True):
+                cmakeContents += "\n"
+                cmakeContents +=  "#     defaultXML : If "+ mainSource.split(".")[0]  + ".xml exists then copy to testing   \n"
+                cmakeContents +=  "#     directory and construct command line input \"-f "+ mainSource.split(".")[0]  + ".xml\"  \n"
+                cmakeContents += self.getFragment("DefaultXMLtestDataFrag.dat")
+                cmakeContents += "\n"
+            elif(target["ctestArguments"] != None): 
+                cmakeContents += "\n"
+                cmakeContents +=  "#     Specify command line arguments  \n"
+            
+                cmakeContents += "\n"
+                cmakeContents += "      set (ctestArguments " + target["ctestArguments"] + " )\n"
+                cmakeContents += "\n"
+                cmakeContents +=  "#     Add target to test set \n"
+                cmakeContents += "\n"
+                cmakeContents += "      add_test(NAME  ${mainExecName} WORKING_DIRECTORY \"${CMAKE_SOURCE_DIR}/Testing/${mainExecName}\"\n"
+                cmakeContents += "      COMMAND \"${CMAKE_SOURCE_DIR}/${CMAKE_BUILD_TYPE}/${mainExecName}\" ${ctestArguments} )\n"
+            else:
+                cmakeContents +=  "\n#     Add target to test set \n"
+                cmakeContents += "\n"
+                cmakeContents += "      add_test(NAME  ${mainExecName} WORKING_DIRECTORY \"${CMAKE_SOURCE_DIR}/Testing/${mainExecName}\"\n"
+                cmakeContents += "      COMMAND \"${CMAKE_SOURCE_DIR}/${CMAKE_BUILD_TYPE}/${mainExecName}\")\n"
+            
+            #
+            # Test properties used by ctest to schedule tests run in parallel
+            #
+            testProperties = ""
+            for (paramName, propertyName) in self.CTEST_PROPERTIES:
+                if(target[paramName] != None):
+                    testProperties += " " + propertyName + " \"" + self.getCMakeValue(target[paramName]) + "\""
+            if(testProperties != ""):
+                cmakeContents += "\n"
+                cmakeContents += "#     Test scheduling properties \n"
+                cmakeContents += "\n"
+                cmakeContents += "      set_tests_properties(${mainExecName} PROPERTIES" + testProperties + ")\n"
+
+        cmakeContents += "\n"
+        cmakeContents +=  "#----------------------------------------------------------------#\n"
+        cmakeContents += "\n"
       
-    f = open("CMakeLists.txt", 'w')
-    f.write(cmakeContents)
-    f.close()
-    print("File created : CMakeLists.txt")
+    return cmakeContents
+    
+#
+#=========== Batch creation  ====================================
+#   
+
+  def runBatch(self):
+    xmlFiles = self.getBatchXMLFiles()
+    print("CMakeCreator XML files : " + str(len(xmlFiles)))
+    
+    batchOptions = [(xmlFile, self.CMakeCreatorDataDir, self.timeStampFlag, self.configDirsFlag) for xmlFile in xmlFiles]
+    if(self.jobs == 1):
+      results = [createBatchCMakeLists(options) for options in batchOptions]
+    else:
+      # imported here since importing it adds noticeably to the start up time of every invocation
+      from concurrent.futures import ProcessPoolExecutor
+      with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+        results = list(executor.map(createBatchCMakeLists, batchOptions))
+    
+    counts = {}
+    for (xmlFile, status) in results:
+      print("{0:<10s} : ".format(status) + str(Path(xmlFile).parent/"CMakeLists.txt"))
+      counts[status] = counts.get(status, 0) + 1
+    print("\n" + ", ".join([str(counts[status]) + " " + status for status in sorted(counts)]))
+    if("unchanged" in counts): print("Skipped (unchanged, not written) : " + str(counts["unchanged"]))
+    if("failed" in counts): exit(1)
+    
+  #
+  # Returns the CMakeCreator XML files specified by the --batch arguments. 
+  # An argument is a CMakeCreator XML file, a CMakeRunner XML file or a glob
+  # pattern for these files. 
+  #
+  def getBatchXMLFiles(self):
+    xmlFiles = []
+    for pattern in self.batchFiles:
+      fileNames = sorted(glob.glob(pattern))
+      if(not fileNames):
+        print (' === Error ===')
+        print ("No file matches the --batch argument : " + pattern)
+        exit(1)
+      for fileName in fileNames:
+        rootTag = getXMLRootTag(fileName)
+        if(rootTag == "CMakeCreator_ParameterLists"):
+          xmlFiles.append(os.path.abspath(fileName))
+        elif(rootTag == "CMakeRunner_ParameterLists"):
+          xmlFiles += self.getProjectXMLFiles(fileName)
+        else:
+          print("Note : not a CMakeCreator or CMakeRunner XML file : " + fileName)
+    
+    # Each directory can contain only one CMakeLists.txt file 
+    
+    xmlDirs = {}
+    for xmlFile in xmlFiles:
+      xmlDir = os.path.dirname(xmlFile)
+      if((xmlDir in xmlDirs) and (xmlDirs[xmlDir] != xmlFile)):
+        print (' === Error ===')
+        print ("More than one CMakeCreator XML file in directory " + xmlDir)
+        print ("   " + os.path.basename(xmlDirs[xmlDir]))
+        print ("   " + os.path.basename(xmlFile))
+        exit(1)
+      xmlDirs[xmlDir] = xmlFile
+    return [xmlDirs[d] for d in xmlDirs]
+    
+  # Returns the CMakeCreator XML files in the <ProjectDir>s of a CMakeRunner XML file 
+  
+  def getProjectXMLFiles(self, runnerFile):
+    paramList  = XML_ParameterListArray(runnerFile,["Common","ProjectDir"])
+    workingDir = os.path.dirname(os.path.abspath(runnerFile))
+    if(paramList.isParameter("workingDir", "Common")):
+      workingDir = paramList.getParameterText("workingDir", "Common").strip()
+      
+    xmlFiles = []
+    for p in paramList.getParameterListAll("ProjectDir"):
+      projectDir   = Path(workingDir)/p.text.strip()
+      projectFiles = [f for f in sorted(glob.glob(str(projectDir/"*.xml"))) if (getXMLRootTag(f) == "CMakeCreator_ParameterLists")]
+      if(not projectFiles):
+        print("Note : no CMakeCreator XML file in " + str(projectDir))
+      xmlFiles += [os.path.abspath(f) for f in projectFiles]
+    return xmlFiles
     
   
   
@@ -694,6 +997,88 @@ class CMakeCreator(object):
 
   def get_script_path(self):
     return os.path.dirname(os.path.realpath(sys.argv[0]))
+    
+  # Returns a typed parameter value as text, without the .0 of whole numbers 
+  
+  def getCMakeValue(self, value):
+    if(isinstance(value, float) and value.is_integer()): return str(int(value))
+    return str(value)
+    
+  #
+  # Returns the comma separated options of the <linuxOption>, 
+  # <visualStudioOption> or <macOption> entries optionName of platformOptions,
+  # the typed value of <AdditionalDebugOptions> or <AdditionalReleaseOptions>,
+  # as quoted arguments 
+  #
+  def getCompilerOptions(self, platformOptions, optionName):
+    compilerOptions = ""
+    if(platformOptions == None): return compilerOptions
+    for options in platformOptions[optionName]:
+      if(options == None): continue
+      for r in options.split(","):
+        compilerOptions += "\"" + r.strip().replace("\"","\\\"") + "\" "
+    return compilerOptions
+    
+  #
+  # Returns the <precompileHeader> entries of <Common> or of a target as 
+  # arguments of target_precompile_headers. Headers specified in <> or "" are 
+  # searched for in the include directories, other headers are relative to 
+  # the directory containing CMakeLists.txt. 
+  #
+  def getPrecompileHeaders(self, precompileHeaders):
+    headers = ""
+    for header in precompileHeaders:
+      if(header == None): continue
+      if(header.startswith("<")) : headers += header + " "
+      elif(header.startswith("\"")): headers += "[[" + header + "]] "
+      else                       : headers += "\"" + header + "\" "
+    return headers.strip()
+    
+  # Returns the larger of two cmake version strings 
+  
+  def requireCMakeVersion(self, version, requiredVersion):
+    try:
+      versionNumbers  = [int(v) for v in str(version).strip().split(".")]
+      requiredNumbers = [int(v) for v in requiredVersion.split(".")]
+    except ValueError:
+      return version
+    if(versionNumbers >= requiredNumbers): return version
+    print("Note : cmake_minimum_required raised from " + str(version).strip() + " to " + requiredVersion)
+    return requiredVersion
+    
+  #
+  # Returns a list of (execNames, sources, includeDirs) for the additional
+  # sources that are used by two or more targets. Sources are grouped by the
+  # set of targets that use them, so each target only links the objects of the
+  # sources it specifies. includeDirs are the additionalIncludeDirs of those targets.
+  #
+  def getSharedSourceGroups(self, targets):
+    sourceUsers    = {}
+    sourceOrder    = []
+    targetIncludes = {}
+    for target in targets:
+      execName = target["main"].replace(".cpp","")
+      targetIncludes[execName] = target["additionalIncludeDir"]
+      for source in target["additionalSource"]:
+        if(source not in sourceUsers):
+          sourceUsers[source] = []
+          sourceOrder.append(source)
+        if(execName not in sourceUsers[source]): sourceUsers[source].append(execName)
+        
+    groups     = []
+    groupIndex = {}
+    for source in sourceOrder:
+      execNames = tuple(sourceUsers[source])
+      if(len(execNames) < 2): continue
+      if(execNames not in groupIndex):
+        includeDirs = []
+        for e in execNames:
+          for d in targetIncludes[e]:
+            if(d not in includeDirs): includeDirs.append(d)
+        groupIndex[execNames] = len(groups)
+        groups.append((list(execNames), [], includeDirs))
+      groups[groupIndex[execNames]][1].append(source)
+    return groups
    
   def createFileLinesArray(fileName):
     dataFile  = Path(fileName)
@@ -713,64 +1098,51 @@ class CMakeCreator(object):
 
 
   def getFragment(self,fileName):
-    dataFile  = Path(self.CMakeCreatorDataDir + "/" + fileName)
-    try :
-      f = open(dataFile,'r')
-    except OSError as err:
+    registry = getFragmentRegistry(self.CMakeCreatorDataDir)
+    if(fileName not in registry.fragments):
       print (' === Error ===')
       print (" Data file cannot be read")
-      print (err)
+      print (" " + str(Path(self.CMakeCreatorDataDir + "/" + fileName)))
       exit()
-      
-    fileContents =  f.read()
-    f.close()
 
-    return fileContents
+    return registry.fragments[fileName]
   
   def createFragment(self,templateFragmentFile,fragmentData):
-    dataFile  = Path(self.CMakeCreatorDataDir + "/" + templateFragmentFile)
-    try :
-      f = open(dataFile,'r')
-    except IOError as exception:
+    registry = getFragmentRegistry(self.CMakeCreatorDataDir)
+    if(templateFragmentFile not in registry.templates):
         print('                 === Error ===')
         print(" Template file cannot be read") 
-        print(exception)
+        print(" " + str(Path(self.CMakeCreatorDataDir + "/" + templateFragmentFile)))
         exit()
-      
-    fragmentContents =  f.read()
-    f.close()
 #
 # Check to make sure all of the parameters that are to be
 # substituted have template entries
 #
-    fragmentKeys = list(fragmentData.keys())
-    for i in range(len(fragmentData)):
-      findString = '$' + fragmentKeys[i]
-      findString = findString.strip()
-      if(fragmentContents.find(findString) == -1): 
+    placeholders = registry.placeholders[templateFragmentFile]
+    for key in fragmentData:
+      if(key not in placeholders): 
             print('                 === Error ===')
-            print(' Template variable \'' + findString +\
-                '\' is not in the template fragment file')
+            print(' Template variable \'$' + key + '\' is not in the template fragment file')
             print(' ' + templateFragmentFile)
             exit()
 #
+# Check that all of the template entries are specified
+#
+    for key in sorted(placeholders):
+      if(key not in fragmentData):
+        print('                 === Error ===')
+        print('A parameter in: ' + templateFragmentFile)
+        print('has not been specified.\n')
+        print('The parameter that needs to be specified :')
+        print('[',key, ']')
+        exit()
+#
 # Substitute in the parameters
 #
-    r  = Template(fragmentContents)
-    try:
-      fragmentFile = r.substitute(fragmentData)
-      return fragmentFile
-    except KeyError as exception:
-     print('                 === Error ===')
-     print('A parameter in: ' + rtemplateFragmentFile)
-     print('has not been specified.\n')
-     print('The parameter that needs to be specified :')
-     print('[',exception, ']')
-     exit()
+    return registry.templates[templateFragmentFile].substitute(fragmentData)
      
      
-  TRUE_VALS  = ( '1', 'true',  'True', 'TRUE',  'y', 'yes', 'Y', 'Yes', 'YES','ON','on','On')
-  FALSE_VALS = ( '0', 'false', 'False', 'FALSE','n', 'no',  'N', 'No',   'NO','OFF','off','Off')
+  CTEST_PROPERTIES = (("ctestCost","COST"),("ctestProcessors","PROCESSORS"),("ctestTimeout","TIMEOUT"),("ctestResourceGroups","RESOURCE_GROUPS"))
 #   
 #
 #   Stub for executing the class defined in this file 
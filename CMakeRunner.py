@@ -1,11 +1,19 @@
 import os
+import re
+import json
 import sys
 import copy
 import shutil
+import shlex
+import fnmatch
 import argparse
 import subprocess
 import platform
 import time
+import threading
+import signal
+import collections
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 #############################################################################
 #                                CMakeRunner.py 
@@ -37,6 +45,15 @@ import time
 # It is assumed that the CMakeFiles are those that were created using
 # the CMakeCreator.py program with targets "release" and "debug" defined.
 #
+# If a CMakeLists.txt file does not define a "release" target (e.g. one 
+# created with CMakeCreator -c) each build type is configured in its own 
+# build directory, build/Debug or build/Release, with CMAKE_BUILD_TYPE set, 
+# and compiled with the make command without a target. 
+#
+# With the --ninja option, and if ninja is found, cmake is run with -G Ninja,
+# each build type is configured in its own build directory as above, and 
+# projects are compiled with cmake --build --parallel. Otherwise make is used. 
+#
 # This program does not invoke any installation targets  
 # 
 # The information contained within an input XML data file
@@ -52,6 +69,95 @@ import time
 # (c = run ctest)
 # (v = use -V flag (verbose) for ctest)
 #
+# Independent projects can be run concurrently by specifying the number of 
+# projects to run at once with the -j option, e.g. 
+#
+# python3 -m CMakeRunner -x <inputFile.xml> -b -r -c -j 4
+#
+# Projects that must be completed before a project is started are specified 
+# with <dependsOn> elements of that project's <ProjectDir>. 
+# Projects that add the same library (<libDir> in CMakeCreator) build it in
+# the same directory : they do not run cmake or make at the same time. 
+#
+# The number of cores available (or the value specified with --cpus) is
+# divided between the projects that are running or ready to run when a
+# project is started (at most -j of them), and the resulting number of jobs
+# is passed to make (-j), cmake --build (CMAKE_BUILD_PARALLEL_LEVEL, used by
+# the debug and release targets) and ctest (--parallel) unless the XML make
+# or ctest command already specifies it. A project that starts alone, e.g.
+# in a chain of <dependsOn> projects, is given all of the cores. The job
+# count of a project is fixed when it starts : a project started alongside
+# others keeps its share when they finish before it does.
+#
+# When projects run concurrently, the output of each project is written 
+# to build/CMakeRunner.output.log in the project directory, a status line 
+# for the running projects is shown (on a terminal), and the last lines of
+# output of a failing command are printed and included in the summary. 
+#
+# The projects and tests run can be selected with --tests '[project/]test'
+# (glob patterns, e.g. 'Proj*/Solver*'), --only-failed (the projects and 
+# tests that did not pass in their last run), --changed-since <git rev> and
+# --changed-files <files> (the projects and targets affected by the changed 
+# files, see ChangeImpact.py). The selected tests are run with ctest -R. 
+# Projects with no selected tests are not run. 
+#
+# By default (--keep-going) a failed project does not affect the projects 
+# that do not depend upon it. With --fail-fast, the commands of the 
+# projects that are running are stopped when a project fails, and no 
+# further projects are started. With --retry-flaky N, the tests that fail 
+# are re-run (ctest --rerun-failed) up to N times; tests that pass when 
+# re-run are reported as flaky. 
+#
+# The exit status is 1 if a project failed or was cancelled (--fail-fast) 
+# and 130 if the run was interrupted (Ctrl-C), after the summary and report
+# are written. It is 0 otherwise. 
+#
+# By default the CMakeCache.txt file is removed before cmake is run. With 
+# the --incremental option the cache is kept, and cmake is only run if 
+# CMakeLists.txt, the cmake options, the cmake command or the compilers
+# have changed since the last successful cmake run. The cache is removed 
+# only if something other than CMakeLists.txt has changed. 
+#
+# The result of each project, along with a fingerprint of its inputs, is 
+# recorded for each compilation mode in CMakeRunner.fingerprints.json in 
+# the working directory. With the --skip-unchanged option, a project whose 
+# last run in the same compilation mode passed, whose fingerprint is 
+# unchanged and whose build directory is configured is reported as up to 
+# date and not run. Fingerprints are only computed and recorded with 
+# --skip-unchanged, so the first such run after a run without it runs every
+# project. The fingerprint covers 
+# the files in the project directory and in the directories referenced by 
+# its CMakeLists.txt (include and library directories), the commands and 
+# options used (not including the job counts added by CMakeRunner), and 
+# the compilers. 
+#
+# For projects configured with USE_CCACHE=ON (see CMakeCreator) and compiled
+# with ccache, the ccache hits and misses of the compilation are reported.
+# When projects run concurrently (-j) the counts include the compilations 
+# of the other projects running at the same time. 
+#
+# If the tests of a project specify RESOURCE_GROUPS (<ctestResourceGroups> 
+# in CMakeCreator), a ctest resource specification file providing a "cpus" 
+# resource with one slot per job of the project is created in the build 
+# directory and passed to ctest. If a test requires more cpus than the 
+# project has jobs, e.g. when -j divides the cores between projects, that 
+# number of slots is provided instead so that the test can be run. No other
+# resource is provided : tests that require other resources are reported, 
+# and fail to run. 
+#
+# At the end of a run, a report is written to CMakeRunner.json and, in JUnit
+# XML format, to CMakeRunner.junit.xml in the working directory. For each 
+# project the report gives the wall clock time, cpu time and peak resident 
+# set size of the configure, compile and test commands, and the time and 
+# result of each test as recorded by ctest in LastTest.log. 
+#
+# The phase times are also added to the SQLite database 
+# CMakeRunner.history.sqlite in the working directory, along with the 
+# compilation mode and git revision of each project. With the --compare 
+# option, the phases whose wall clock time exceeds the median of the last
+# HISTORY_WINDOW runs by more than --threshold percent (default 25) are 
+# reported. 
+#
 # Also one can use 
 #
 # python -m CMakeCreator -s
@@ -59,10 +165,16 @@ import time
 # to obtain a sample XML data file 
 # 
 # Assumptions : The cmake command is always executed from within a subdirectory named build
-#               of the directory containing the CMakeLists.txt file. 
+#               (or build/Debug and build/Release) of the directory containing the 
+#               CMakeLists.txt file. 
 #
 
 from XML_ParameterListArray import XML_ParameterListArray
+from ParameterSchema import ParameterSchema
+import BuildFingerprint
+import RunReport
+import RunHistory
+import ChangeImpact
 
 try:
     from pathlib  import Path
@@ -73,18 +185,79 @@ except Exception as e:
     print ("XXX                                     XXXX") 
     exit(1)
 
-def execCommand(command, consoleOutputFlag = False):
+#
+# Schema of CMakeRunner XML files. The input file is validated before any 
+# project is run so that all of its errors are reported together. 
+#
+CMAKE_RUNNER_SCHEMA = ParameterSchema("CMakeRunner_ParameterLists", {
+  "Common" : {"parameters" : {
+    "workingDir"        : {"type" : "string"},
+    "linuxCMakeCommand" : {"type" : "string"},
+    "linuxMakeCommand"  : {"type" : "string"},
+    "linuxCtestCommand" : {"type" : "string"},
+    "macCMakeCommand"   : {"type" : "string"},
+    "macMakeCommand"    : {"type" : "string"},
+    "macCtestCommand"   : {"type" : "string"},
+    "vsCMakeCommand"    : {"type" : "string"},
+    "vsMakeCommand"     : {"type" : "string"},
+    "vsCtestCommand"    : {"type" : "string"},
+    "globalCMakeOption" : {"type" : "cmakeOption", "multiple" : True}}},
+  "ProjectDir" : {"type" : "string", "required" : True, "multiple" : True, "parameters" : {
+    "index"            : {"type" : "string"},
+    "localCMakeOption" : {"type" : "cmakeOption", "multiple" : True},
+    "dependsOn"        : {"type" : "string", "multiple" : True}}}})
+
+#
+# Waits for the process p to complete. If usage is a dictionary, the wall 
+# clock time (sec), cpu time (sec) and peak resident set size (kB) of the 
+# process, including the processes it has waited for, are added to it. 
+# Cpu time and peak memory are None where os.wait4 is not available. 
+#
+def waitForProcess(p, startTime, usage = None):
+  if((usage == None) or (not hasattr(os, "wait4"))):
+    p.wait()
+    if(usage != None): 
+      usage.update({"wallTime" : time.monotonic() - startTime, "cpuTime" : None, "maxRSS" : None})
+    return
+  
+  (pid, status, rusage) = os.wait4(p.pid, 0)
+  if(os.WIFSIGNALED(status)): p.returncode = -os.WTERMSIG(status)
+  else                      : p.returncode = os.WEXITSTATUS(status)
+  
+  maxRSS = rusage.ru_maxrss
+  if(platform.system() == "Darwin"): maxRSS = maxRSS//1024   # bytes on macOS
+  usage.update({"wallTime" : time.monotonic() - startTime, 
+                "cpuTime"  : rusage.ru_utime + rusage.ru_stime, 
+                "maxRSS"   : maxRSS})
+
+#
+# Returns the environment of a command run with the variables of env added,
+# or None (the environment of this process) if env is None
+#
+def getCommandEnvironment(env):
+  if(env == None): return None
+  commandEnv = os.environ.copy()
+  commandEnv.update(env)
+  return commandEnv
+
+#
+# Executes command, returning (returnCode, runOutput, runError). If env is 
+# specified, its variables are added to the environment of the command. 
+#
+def execCommand(command, consoleOutputFlag = False, commandDir = None, usage = None, env = None):
+  startTime = time.monotonic()
 #
 # Console output 
 #
   if(consoleOutputFlag == True):
     if(platform.system() == "Darwin"):
-      p = subprocess.Popen(command,shell=True,stdout=None,stderr=None)
-      p.wait()
+      p = subprocess.Popen(command,shell=True,stdout=None,stderr=None,env=getCommandEnvironment(env),cwd=commandDir)
+      waitForProcess(p, startTime, usage)
     else:
       local_env = os.environ.copy()
-      p = subprocess.Popen(command,shell=True,stdout=None,stderr=None,env=local_env)
-      p.wait()
+      if(env != None): local_env.update(env)
+      p = subprocess.Popen(command,shell=True,stdout=None,stderr=None,env=local_env,cwd=commandDir)
+      waitForProcess(p, startTime, usage)
     returnCode = 0
     runOutput = None
     runError  = None
@@ -98,18 +271,244 @@ def execCommand(command, consoleOutputFlag = False):
   runOutput = None
 
   if(platform.system() == "Darwin"):
-    p = subprocess.Popen(command,shell=True,stdout=subprocess.PIPE,stderr=subprocess.PIPE)
+    p = subprocess.Popen(command,shell=True,stdout=subprocess.PIPE,stderr=subprocess.PIPE,env=getCommandEnvironment(env),cwd=commandDir)
   else:
     local_env = os.environ.copy() 
-    p = subprocess.Popen(command,shell=True,stdout=subprocess.PIPE,stderr=subprocess.PIPE,env=local_env)
+    if(env != None): local_env.update(env)
+    p = subprocess.Popen(command,shell=True,stdout=subprocess.PIPE,stderr=subprocess.PIPE,env=local_env,cwd=commandDir)
   
-  (runOutput,runError)  = p.communicate()
+  if(usage == None):
+    (runOutput,runError)  = p.communicate()
+  else:
+    #
+    # The pipes are read in separate threads so that the process can be 
+    # waited for with waitForProcess
+    #
+    outputs = {}
+    readers = []
+    for (name, stream) in (("stdout", p.stdout), ("stderr", p.stderr)):
+      reader = threading.Thread(target=lambda name, stream : outputs.__setitem__(name, stream.read()), args=(name, stream))
+      reader.start()
+      readers.append(reader)
+    for reader in readers: reader.join()
+    p.stdout.close()
+    p.stderr.close()
+    waitForProcess(p, startTime, usage)
+    runOutput = outputs["stdout"]
+    runError  = outputs["stderr"]
   
   returnCode = 0
   if((p.returncode != None) and (p.returncode != 0)):
     returnCode = p.returncode
   return (returnCode,runOutput,runError)
 
+#
+# Executes command with stdout and stderr merged, writing the output line 
+# by line to the file logFileName (appended) as it is produced. Only the 
+# last tailLines lines of output are kept in memory. Returns the return 
+# code and the list of the last lines of output. 
+#
+# If processes is specified, the process is added to it while it runs, and 
+# on Linux and Mac the command is run in its own process group so that it 
+# can be stopped with terminateProcess. If env is specified, its variables
+# are added to the environment of the command. 
+#
+def execCommandStreamed(command, commandDir, logFileName, usage = None, tailLines = 40, processes = None, env = None):
+  startTime  = time.monotonic()
+  newSession = ((processes != None) and (os.name == "posix"))
+  if(platform.system() == "Darwin"):
+    p = subprocess.Popen(command,shell=True,stdout=subprocess.PIPE,stderr=subprocess.STDOUT,env=getCommandEnvironment(env),cwd=commandDir,start_new_session=newSession)
+  else:
+    local_env = os.environ.copy() 
+    if(env != None): local_env.update(env)
+    p = subprocess.Popen(command,shell=True,stdout=subprocess.PIPE,stderr=subprocess.STDOUT,env=local_env,cwd=commandDir,start_new_session=newSession)
+  if(processes != None): processes.add(p)
+  
+  outputTail = collections.deque(maxlen=tailLines)
+  logFile    = open(logFileName,'ab')
+  logFile.write(("\n------ " + command + "\n\n").encode('utf-8'))
+  for line in p.stdout:
+    logFile.write(line)
+    outputTail.append(line.decode('utf-8', 'replace').rstrip("\n"))
+  logFile.close()
+  p.stdout.close()
+  waitForProcess(p, startTime, usage)
+  if(processes != None): processes.discard(p)
+  
+  returnCode = 0
+  if((p.returncode != None) and (p.returncode != 0)):
+    returnCode = p.returncode
+  return (returnCode, list(outputTail))
+
+#
+# Stops a process started by execCommandStreamed, along with the processes
+# it started (e.g. the compilers started by make)
+#
+def terminateProcess(p):
+  try:
+    if(os.name == "posix"): os.killpg(p.pid, signal.SIGTERM)
+    else                  : p.terminate()
+  except (ProcessLookupError, PermissionError):
+    pass
+
+#
+# Replaces sys.stdout while projects run concurrently on a terminal, and 
+# shows a status line for the running projects below the other output. 
+# The status line is erased before anything else is written, and redrawn 
+# every interval seconds by a separate thread. 
+#
+class ProgressDisplay(object):
+  
+  def __init__(self, getStatus, interval = 0.5):
+    self.stream      = sys.stdout
+    self.getStatus   = getStatus
+    self.interval    = interval
+    self.lock        = threading.RLock()
+    self.statusShown = False
+    self.stopEvent   = threading.Event()
+    self.thread      = threading.Thread(target=self.update, daemon=True)
+  
+  def start(self):
+    sys.stdout = self
+    self.thread.start()
+    
+  def stop(self):
+    self.stopEvent.set()
+    self.thread.join()
+    with self.lock:
+      self.clearStatus()
+    sys.stdout = self.stream
+    
+  def clearStatus(self):
+    if(self.statusShown):
+      self.stream.write("\r\033[K")
+      self.statusShown = False
+    
+  def write(self, text):
+    with self.lock:
+      self.clearStatus()
+      return self.stream.write(text)
+      
+  def flush(self):
+    self.stream.flush()
+  
+  def update(self):
+    while(not self.stopEvent.wait(self.interval)):
+      status = self.getStatus()
+      width  = shutil.get_terminal_size().columns - 1
+      with self.lock:
+        self.clearStatus()
+        if(status):
+          self.stream.write(status[:width])
+          self.statusShown = True
+        self.stream.flush()
+
+#
+# The data associated with the execution of a single <ProjectDir>
+#
+class ProjectTask(object):
+  
+  def __init__(self, projectDir, index, optionString):
+        self.projectDir       = projectDir
+        self.index            = index
+        self.optionString     = optionString
+        self.dependsOn        = []    # projectDir's of projects that must be run first
+        self.dependents       = []    # ProjectTasks that depend upon this project
+        self.waitCount        = 0     # number of dependencies not yet completed
+        self.failedDependency = None
+        self.status           = None  # "passed", "failed" or "skipped"
+        self.phases           = []    # timing and resource usage of each command run
+        self.tests            = []    # ctest results parsed from LastTest.log
+        self.duration         = 0.0   # estimated run time (sec) from previous runs
+        self.criticalPath     = 0.0   # estimated time (sec) to complete this project and its dependents
+        self.logFile          = None  # file receiving the command output when run concurrently
+        self.phase            = None  # phase being run 
+        self.phaseStart       = None
+        self.outputTail       = None  # last lines of output of a failed command
+        self.cancelled        = False # stopped by --fail-fast
+        self.testSelection    = None  # names of the tests to run (None = all tests)
+        self.deselected       = False # skipped because no tests were selected
+        self.jobs             = 1     # number of jobs of make and ctest, set when the project is started
+        self.libBuildDirs     = []    # build directories of the libraries (<libDir>) compiled by the project
+
+#
+# Sort key for <index> values : numeric values are ordered numerically
+# (so that 2 precedes 10) and before any non-numeric values.
+#
+def indexSortKey(index):
+  try:
+    return (0, float(index), "")
+  except (TypeError, ValueError):
+    return (1, 0.0, str(index))
+
+#
+# Returns the number of cpus available to this process, taking into account
+# the cpu affinity mask and any cgroup (container) cpu quota. 
+#
+def detectCpuCount():
+  cpuCount = os.cpu_count() or 1
+  if(hasattr(os, "sched_getaffinity")):
+    cpuCount = len(os.sched_getaffinity(0))
+  
+  quota  = None
+  period = None
+  try:
+    # cgroup v2 : cpu.max contains "quota period" or "max period"
+    f = open("/sys/fs/cgroup/cpu.max",'r')
+    fields = f.read().split()
+    f.close()
+    if(fields[0] != "max"):
+      quota  = int(fields[0])
+      period = int(fields[1])
+  except (OSError, ValueError, IndexError):
+    try:
+      # cgroup v1
+      f = open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us",'r')
+      quota = int(f.read())
+      f.close()
+      f = open("/sys/fs/cgroup/cpu/cpu.cfs_period_us",'r')
+      period = int(f.read())
+      f.close()
+    except (OSError, ValueError):
+      quota = None
+  
+  if((quota != None) and (period != None) and (quota > 0) and (period > 0)):
+    cpuCount = min(cpuCount, max(1, quota//period))
+  return cpuCount
+
+#
+# Returns the hit and miss counts of ccache as (hits, misses), or None if 
+# ccache (version >= 4) is not available. 
+#
+def getCCacheStats():
+  if(shutil.which("ccache") == None): return None
+  (returnCode,runOutput,runError) = execCommand("ccache --print-stats")
+  if((returnCode != 0) or (runOutput == None)): return None
+  
+  stats = {}
+  for line in runOutput.decode('utf-8','replace').splitlines():
+    fields = line.split("\t")
+    if(len(fields) != 2): continue
+    try:
+      stats[fields[0].strip()] = int(fields[1])
+    except ValueError:
+      continue
+  if("cache_miss" not in stats): return None
+  hits = stats.get("direct_cache_hit",0) + stats.get("preprocessed_cache_hit",0)
+  return (hits, stats["cache_miss"])
+
+# Returns True if a make, cmake --build or ctest command specifies a job count
+
+def hasJobsOption(command):
+  return (re.search(r"(^|\s)(-j|--jobs|--parallel)", command) != None)
+
+#
+# Appends the job count option to a make or ctest command unless the 
+# command already specifies a job count. 
+#
+def addJobsOption(command, jobsOption):
+  if(hasJobsOption(command)): return command
+  return command + " " + jobsOption
        
 class CMakeRunner(object):
   
@@ -123,8 +522,37 @@ class CMakeRunner(object):
         self.ctestFlag            = False
         self.buildFlag            = False
         self.flushFlag            = False
+        self.incrementalFlag      = False
+        self.ninjaFlag            = False
+        self.generator            = "make"
+        self.skipUnchangedFlag    = False
+        self.fingerprintStore     = None
+        self.compareFlag          = False
+        self.regressionThreshold  = 25.0
         self.projectIndex         = None
         self.testIndex            = None
+        self.jobs                 = 1
+        self.cpuBudget            = None
+        self.makeJobsOption       = None
+        self.ctestJobsOption      = None
+        self.cmakeCommand         = None
+        self.makeCommand          = None
+        self.buildCommand         = None
+        self.ctestCommand         = None
+        self.projectDurations     = {}
+        self.runningTasks         = []
+        self.failFastFlag         = False
+        self.retryFlaky           = 0
+        self.cancelReason         = None
+        self.cancelEvent          = threading.Event()
+        self.runningProcesses     = set()
+        self.libBuildLocks        = {}    # library build directory : lock held while it is configured or compiled
+        self.testPatterns         = []
+        self.projectDirs          = set() # all of the <ProjectDir>'s of the input file
+        self.onlyFailedFlag       = False
+        self.changedSince         = None
+        self.changedFiles         = []
+        self.outputLock           = threading.Lock()
 
     
   def parseOptions(self):
@@ -137,8 +565,23 @@ class CMakeRunner(object):
       parser.add_argument('--ctest',        "-c",action='store_true', dest='ctestFlag', help="run ctest")
       parser.add_argument('--build',        "-b",action='store_true', dest='buildFlag', help="build makefile")
       parser.add_argument('--flush',        "-f",action='store_true', dest='flushFlag', help="make clean")
+      parser.add_argument('--incremental',       action='store_true', dest='incrementalFlag', help="Keep CMakeCache.txt and only run cmake when its inputs have changed")
+      parser.add_argument('--ninja',             action='store_true', dest='ninjaFlag', help="Use the Ninja generator if ninja is available")
+      parser.add_argument('--skip-unchanged',    action='store_true', dest='skipUnchangedFlag', help="Skip projects whose inputs are unchanged since their last passing run")
+      parser.add_argument('--compare',           action='store_true', dest='compareFlag', help="Report phases that are slower than the median of previous runs")
+      parser.add_argument('--threshold',         dest='threshold',    default=25.0, type=float, help="Percentage slowdown reported as a regression by --compare (default 25)")
+      failurePolicy = parser.add_mutually_exclusive_group()
+      failurePolicy.add_argument('--fail-fast',  action='store_true', dest='failFastFlag', help="Stop all projects when a project fails")
+      failurePolicy.add_argument('--keep-going', action='store_false', dest='failFastFlag', help="Continue with the other projects when a project fails (default)")
+      parser.add_argument('--retry-flaky',       dest='retryFlaky',   default=0, type=int, help="Number of times failed tests are re-run (ctest --rerun-failed)")
+      parser.add_argument('--tests',             dest='testPatterns', default=[], action='append', help="Run only the tests matching a pattern [project/]test, e.g. 'Proj*/Solver*' (may be repeated)")
+      parser.add_argument('--only-failed',       action='store_true', dest='onlyFailedFlag', help="Run only the projects and tests that did not pass in their last run")
+      parser.add_argument('--changed-since',     dest='changedSince', default=None, help="Run only the projects and tests affected by the files changed since a git revision")
+      parser.add_argument('--changed-files',     dest='changedFiles', default=[], nargs='+', help="Run only the projects and tests affected by the specified changed files")
       parser.add_argument('--project',      "-p",dest='projectIndex', default=None, help="Index of specific project to run")
       parser.add_argument('--index',        "-i",dest='testIndex',    default=None, help="Index of specific test within a project to run")
+      parser.add_argument('--jobs',         "-j",dest='jobs',         default=1, type=int, help="Number of projects to run concurrently")
+      parser.add_argument('--cpus',              dest='cpus',         default=None, type=int, help="Number of cpus shared by make and ctest of all running projects (default: detected)")
 
       args = parser.parse_args()
       if(args.samplefileFlag):
@@ -166,15 +609,56 @@ class CMakeRunner(object):
       self.ctestFlag             = args.ctestFlag
       self.buildFlag             = args.buildFlag
       self.flushFlag             = args.flushFlag
+      self.incrementalFlag       = args.incrementalFlag
+      self.ninjaFlag             = args.ninjaFlag
+      self.skipUnchangedFlag     = args.skipUnchangedFlag
+      self.compareFlag           = args.compareFlag
+      self.failFastFlag          = args.failFastFlag
+      self.testPatterns          = args.testPatterns
+      self.onlyFailedFlag        = args.onlyFailedFlag
+      self.changedSince          = args.changedSince
+      self.changedFiles          = [os.path.abspath(f) for f in args.changedFiles]
+      
+      if(args.retryFlaky < 0):
+          print (' === Error ===')
+          print ("Number of test re-runs (--retry-flaky) must be >= 0")
+          exit(1)
+      self.retryFlaky = args.retryFlaky
+      
+      if(args.threshold < 0):
+          print (' === Error ===')
+          print ("Regression threshold (--threshold) must be >= 0")
+          exit(1)
+      self.regressionThreshold = args.threshold
       
       if(args.projectIndex != None) :
         self.projectIndex = int(args.projectIndex)
       if(args.testIndex != None):
         self.testIndex = int(args.testIndex)
       
+      if(args.jobs < 1):
+          print (' === Error ===')
+          print ("Number of concurrent projects (-j) must be >= 1")
+          exit(1)
+      self.jobs = args.jobs
+      
+      if(args.cpus != None):
+        if(args.cpus < 1):
+          print (' === Error ===')
+          print ("Number of cpus (--cpus) must be >= 1")
+          exit(1)
+        self.cpuBudget = args.cpus
+      else:
+        self.cpuBudget = detectCpuCount()
+      
       if(self.debugFlag)   : self.compileMode = "debug"
       if(self.releaseFlag) : self.compileMode = "release"
       
+      if(self.testPatterns and (not self.ctestFlag)):
+          print (' === Error ===')
+          print ("ctest (-c) must be specified when selecting tests with --tests")
+          exit(1)
+      
       if(self.ctestFlag and (not self.debugFlag) and (not self.releaseFlag )):
           print (' === Error ===')
           print ("Compilation type flag (-d or -r) must also ")
@@ -194,6 +678,13 @@ class CMakeRunner(object):
       sys.exit(1)
 
     paramList = XML_ParameterListArray(self.CMakeRunnerDataFile)
+    
+    (parameterValues, errors) = CMAKE_RUNNER_SCHEMA.validate(paramList)
+    if(errors):
+      print (' === Error ===')
+      print ("Invalid parameters in " + self.CMakeRunnerDataFile + " :")
+      for error in errors: print ("   " + error)
+      exit(1)
 
     # obtain the base path by
     
@@ -212,6 +703,11 @@ class CMakeRunner(object):
       workingDir = os.path.dirname(os.path.abspath(self.CMakeRunnerDataFile))
     
     
+    #
+    # The job count options of make and ctest are added when a project is 
+    # started (see getProjectJobs)
+    #
+    
     cmakeCommand = None
     makeCommand  = None
     ctestCommand = None
@@ -222,10 +718,13 @@ class CMakeRunner(object):
         
         if(self.compileMode != None):
           makeCommand  =  paramList.getParameterText("linuxMakeCommand","Common")
+          self.makeJobsOption = "-j "
+          self.buildCommand = makeCommand
           makeCommand += " " + self.compileMode
         
         if(self.ctestFlag):
           ctestCommand =  paramList.getParameterText("linuxCtestCommand", "Common")
+          self.ctestJobsOption = "--parallel "
           if(self.verboseFlag) : ctestCommand += " -V"
        
         
@@ -236,10 +735,13 @@ class CMakeRunner(object):
         
         if(self.compileMode != None):
           makeCommand  =  paramList.getParameterText("macMakeCommand","Common")
+          self.makeJobsOption = "-j "
+          self.buildCommand = makeCommand
           makeCommand += " " + self.compileMode
         
         if(self.ctestFlag):
           ctestCommand =  paramList.getParameterText("macCtestCommand", "Common")
+          self.ctestJobsOption = "--parallel "
           if(self.verboseFlag) : ctestCommand += " -V"
         
     elif(platform.system() == "Windows"):
@@ -250,11 +752,33 @@ class CMakeRunner(object):
         if(self.compileMode != None):
           makeCommand  =  paramList.getParameterText("vsMakeCommand","Common")
           makeCommand +=  self.compileMode
+          self.buildCommand = makeCommand
 
         if(self.ctestFlag):
           ctestCommand =  paramList.getParameterText("vsCtestCommand", "Common")
           ctestCommand +=  self.compileMode
     
+    #
+    # Ninja : configure with -G Ninja and compile with cmake --build. Falls back 
+    # to make if ninja is not found. 
+    #
+    self.generator = "make"
+    if(self.ninjaFlag):
+      if(platform.system() == "Windows"):
+        print("Note : --ninja is not used with the Visual Studio commands")
+      elif((shutil.which("ninja") == None) and (shutil.which("ninja-build") == None)):
+        print("Note : ninja not found, using make")
+      else:
+        self.generator = "ninja"
+        cmakeExecutable = "cmake"
+        if(cmakeCommand != None):
+          cmakeExecutable = shlex.quote(shlex.split(cmakeCommand)[0])
+          cmakeCommand   += " -G Ninja"
+        if(makeCommand != None):
+          makeCommand         = cmakeExecutable + " --build ."
+          self.buildCommand   = makeCommand
+          self.makeJobsOption = "--parallel "
+    
     #
     # Replace AMPERSAND with &. Used in Visual Studio commands 
     #
@@ -265,140 +789,869 @@ class CMakeRunner(object):
     OptionList = {}
     if(cmakeCommand != None) : 
       cmakeCommand = cmakeCommand.replace("AMPERSAND","&")
-      globalOptions = paramList.getParameterAll("globalCMakeOption","Common")
-      for p in globalOptions:
-        OptionList[p.text.split("=")[0].strip()] = p.text.split("=")[1].strip()
+      for (name, value) in parameterValues["Common"]["globalCMakeOption"]:
+        OptionList[name] = value
       print("CMake Command Used : " + cmakeCommand)
 
     if(makeCommand != None) : 
       print("Make Command Used  : " +  makeCommand)
     if(ctestCommand != None) : 
       print("ctest Command Used : " + ctestCommand)
+    print("CPU budget         : " + str(self.cpuBudget) + " (divided between up to " + str(self.jobs) + " concurrent project(s))")
     print("---------------------------------------------------------------------")
+    
+    self.cmakeCommand = cmakeCommand
+    self.makeCommand  = makeCommand
+    self.ctestCommand = ctestCommand
 
     
-    paramListArray = paramList.getParameterListAll("ProjectDir")
     pTasks = []
     
-    for p in paramListArray:
+    for p in parameterValues["ProjectDir"]:
         LocalOptionList = {}
         LocalOptionList = copy.deepcopy(OptionList)
-        localOptions    =  p.findall("localCMakeOption")
-        for q in localOptions:
-          LocalOptionList[q.text.split("=")[0].strip()] = q.text.split("=")[1].strip()
+        for (name, value) in p["localCMakeOption"]:
+          LocalOptionList[name] = value
           
         optionString = ""
         for q in LocalOptionList.keys():
           optionString += " " + q + "=" + LocalOptionList[q] 
          
-        indexInput = None
-        if(p.find("index") != None) : indexInput = paramList.getValueOrText(p.find("index"))
+        indexInput = p["index"]
         
         if(indexInput == None) : indexVal = "1"
         else                   : indexVal = indexInput
-        print((p.text.strip(), indexVal,optionString))
-        pTasks.append((p.text.strip(), indexVal,optionString))
         
-    projectTasks = sorted(pTasks, key=lambda project : project[1])
-    projectCount = len(projectTasks)
-    projectIndex = 0
+        task = ProjectTask(p["#text"], indexVal, optionString)
+        task.dependsOn += p["dependsOn"]
+        print((task.projectDir, task.index, task.optionString))
+        pTasks.append(task)
+        
+    projectTasks = sorted(pTasks, key=lambda project : indexSortKey(project.index))
+    self.projectDirs = set([os.path.normpath(p.projectDir) for p in projectTasks])
+    if(self.projectIndex != None):
+      projectTasks = [p for p in projectTasks if (int(p.index) == self.projectIndex)]
+    self.projectCount = len(projectTasks)
+    self.projectStarted = 0
     
-    summaryString = ""
+    self.summaryString = ""
     
     if(os.path.isfile(Path(workingDir)/"CMakeRunner.log")): os.remove(Path(workingDir)/"CMakeRunner.log")
     
-    consoleOutputFlag = True
-    returnCode = 0
-    for p in projectTasks:
-        if((self.projectIndex != None) and (int(p[1]) != self.projectIndex)):
-          continue
-        projectIndex = projectIndex + 1
-        projectDir = os.path.abspath(Path(workingDir)/p[0])
-        print("\n\nXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX")
-        print("[" + str(projectIndex) + "/" + str(projectCount) + "] " + projectDir)
-        projectString = "[" + str(projectIndex) + "/" + str(projectCount) + "] " + p[0]  + "\n"
-        summaryString += projectString
-        f = open(Path(workingDir)/"CMakeRunner.log", 'a')
-        f.write(projectString)
-        f.flush()
-        f.close()
-        projectString = ""
-        
-        print("XXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX")
-        if(os.path.isdir(projectDir)):
-          
-            if(self.flushFlag):
-              print("+++++++++++++ Removing build and test files +++++++++++++++++++++++++")
-              os.chdir(Path(projectDir))
-              shutil.rmtree("build",ignore_errors=True)
-              shutil.rmtree("Testing",ignore_errors=True)
-                  
-            if(not os.path.isdir(Path(projectDir)/"build")):
-                os.mkdir(Path(projectDir)/"build")
-                
-            if(os.path.isdir(Path(projectDir)/"build")):
-                os.chdir(Path(projectDir)/"build")
-                returnCode = 0
-                
-                if(self.buildFlag) :
-                  print("\n++++++++++++++++++++++    Running CMake     +++++++++++++++++++++++++\n")
-                  if(os.path.isfile("CMakeCache.txt")) : os.remove("CMakeCache.txt")
-                  command = cmakeCommand + " ../ " + p[2]
-                  print("Command : " + command +"\n") 
-                  (returnCode,runOutput,runError) = execCommand(command, consoleOutputFlag)
-                  if(returnCode == 0): 
-                    projectString += "Cmake       : passed "+ "\n"
-                  else:   
-                    projectString += "Cmake       : failed "+ "\n"         
-
-                if((returnCode == 0) and (self.compileMode != None)):
-                    print("\n++++++++++++++++++++++    Compiling         +++++++++++++++++++++++++\n")
-                    print("Command : " + makeCommand +"\n") 
-                    (returnCode,runOutput,runError) = execCommand(makeCommand, consoleOutputFlag)
-                    if(returnCode == 0): 
-                      projectString += "Compilation : passed "+ "\n"
-                    else               : 
-                      projectString += "Compilation : failed "+ "\n"
-
-
-                if((returnCode == 0) and (self.ctestFlag)):
-                    print("\n+++++++++++++++++++++     Running Tests      ++++++++++++++++++++++++\n")
-                    
-                    if((self.testIndex != None) and (self.projectIndex != None)) :
-                      ctestCommand += " -I " + str(self.testIndex) + "," + str(self.testIndex) 
-                    print("Command : " + ctestCommand +"\n") 
-                    (returnCode,runOutput,runError) = execCommand(ctestCommand, consoleOutputFlag)
-                    if(returnCode == 0): 
-                      projectString += "Ctest       : passed "+ "\n"
-                    else               : 
-                      projectString += "Ctest       : failed "+ "\n"
-                    
-                    os.chdir(Path(projectDir)/"build")
-                    shutil.copyfile(Path(projectDir)/"build"/"Testing"/"Temporary"/"LastTest.log",Path(projectDir)/"Testing"/"LastTest.log")
-                    print("Output log file : " + str(Path(projectDir)/"Testing"/"LastTest.log")) 
-                    print("\n+++++++++++++++++++++     Tests Finished     ++++++++++++++++++++++++\n\n")   
-                summaryString += "\n"
-                projectString += "\n" 
-                summaryString += projectString
-
-                f = open(Path(workingDir)/"CMakeRunner.log", 'a')
-                f.write(projectString)
-                f.flush()
-                f.close()
-                
-        os.chdir(self.localDirectory)
+    self.fingerprintStore = BuildFingerprint.FingerprintStore(Path(workingDir)/"CMakeRunner.fingerprints.json")
+    
+    if(self.testPatterns or self.onlyFailedFlag or (self.changedSince != None) or self.changedFiles):
+      projectTasks = self.selectProjects(projectTasks, workingDir)
+      self.projectCount = len(projectTasks)
+    
+    history = RunHistory.RunHistory(Path(workingDir)/"CMakeRunner.history.sqlite")
+    self.projectDurations = history.getProjectDurations(self.compileMode, self.HISTORY_WINDOW)
+    history.close()
+    
+    #
+    # After an interrupt (Ctrl-C) the projects that were running have been 
+    # stopped : the summary and report of the projects run are still written
+    #
+    interrupted = False
+    try:
+      self.scheduleProjects(projectTasks, workingDir)
+    except KeyboardInterrupt:
+      interrupted = True
+      print("\nRun interrupted")
       
     print("\n")
     print("XXXXXXXXXXXXXXXXXXX         SUMMARY       XXXXXXXXXXXXXXXXXXXXXXXXXXX\n\n")
-    print(summaryString)
+    print(self.summaryString)
     
     print("\n")
     elapsed_time = time.monotonic() - start_time
     print("Elapsed time (sec) : " + str(elapsed_time))
     print("Elapsed time (min) : " + str(elapsed_time/60.0))  
-    print("Elapsed time (hrs) : " + str(elapsed_time/360.0))
+    print("Elapsed time (hrs) : " + str(elapsed_time/3600.0))
+    
+    report = RunReport.createReport(projectTasks, elapsed_time, self.compileMode)
+    RunReport.writeJSONReport(Path(workingDir)/"CMakeRunner.json", report)
+    RunReport.writeJUnitReport(Path(workingDir)/"CMakeRunner.junit.xml", report)
+    print("Run report         : " + str(Path(workingDir)/"CMakeRunner.json") + ", " + str(Path(workingDir)/"CMakeRunner.junit.xml"))
+    
+    #
+    # Compare the phase times with the history of previous runs, then add
+    # this run to the history 
+    #
+    history = RunHistory.RunHistory(Path(workingDir)/"CMakeRunner.history.sqlite")
+    if(self.compareFlag):
+      regressions = history.findRegressions(projectTasks, self.compileMode, self.regressionThreshold, self.HISTORY_WINDOW)
+      print("\n")
+      print("XXXXXXXXXXXXXXXXXXX      REGRESSIONS      XXXXXXXXXXXXXXXXXXXXXXXXXXX\n")
+      if(not regressions):
+        print("No phase slower than the median of the last " + str(self.HISTORY_WINDOW) 
+              + " runs by more than " + str(self.regressionThreshold) + "%")
+      for (project, phase, wallTime, medianTime) in regressions:
+        print("{0:<30s} {1:<10s} : {2:9.2f} sec, median {3:9.2f} sec (+{4:.0f}%)".format(project, phase, 
+              wallTime, medianTime, 100.0*(wallTime - medianTime)/medianTime))
+    history.addRun(projectTasks, self.compileMode, workingDir)
+    history.close()
+    
+    # A non-zero exit status lets scripts and CI pipelines detect failed and stopped runs
+    
+    if(interrupted): exit(130)
+    if([p for p in projectTasks if (p.status in ("failed","cancelled"))]): exit(1)
 
 
+#
+#=========== Project scheduling  ================================
+#
+# Projects are run in a pool of self.jobs workers. A project is started 
+# only after all of the projects listed in its <dependsOn> elements have
+# finished. Among the projects that are ready to run, the project with the 
+# longest critical path (its estimated run time plus the longest chain of 
+# estimated run times of the projects that depend upon it) is started 
+# first, so that long running projects do not end up running alone at the 
+# end. Run times are estimated from the CMakeRunner history of previous 
+# runs; projects without history are assigned the mean of the known 
+# estimates. Projects with equal critical paths (e.g. when there is no 
+# history) are started in <index> order. A project whose dependency did 
+# not pass is skipped. 
+#
+# Dependencies on projects that are not selected for this run (by the -p 
+# option, --tests, --only-failed, --changed-since or --changed-files) are 
+# treated as satisfied. 
+#
+
+  def scheduleProjects(self, projectTasks, workingDir):
+    
+    taskMap = {}
+    for p in projectTasks:
+      taskMap[os.path.normpath(p.projectDir)] = p
+      
+    for p in projectTasks:
+      for d in p.dependsOn:
+        dependency = taskMap.get(os.path.normpath(d))
+        if(dependency == None):
+          if(os.path.normpath(d) not in self.projectDirs):
+            print (' === Error ===')
+            print ("Project specified with <dependsOn> parameter")
+            print ("is not a <ProjectDir> of this file.")
+            print ("Project         : " + p.projectDir)
+            print ("<dependsOn>     : " + d)
+            exit(1)
+          continue
+        p.waitCount += 1
+        dependency.dependents.append(p)
+        
+    self.checkForCycles(projectTasks)
+    self.setCriticalPaths(projectTasks)
+    
+    sortKey = lambda project : (-project.criticalPath, indexSortKey(project.index))
+    ready   = sorted([p for p in projectTasks if (p.waitCount == 0)], key=sortKey)
+    running = {}
+    
+    progressDisplay = None
+    if((self.jobs > 1) and sys.stdout.isatty()):
+      progressDisplay = ProgressDisplay(self.getProgressStatus)
+      progressDisplay.start()
+    
+    try:
+      self.runScheduledProjects(ready, running, sortKey, workingDir)
+    finally:
+      if(progressDisplay != None): progressDisplay.stop()
+  
+  def runScheduledProjects(self, ready, running, sortKey, workingDir):
+    with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+      try:
+        while(ready or running):
+          while(ready and (len(running) < self.jobs)):
+            task = ready.pop(0)
+            if(self.cancelEvent.is_set()):
+              self.skipProject(task, workingDir, self.cancelReason)
+              ready.extend(self.releaseDependents(task))
+              ready.sort(key=sortKey)
+              continue
+            if(task.failedDependency != None):
+              self.skipProject(task, workingDir, "dependency " + task.failedDependency + " did not pass")
+              ready.extend(self.releaseDependents(task))
+              ready.sort(key=sortKey)
+              continue
+            task.jobs = self.getProjectJobs(len(running) + 1 + len(ready))
+            running[executor.submit(self.runProject, task, workingDir)] = task
+        
+          if(not running): continue
+        
+          done, notDone = wait(running, return_when=FIRST_COMPLETED)
+          for f in done:
+            task = running.pop(f)
+            f.result()
+            ready.extend(self.releaseDependents(task))
+          ready.sort(key=sortKey)
+      except KeyboardInterrupt:
+        #
+        # The commands of projects run concurrently are in their own process 
+        # groups and do not receive the interrupt. They are stopped before 
+        # leaving the with block, which waits for the running projects. 
+        #
+        self.cancelProjects(None)
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+  
+  #
+  # Returns the number of jobs of a project started when activeProjects 
+  # projects (including it) are running or ready to run 
+  #
+  def getProjectJobs(self, activeProjects):
+    return max(1, self.cpuBudget//max(1, min(self.jobs, activeProjects)))
+    
+  def setCriticalPaths(self, projectTasks):
+    knownDurations  = [self.projectDurations[k] for k in self.projectDurations]
+    defaultDuration = 0.0
+    if(knownDurations): defaultDuration = sum(knownDurations)/len(knownDurations)
+    for p in projectTasks:
+      p.duration = self.projectDurations.get(os.path.normpath(p.projectDir), defaultDuration)
+    
+    # Dependents are visited before the projects they depend upon 
+    
+    pending = {}
+    for p in projectTasks: pending[p] = len(p.dependents)
+    ready = [p for p in projectTasks if (pending[p] == 0)]
+    dependsOnTasks = {}
+    for p in projectTasks: dependsOnTasks[p] = []
+    for p in projectTasks:
+      for d in p.dependents: dependsOnTasks[d].append(p)
+    while(ready):
+      p = ready.pop()
+      p.criticalPath = p.duration + max([d.criticalPath for d in p.dependents] + [0.0])
+      for q in dependsOnTasks[p]:
+        pending[q] -= 1
+        if(pending[q] == 0): ready.append(q)
+  
+  # Returns the dependents of task that have become ready to run. A project 
+  # skipped because none of its tests were selected is not a failed dependency.
+  
+  def releaseDependents(self, task):
+    readyTasks = []
+    for d in task.dependents:
+      if((task.status != "passed") and (not task.deselected) and (d.failedDependency == None)):
+        d.failedDependency = task.projectDir
+      d.waitCount -= 1
+      if(d.waitCount == 0): readyTasks.append(d)
+    return readyTasks
+    
+  def checkForCycles(self, projectTasks):
+    waitCount = {}
+    for p in projectTasks: waitCount[p] = p.waitCount
+    ready   = [p for p in projectTasks if (waitCount[p] == 0)]
+    visited = 0
+    while(ready):
+      p = ready.pop()
+      visited += 1
+      for d in p.dependents:
+        waitCount[d] -= 1
+        if(waitCount[d] == 0): ready.append(d)
+    if(visited != len(projectTasks)):
+      print (' === Error ===')
+      print ("Cyclic <dependsOn> specification between projects :")
+      for p in projectTasks:
+        if(waitCount[p] != 0): print ("   " + p.projectDir)
+      exit(1)
+      
+  def skipProject(self, task, workingDir, reason):
+    task.status = "skipped"
+    with self.outputLock:
+      self.projectStarted += 1
+      projectString  = "[" + str(self.projectStarted) + "/" + str(self.projectCount) + "] " + task.projectDir  + "\n"
+      projectString += "\nSkipped     : " + reason + " \n\n"
+      print("\n" + projectString)
+      self.appendToLog(projectString, workingDir)
+      
+  def appendToLog(self, projectString, workingDir):
+    self.summaryString += projectString
+    f = open(Path(workingDir)/"CMakeRunner.log", 'a')
+    f.write(projectString)
+    f.flush()
+    f.close()
+  
+  # Output of commands is sent directly to the console when projects are
+  # run one at a time. When projects are run concurrently, the output of 
+  # each command is written to the project log file build/CMakeRunner.output.log 
+  # as it is produced, and only the result of the command is printed, 
+  # followed by the last lines of output if the command failed. 
+  #
+  # The wall clock time, cpu time and peak memory of the command are
+  # recorded in task.phases under the name phase. env contains the variables
+  # added to the environment of the command. 
+  #
+  
+  def execProjectCommand(self, task, phase, command, commandDir, env = None):
+    if(self.cancelEvent.is_set()):
+      task.cancelled = True
+      return 1
+    
+    usage = {}
+    if(self.jobs == 1):
+      (returnCode,runOutput,runError) = execCommand(command, True, commandDir, usage, env)
+    else:
+      task.phase      = phase
+      task.phaseStart = time.monotonic()
+      with self.outputLock:
+        self.runningTasks.append(task)
+      locks = self.acquireLibBuildLocks(task, phase)
+      try:
+        if(self.cancelEvent.is_set()):
+          (returnCode, outputTail) = (1, [])
+          usage.update({"wallTime" : 0.0, "cpuTime" : None, "maxRSS" : None})
+        else:
+          (returnCode, outputTail) = execCommandStreamed(command, commandDir, task.logFile, usage, self.OUTPUT_TAIL_LINES, self.runningProcesses, env)
+      finally:
+        for lock in locks: lock.release()
+      if((returnCode != 0) and self.cancelEvent.is_set()): task.cancelled = True
+      with self.outputLock:
+        self.runningTasks.remove(task)
+        result = "passed" if (returnCode == 0) else "failed"
+        if(task.cancelled): result = "cancelled"
+        print("------ " + task.projectDir + " : " + phase + " " + result + " ({0:.1f} sec)".format(usage["wallTime"]))
+        if((returnCode != 0) and (not task.cancelled)):
+          task.outputTail = outputTail
+          print("\n".join(outputTail))
+          print("------ Output log file : " + str(task.logFile) + "\n")
+    
+    phaseRecord = {"phase" : phase, "command" : command, "status" : "passed" if (returnCode == 0) else "failed"}
+    if(task.cancelled): phaseRecord["status"] = "cancelled"
+    phaseRecord.update(usage)
+    task.phases.append(phaseRecord)
+    return returnCode
+  
+  #
+  # Projects that add the same library (<libDir>) configure and compile it in
+  # the same build directory. When projects are run concurrently, a project 
+  # waits for the other projects to finish configuring or compiling the 
+  # libraries it uses before it runs cmake or make. The locks are acquired 
+  # in the order of the build directories, so that two projects cannot each 
+  # wait for the other. Returns the locks acquired. 
+  #
+  def acquireLibBuildLocks(self, task, phase):
+    if(phase not in ("configure","compile")): return []
+    with self.outputLock:
+      locks = [(d, self.libBuildLocks.setdefault(d, threading.Lock())) for d in task.libBuildDirs]
+    for (libBuildDir, lock) in locks:
+      if(not lock.acquire(blocking=False)):
+        with self.outputLock:
+          print("------ " + task.projectDir + " : " + phase + " waiting for " + libBuildDir)
+        lock.acquire()
+    return [lock for (libBuildDir, lock) in locks]
+  
+  #
+  # Returns the build directories of the libraries added to a project with 
+  # add_subdirectory (<libDir> in CMakeCreator). With CMakeCreator -c, the 
+  # library is built in a directory for each build type : the directory 
+  # containing them is returned. 
+  #
+  def getLibBuildDirs(self, projectDir):
+    try:
+      f = open(Path(projectDir)/"CMakeLists.txt",'r')
+      cmakeLists = f.read()
+      f.close()
+    except OSError:
+      return []
+    libBuildDirs = set()
+    for binaryDir in re.findall(r'add_subdirectory\(\s*"[^"]*"\s+"([^"]*)"', cmakeLists):
+      binaryDir = binaryDir.split("/${CMAKE_BUILD_TYPE}")[0].replace("${CMAKE_SOURCE_DIR}", projectDir)
+      libBuildDirs.add(os.path.realpath(os.path.join(projectDir, binaryDir)))
+    return sorted(libBuildDirs)
+  
+  #
+  # --fail-fast : Stops the commands that are running and prevents any 
+  # further commands from being started. failedTask is the project that 
+  # failed (None if the run is interrupted). 
+  #
+  def cancelProjects(self, failedTask):
+    with self.outputLock:
+      if(self.cancelEvent.is_set()): return
+      if(failedTask != None): self.cancelReason = "--fail-fast, " + failedTask.projectDir + " failed"
+      else                  : self.cancelReason = "run interrupted"
+      self.cancelEvent.set()
+    for p in list(self.runningProcesses): terminateProcess(p)
+  
+  # Returns the status line of the projects running concurrently 
+  
+  def getProgressStatus(self):
+    now = time.monotonic()
+    with self.outputLock:
+      status = [p.projectDir + " " + p.phase + " {0:.0f}s".format(now - p.phaseStart) for p in self.runningTasks]
+    if(not status): return ""
+    return "[running] " + " | ".join(status)
+  
+  #
+  # Returns "skip" if cmake need not be run, "reconfigure" if cmake should be
+  # run with the existing CMakeCache.txt and "configure" if cmake should be
+  # run after CMakeCache.txt is removed. 
+  #
+  def getConfigureAction(self, buildDir, configureStamp):
+    if(not self.incrementalFlag): return "configure"
+    if(not os.path.isfile(buildDir/"CMakeCache.txt")): return "configure"
+    
+    lastStamp = BuildFingerprint.readStamp(buildDir/"CMakeRunner.configure")
+    if((lastStamp == None) or (lastStamp.get("settings") != configureStamp["settings"])):
+      return "configure"
+    if(lastStamp.get("cmakeLists") != configureStamp["cmakeLists"]):
+      return "reconfigure"
+    return "skip"
+    
+  #
+  # Returns True if the build directories of the project have been configured. 
+  # The fingerprint of a project does not cover its build directory, so a 
+  # project whose build directory has been removed is not up to date. 
+  #
+  def isConfigured(self, layout, configureTypes, buildDir):
+    if(layout == "configDirs"):
+      for buildType in configureTypes:
+        if(not os.path.isfile(buildDir.parent/buildType.capitalize()/"CMakeCache.txt")): return False
+      return True
+    return os.path.isfile(buildDir/"CMakeCache.txt")
+    
+  #
+  # Returns a hash of the inputs that determine the result of running a project.
+  # The job counts of make and ctest, which are added when the project is 
+  # started, are not included. 
+  #
+  def getProjectFingerprint(self, task, projectDir):
+    sourceDirs = self.getProjectSourceDirs(projectDir)
+    settings   = [self.cmakeCommand, self.makeCommand, self.ctestCommand, task.optionString, 
+                  self.compileMode, self.buildFlag, self.ctestFlag, self.testIndex, task.testSelection, 
+                  BuildFingerprint.hashToolchain()]
+    return BuildFingerprint.hashStrings([BuildFingerprint.hashDirectoryTrees(sourceDirs, self.FINGERPRINT_IGNORE)] + settings)
+    
+  #
+  # Returns the project directory and the directories referenced by its 
+  # CMakeLists.txt (include and library directories)
+  #
+  def getProjectSourceDirs(self, projectDir):
+    sourceDirs = [projectDir]
+    try:
+      f = open(Path(projectDir)/"CMakeLists.txt",'r')
+      cmakeLists = f.read()
+      f.close()
+    except OSError:
+      cmakeLists = ""
+    
+    referencedDirs  = re.findall(r'"\$\{CMAKE_SOURCE_DIR\}/([^"]*)"', cmakeLists)
+    referencedDirs += re.findall(r'target_include_directories\([^)"]*"([^"$]+)"', cmakeLists)
+    for d in referencedDirs:
+      dirName = os.path.normpath(os.path.join(projectDir, d))
+      if(os.path.isdir(dirName) and (os.path.basename(dirName) not in self.FINGERPRINT_IGNORE)): 
+        sourceDirs.append(dirName)
+    return sourceDirs
+    
+  #
+  # Returns "targets" if the CMakeLists.txt of the project defines the debug 
+  # and release targets created by CMakeCreator, and "configDirs" otherwise. 
+  # The debug and release targets re-run cmake in the build directory, which 
+  # is not done when using Ninja, so "configDirs" is always used with Ninja.
+  #
+  def getBuildLayout(self, projectDir):
+    if(self.generator == "ninja"): return "configDirs"
+    try:
+      f = open(Path(projectDir)/"CMakeLists.txt",'r')
+      cmakeLists = f.read()
+      f.close()
+    except OSError:
+      return "targets"
+    if(re.search(r"add_custom_target\s*\(\s*release\b", cmakeLists, re.IGNORECASE)): return "targets"
+    return "configDirs"
+    
+  #
+  # Returns (layout, configureTypes, buildDir). With the "configDirs" layout 
+  # each build type is configured in its own directory build/Debug or 
+  # build/Release. If no compilation mode is specified, both are configured. 
+  #
+  def getProjectBuildDir(self, projectDir):
+    buildDir       = Path(projectDir)/"build"
+    layout         = self.getBuildLayout(projectDir)
+    configureTypes = [None]
+    if(layout == "configDirs"):
+      if(self.compileMode != None):
+        configureTypes = [self.compileMode]
+        buildDir       = buildDir/self.compileMode.capitalize()
+      else:
+        configureTypes = ["debug","release"]
+        buildDir       = buildDir/"Release"
+    return (layout, configureTypes, buildDir)
+    
+  # Returns True if the build directory was configured to compile with ccache 
+  
+  def usesCCache(self, buildDir):
+    try:
+      f = open(buildDir/"CMakeCache.txt",'r')
+      cmakeCache = f.read()
+      f.close()
+    except OSError:
+      return False
+    if(not re.search(r"^USE_CCACHE:BOOL=(ON|TRUE|1)\s*$", cmakeCache, re.MULTILINE | re.IGNORECASE)): return False
+    m = re.search(r"^CCACHE_PROGRAM:FILEPATH=(.*)$", cmakeCache, re.MULTILINE)
+    return ((m != None) and (os.path.basename(m.group(1).strip()).startswith("ccache")))
+    
+  #
+  # Creates the ctest resource specification file, providing jobs cpus, if 
+  # the tests in buildDir specify resource groups. Returns the file name, or 
+  # None if not needed. Only the "cpus" resource is provided : tests that 
+  # require any other resource fail to run, and are reported here. A test 
+  # that requires more cpus than the jobs of the project could never be 
+  # scheduled by ctest, so at least the largest number of cpus required by a
+  # test is provided. 
+  #
+  def createResourceSpecFile(self, buildDir, jobs):
+    try:
+      f = open(buildDir/"CTestTestfile.cmake",'r')
+      ctestFile = f.read()
+      f.close()
+    except OSError:
+      return None
+    if(ctestFile.find("RESOURCE_GROUPS") == -1): return None
+    
+    resourceTypes = set()
+    slots         = jobs
+    for resourceGroups in re.findall(r'RESOURCE_GROUPS\s+"([^"]*)"', ctestFile):
+      testCpus = 0
+      for group in resourceGroups.split(";"):
+        fields = [field.strip() for field in group.split(",")]
+        count  = 1
+        if(re.match(r"^\d+$", fields[0])): count = int(fields.pop(0))
+        for field in fields:
+          m = re.match(r"^([a-z_][a-z0-9_]*)\s*:\s*(\d+)$", field)
+          if(m == None): continue
+          resourceTypes.add(m.group(1))
+          if(m.group(1) == "cpus"): testCpus += count*int(m.group(2))
+      slots = max(slots, testCpus)
+    if(resourceTypes - {"cpus"}):
+      print (' === Error ===')
+      print ("Tests specify RESOURCE_GROUPS with resources other than cpus,")
+      print ("the only resource provided to ctest. These tests will not be run.")
+      print ("Resources       : " + ", ".join(sorted(resourceTypes - {"cpus"})))
+      print ("Build directory : " + str(buildDir))
+    
+    resourceSpec = {"version" : {"major" : 1, "minor" : 0},
+                    "local"   : [{"cpus" : [{"id" : "0", "slots" : slots}]}]}
+    resourceSpecFile = buildDir/"CMakeRunnerResources.json"
+    f = open(resourceSpecFile,'w')
+    json.dump(resourceSpec, f, indent=2)
+    f.close()
+    return resourceSpecFile
+    
+  def configureProject(self, task, projectDir, buildDir, command):
+    if(not os.path.isdir(buildDir)): os.makedirs(buildDir)
+    configureStamp = {"cmakeLists" : BuildFingerprint.hashFile(Path(projectDir)/"CMakeLists.txt"),
+                      "settings"   : BuildFingerprint.hashStrings([command, BuildFingerprint.hashToolchain()])}
+    configureAction = self.getConfigureAction(buildDir, configureStamp)
+    
+    if(configureAction == "skip"):
+      print("CMakeLists.txt, options and compilers unchanged : cmake not run\n")
+      return (0, "Cmake       : up to date "+ "\n")
+      
+    if(configureAction == "reconfigure"):
+      print("Only CMakeLists.txt changed : keeping CMakeCache.txt\n")
+    elif(os.path.isfile(buildDir/"CMakeCache.txt")) : 
+      os.remove(buildDir/"CMakeCache.txt")
+    print("Command : " + command +"\n") 
+    returnCode = self.execProjectCommand(task, "configure", command, buildDir)
+    if(returnCode == 0): 
+      BuildFingerprint.writeStamp(buildDir/"CMakeRunner.configure", configureStamp)
+      return (returnCode, "Cmake       : passed "+ "\n")
+    BuildFingerprint.removeStamp(buildDir/"CMakeRunner.configure")
+    return (returnCode, "Cmake       : failed "+ "\n")
+    
+#
+#=========== Project and test selection  ========================
+#
+# --changed-since : projects are selected if they are affected by the files 
+#                   changed since the git revision (including uncommitted 
+#                   and untracked files). 
+# --changed-files : projects are selected if they are affected by the 
+#                   specified files. 
+#
+#                   The targets affected by a changed file are determined 
+#                   with a ChangeImpact.ImpactIndex created from the 
+#                   CMakeLists.txt files of the projects. If not all the 
+#                   targets of a project are affected, only the tests of the
+#                   affected targets are run. 
+# --only-failed   : projects are selected if they did not pass in their last
+#                   run. If tests failed in that run, only those tests are run.
+# --tests         : projects are selected if they have tests matching one of 
+#                   the [project/]test patterns. Only the matching tests are run.
+#
+# The tests of a project are obtained with ctest -N in its build directory. 
+# If the build directory has not been configured, the selection of tests is 
+# made after cmake is run. 
+#
+
+  def selectProjects(self, projectTasks, workingDir):
+    impact = None
+    if((self.changedSince != None) or self.changedFiles):
+      changedFiles = list(self.changedFiles)
+      if(self.changedSince != None): changedFiles += self.getChangedFiles(workingDir)
+      projectDirs = {}
+      for task in projectTasks:
+        projectDirs[os.path.normpath(task.projectDir)] = os.path.abspath(Path(workingDir)/task.projectDir)
+      impact = ChangeImpact.ImpactIndex(projectDirs).getImpact(changedFiles)
+    
+    selectedTasks = []
+    for task in projectTasks:
+      projectDir     = os.path.abspath(Path(workingDir)/task.projectDir)
+      fingerprintKey = os.path.normpath(task.projectDir)
+      reason         = None
+      
+      if(impact != None):
+        if(fingerprintKey not in impact):
+          reason = "not affected by the changed files"
+        elif(impact[fingerprintKey] != None):
+          task.testSelection = impact[fingerprintKey]
+      
+      if((reason == None) and self.onlyFailedFlag):
+        if(self.fingerprintStore.getStatus(fingerprintKey, self.compileMode) == "passed"):
+          reason = "passed in last run"
+        elif(self.ctestFlag and self.fingerprintStore.getFailedTests(fingerprintKey, self.compileMode)):
+          failedTests = self.fingerprintStore.getFailedTests(fingerprintKey, self.compileMode)
+          if(task.testSelection != None): failedTests = [t for t in failedTests if (t in task.testSelection)]
+          task.testSelection = failedTests
+          if(not failedTests): reason = "no failed tests affected by the changed files"
+      
+      if((reason == None) and self.testPatterns):
+        (layout, configureTypes, buildDir) = self.getProjectBuildDir(projectDir)
+        testSelection = self.selectTests(task, buildDir)
+        if(testSelection != None):
+          task.testSelection = testSelection
+          if(not testSelection): reason = "no tests matching " + " ".join(self.testPatterns)
+          
+      if(reason == None): 
+        selectedTasks.append(task)
+      else:
+        print("Not selected : " + task.projectDir + " (" + reason + ")")
+    return selectedTasks
+  
+  #
+  # Returns the names of the tests of the project in buildDir that match the 
+  # --tests patterns (and, with --only-failed, failed in the last run), or 
+  # None if buildDir has not been configured. 
+  #
+  def selectTests(self, task, buildDir):
+    if(not os.path.isfile(buildDir/"CTestTestfile.cmake")): return None
+    
+    ctestExecutable = shlex.split(self.ctestCommand)[0]
+    (returnCode,runOutput,runError) = execCommand(shlex.quote(ctestExecutable) + " -N", False, buildDir)
+    testNames = re.findall(r"^\s*Test\s+#\d+: (.*)$", runOutput.decode('utf-8','replace'), re.MULTILINE)
+    
+    selectedTests = []
+    projectName   = os.path.normpath(task.projectDir)
+    for testName in testNames:
+      testName = testName.strip()
+      for pattern in self.testPatterns:
+        (projectPattern, sep, testPattern) = pattern.rpartition("/")
+        if(projectPattern and (not fnmatch.fnmatchcase(projectName, projectPattern))): continue
+        if(fnmatch.fnmatchcase(testName, testPattern)):
+          selectedTests.append(testName)
+          break
+    if(task.testSelection != None):
+      selectedTests = [t for t in selectedTests if (t in task.testSelection)]
+    return selectedTests
+  
+  #
+  # Returns the absolute names of the files changed since the git revision 
+  # self.changedSince in the git repository containing workingDir
+  #
+  def getChangedFiles(self, workingDir):
+    (returnCode,runOutput,runError) = execCommand("git rev-parse --show-toplevel", False, workingDir)
+    if(returnCode != 0):
+      print (' === Error ===')
+      print ("--changed-since requires the working directory to be in a git repository")
+      print ("Working directory : " + str(workingDir))
+      exit(1)
+    topLevel = runOutput.decode('utf-8','replace').strip()
+    
+    (returnCode,diffOutput,runError) = execCommand("git diff --name-only " + shlex.quote(self.changedSince) + " --", False, topLevel)
+    if(returnCode != 0):
+      print (' === Error ===')
+      print ("git diff failed for the revision specified with --changed-since")
+      print ("Revision : " + self.changedSince)
+      if(runError) : print(runError.decode('utf-8', 'replace'))
+      exit(1)
+    (returnCode,untrackedOutput,runError) = execCommand("git ls-files --others --exclude-standard", False, topLevel)
+    
+    # Build output and CMakeRunner files are not changes 
+    
+    changedFiles = []
+    for name in (diffOutput + untrackedOutput).decode('utf-8','replace').splitlines():
+      name = name.strip()
+      if((not name) or [n for n in name.split("/") if (n in self.FINGERPRINT_IGNORE)]): continue
+      changedFiles.append(os.path.normpath(os.path.join(topLevel, name)))
+    return changedFiles
+    
+  def runProject(self, task, workingDir):
+    with self.outputLock:
+      self.projectStarted += 1
+      projectCounter = "[" + str(self.projectStarted) + "/" + str(self.projectCount) + "] "
+      
+    projectDir = os.path.abspath(Path(workingDir)/task.projectDir)
+    (layout, configureTypes, buildDir) = self.getProjectBuildDir(projectDir)
+    print("\n\nXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX\n"
+        + projectCounter + projectDir + "\n"
+        + "XXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX")
+
+    if(not os.path.isdir(projectDir)):
+      print (' === Error ===')
+      print ("Directory specified with <ProjectDir> parameter")
+      print ("does not exist : project not run")
+      print ("Directory specified : " + projectDir)
+      task.status = "skipped"
+      with self.outputLock:
+        self.appendToLog(projectCounter + task.projectDir + "\n\n" + "Skipped     : directory does not exist "+ "\n\n", workingDir)
+      return
+
+    projectString     = ""
+    task.libBuildDirs = self.getLibBuildDirs(projectDir)
+    fingerprintKey    = os.path.normpath(task.projectDir)
+    fingerprint       = None
+    if(self.skipUnchangedFlag): fingerprint = self.getProjectFingerprint(task, projectDir)
+    
+    if(self.skipUnchangedFlag and (not self.flushFlag) and self.isConfigured(layout, configureTypes, buildDir)
+       and self.fingerprintStore.isUpToDate(fingerprintKey, self.compileMode, fingerprint)):
+      print("Inputs unchanged since last passing run : project not run")
+      task.status = "passed"
+      with self.outputLock:
+        self.appendToLog(projectCounter + task.projectDir + "\n\n" + "Up to date  : inputs unchanged "+ "\n\n", workingDir)
+      return
+    
+    if(self.flushFlag):
+      print("+++++++++++++ Removing build and test files +++++++++++++++++++++++++")
+      shutil.rmtree(Path(projectDir)/"build",ignore_errors=True)
+      shutil.rmtree(Path(projectDir)/"Testing",ignore_errors=True)
+    
+    if(not os.path.isdir(buildDir)):
+        os.makedirs(buildDir)
+    
+    if(self.jobs > 1):
+        task.logFile = Path(projectDir)/"build"/"CMakeRunner.output.log"
+        open(task.logFile,'w').close()
+    
+    returnCode = 0
+    
+    if(self.buildFlag) :
+      print("\n++++++++++++++++++++++    Running CMake     +++++++++++++++++++++++++\n")
+      for buildType in configureTypes:
+        if(layout == "configDirs"):
+          configureDir = buildDir.parent/buildType.capitalize()
+          command = self.cmakeCommand + " ../../ -DCMAKE_BUILD_TYPE=" + buildType.capitalize() + task.optionString
+        else:
+          configureDir = buildDir
+          command = self.cmakeCommand + " ../ " + task.optionString
+        (returnCode, configureString) = self.configureProject(task, projectDir, configureDir, command)
+        if(not task.cancelled): projectString += configureString
+        if(returnCode != 0): break
+    elif((layout == "configDirs") and (self.compileMode != None) and (not os.path.isfile(buildDir/"CMakeCache.txt"))):
+      print(str(buildDir) + " has not been configured (use -b)\n")
+      projectString += "Cmake       : not run, build directory not configured "+ "\n"
+      returnCode = 1
+
+    #
+    # Tests selected with --tests in a project that was not configured
+    # when the projects were selected
+    #
+    if((returnCode == 0) and self.testPatterns and (task.testSelection == None)):
+      task.testSelection = self.selectTests(task, buildDir)
+      if(not task.testSelection):
+        print("No tests matching " + " ".join(self.testPatterns) + " : project not run")
+        task.status     = "skipped"
+        task.deselected = True
+        with self.outputLock:
+          self.appendToLog(projectCounter + task.projectDir + "\n\n" + projectString 
+                         + "Skipped     : no tests matching " + " ".join(self.testPatterns) + "\n\n", workingDir)
+        return
+
+    if((returnCode == 0) and (self.compileMode != None)):
+        print("\n++++++++++++++++++++++    Compiling         +++++++++++++++++++++++++\n")
+        makeCommand = self.makeCommand
+        if(layout == "configDirs") : makeCommand = self.buildCommand
+        #
+        # The debug and release targets run cmake --build, which make 
+        # does not treat as a recursive make : the job count is passed 
+        # to it with CMAKE_BUILD_PARALLEL_LEVEL. 
+        #
+        makeEnv = None
+        if((self.makeJobsOption != None) and (not hasJobsOption(makeCommand))):
+          makeCommand = addJobsOption(makeCommand, self.makeJobsOption + str(task.jobs))
+          makeEnv     = {"CMAKE_BUILD_PARALLEL_LEVEL" : str(task.jobs)}
+        print("Command : " + makeCommand +"\n") 
+        ccacheStats = None
+        if(self.usesCCache(buildDir)): ccacheStats = getCCacheStats()
+        returnCode = self.execProjectCommand(task, "compile", makeCommand, buildDir, makeEnv)
+        if(returnCode == 0): 
+          projectString += "Compilation : passed "+ "\n"
+        elif(not task.cancelled): 
+          projectString += "Compilation : failed "+ "\n"
+    
+        if(ccacheStats != None):
+          ccacheStatsAfter = getCCacheStats()
+          if(ccacheStatsAfter != None):
+            projectString += "Ccache      : " + str(ccacheStatsAfter[0] - ccacheStats[0]) + " hits, " \
+                           + str(ccacheStatsAfter[1] - ccacheStats[1]) + " misses"
+            if(self.jobs > 1) : projectString += " (includes concurrent projects)"
+            projectString += "\n"
+
+
+    if((returnCode == 0) and (self.ctestFlag)):
+        print("\n+++++++++++++++++++++     Running Tests      ++++++++++++++++++++++++\n")
+    
+        ctestCommand = self.ctestCommand
+        if(self.ctestJobsOption != None):
+          ctestCommand = addJobsOption(ctestCommand, self.ctestJobsOption + str(task.jobs))
+        resourceSpecFile = self.createResourceSpecFile(buildDir, task.jobs)
+        if(resourceSpecFile != None):
+          ctestCommand += " --resource-spec-file " + shlex.quote(str(resourceSpecFile))
+        if((self.testIndex != None) and (self.projectIndex != None)) :
+          ctestCommand += " -I " + str(self.testIndex) + "," + str(self.testIndex) 
+        if(task.testSelection != None):
+          ctestCommand += " -R " + shlex.quote("^(" + "|".join([re.escape(t) for t in task.testSelection]) + ")$")
+        print("Command : " + ctestCommand +"\n") 
+        returnCode  = self.execProjectCommand(task, "test", ctestCommand, buildDir)
+        lastTestLog = buildDir/"Testing"/"Temporary"/"LastTest.log"
+        task.tests  = RunReport.parseLastTestLog(lastTestLog)
+    
+        #
+        # --retry-flaky : only the tests that failed are re-run 
+        #
+        reruns = 0
+        while((returnCode != 0) and (reruns < self.retryFlaky) and (not task.cancelled)):
+          reruns += 1
+          print("\nRe-running failed tests (" + str(reruns) + "/" + str(self.retryFlaky) + ")\n")
+          returnCode = self.execProjectCommand(task, "retest", ctestCommand + " --rerun-failed", buildDir)
+          RunReport.mergeRerunResults(task.tests, RunReport.parseLastTestLog(lastTestLog))
+    
+        if((returnCode == 0) and (reruns > 0)):
+          flakyTests = [t["name"] for t in task.tests if (t.get("reruns",0) > 0)]
+          projectString += "Ctest       : passed after " + str(reruns) + " re-run(s), flaky : " + ", ".join(flakyTests) + "\n"
+        elif(returnCode == 0): 
+          projectString += "Ctest       : passed "+ "\n"
+        elif(not task.cancelled): 
+          projectString += "Ctest       : failed "+ "\n"
+        if(os.path.isfile(lastTestLog) and os.path.isdir(Path(projectDir)/"Testing")):
+          shutil.copyfile(lastTestLog,Path(projectDir)/"Testing"/"LastTest.log")
+          print("Output log file : " + str(Path(projectDir)/"Testing"/"LastTest.log")) 
+        print("\n+++++++++++++++++++++     Tests Finished     ++++++++++++++++++++++++\n\n")   
+    
+    if(returnCode == 0): task.status = "passed"
+    else               : task.status = "failed"
+    
+    if(task.cancelled):
+      task.status    = "cancelled"
+      projectString += "Cancelled   : " + self.cancelReason + " \n"
+    elif((returnCode != 0) and self.failFastFlag):
+      self.cancelProjects(task)
+    
+    with self.outputLock:
+      failedTests = [t["name"] for t in task.tests if (t["status"] != "passed")]
+      self.fingerprintStore.setResult(fingerprintKey, self.compileMode, fingerprint, task.status, failedTests)
+      self.fingerprintStore.save()
+      if((task.status == "failed") and (task.outputTail != None)):
+        projectString += "\nLast lines of output (" + str(task.logFile) + ") :\n\n" + "\n".join(task.outputTail) + "\n"
+      self.appendToLog(projectCounter + task.projectDir + "\n\n" + projectString + "\n", workingDir)
+    
+
 #
 #=========== Local utility routines  ============================
 #   
@@ -407,6 +1660,20 @@ class CMakeRunner(object):
 
   def get_script_path(self):
     return os.path.dirname(os.path.realpath(sys.argv[0]))
+    
+  # Build output and CMakeRunner files that are not inputs of a project 
+  
+  FINGERPRINT_IGNORE = ("build","Testing","Debug","Release","CMakeRunner.log","CMakeRunner.fingerprints.json",
+                        "CMakeRunner.json","CMakeRunner.junit.xml","CMakeRunner.history.sqlite")
+   
+  # Number of previous runs whose median times are used by --compare and
+  # to estimate project run times for scheduling 
+  
+  HISTORY_WINDOW = 10
+  
+  # Number of lines of output kept for the summary of a failed command 
+  
+  OUTPUT_TAIL_LINES = 40
    
 
 #   
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                               ChangeImpact.py
+#
+# Author: C. Anderson
+# Origin date : June 12, 2020
+#############################################################################
+#
+# Copyright  2020 Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+#
+# Determines the projects and targets affected by a set of changed files.
+#
+# The CMakeLists.txt file of each project (as created by CMakeCreator) is
+# read to obtain, for each target, its main source, additional sources,
+# sources shared through OBJECT libraries, test input files and include
+# directories, along with the include directories and library directories
+# (<libDir>) common to all targets. The headers included by the sources
+# (#include "..." or <...> found in the include directories) are found by
+# scanning the sources.
+#
+# A changed file affects
+#
+#   the targets whose sources, included headers or test files contain it
+#   all targets of a project if it is the project CMakeLists.txt, is
+#       contained in a library directory of the project (libraries are
+#       linked to every target) or is any other file in the project directory
+#
+# Files in include directories that are not included by any target do not
+# affect the project.
+#
+
+import os
+import re
+
+#
+# Names of directories containing build output
+#
+BUILD_DIRS = ("build","Testing","Debug","Release")
+
+INCLUDE_PATTERN = re.compile(r'^\s*#\s*include\s*["<]([^">]+)[">]', re.MULTILINE)
+
+def isInDirectory(fileName, directory):
+    return fileName.startswith(os.path.join(directory, ""))
+
+def resolvePath(name, projectDir):
+    name = name.replace("${CMAKE_SOURCE_DIR}", projectDir)
+    return os.path.realpath(os.path.join(projectDir, name))
+
+#
+# Returns the files included by fileName, and recursively by the files it
+# includes, that are found in the directory of fileName or in includeDirs.
+# includeCache is a dictionary of the files included directly by a file,
+# keyed by the file and the include directories searched.
+#
+def getIncludedFiles(fileName, includeDirs, includeCache):
+    includedFiles = set()
+    pending       = [fileName]
+    while(pending):
+        name     = pending.pop()
+        cacheKey = (name, tuple(includeDirs))
+        if(cacheKey not in includeCache):
+            includeCache[cacheKey] = []
+            try:
+                f = open(name,'r',errors='replace')
+                contents = f.read()
+                f.close()
+            except OSError:
+                contents = ""
+            for include in INCLUDE_PATTERN.findall(contents):
+                for directory in [os.path.dirname(name)] + includeDirs:
+                    candidate = os.path.realpath(os.path.join(directory, include))
+                    if(os.path.isfile(candidate)):
+                        includeCache[cacheKey].append(candidate)
+                        break
+        for include in includeCache[cacheKey]:
+            if(include not in includedFiles):
+                includedFiles.add(include)
+                pending.append(include)
+    return includedFiles
+
+#
+# Returns (targets, includeDirs, libDirs) for the CMakeLists.txt of a
+# project, where targets is a dictionary of target name : list of files
+# (sources and test input files) specified for the target.
+#
+def parseCMakeLists(projectDir):
+    try:
+        f = open(os.path.join(projectDir,"CMakeLists.txt"),'r')
+        cmakeLists = f.read()
+        f.close()
+    except OSError:
+        return ({}, [], [])
+
+    includeDirs = [resolvePath(d, projectDir) for d in re.findall(r'list\(APPEND IncludeDirs "([^"]*)"\)', cmakeLists)]
+    libDirs     = [resolvePath(d, projectDir) for d in re.findall(r'add_subdirectory\(\s*"([^"]*)"', cmakeLists)]
+
+    # Sources of the OBJECT libraries of sources shared by several targets
+
+    objectLibs = {}
+    for (libName, sources) in re.findall(r'add_library\(\s*(\S+)\s+OBJECT\s+([^)]*)\)', cmakeLists):
+        objectLibs[libName] = re.findall(r'"([^"]*)"', sources)
+
+    #
+    # Each target block starts with set(mainExecName <name>), or, in
+    # CMakeLists.txt files with a foreach loop over the main sources, with
+    # if("${mainExecName}.cpp" STREQUAL "<name>.cpp")
+    #
+    blockStart = re.compile(r'set\(mainExecName\s+(\S+)\s*\)|if\("\$\{mainExecName\}\.cpp"\s+STREQUAL\s+"([^"]+)\.cpp"\)')
+    starts     = [(m.start(), m.group(1) or m.group(2)) for m in blockStart.finditer(cmakeLists)]
+    targets    = {}
+    for i in range(len(starts)):
+        end   = starts[i+1][0] if (i + 1 < len(starts)) else len(cmakeLists)
+        block = cmakeLists[starts[i][0]:end]
+        files = []
+        m = re.search(r'add_executable\(\s*\S+\s+([^)]*)\)', block)
+        if(m != None):
+            files += re.findall(r'"([^"]*)"', m.group(1))
+            for libName in re.findall(r'\$<TARGET_OBJECTS:([^>]+)>', m.group(1)):
+                files += objectLibs.get(libName, [])
+        files += re.findall(r'file\(COPY\s+"([^"$]*)"', block)
+        files += [starts[i][1] + ".xml"]
+        targetIncludeDirs = re.findall(r'target_include_directories\(\$\{mainExecName\}\s+PUBLIC\s+"([^"]*)"', block)
+        targets[starts[i][1]] = {"files"       : [resolvePath(q, projectDir) for q in files],
+                                 "includeDirs" : [resolvePath(q, projectDir) for q in targetIncludeDirs]}
+    return (targets, includeDirs, libDirs)
+
+#
+# The reverse index from files to the projects and targets that use them
+#
+class ImpactIndex(object):
+
+    #
+    # projectDirs is a dictionary of project name : project directory
+    #
+    def __init__(self, projectDirs):
+        self.projects    = {}   # project name : (projectDir, libDirs, target names)
+        self.fileTargets = {}   # file : set of (project name, target name)
+        includeCache     = {}
+        for projectName in projectDirs:
+            projectDir = os.path.realpath(projectDirs[projectName])
+            (targets, includeDirs, libDirs) = parseCMakeLists(projectDir)
+            self.projects[projectName] = (projectDir, libDirs, list(targets))
+            for targetName in targets:
+                files = set(targets[targetName]["files"])
+                for fileName in targets[targetName]["files"]:
+                    files |= getIncludedFiles(fileName, targets[targetName]["includeDirs"] + includeDirs, includeCache)
+                for fileName in files:
+                    self.fileTargets.setdefault(fileName, set()).add((projectName, targetName))
+
+    #
+    # Returns a dictionary of project name : affected target names (None if
+    # all targets of the project are affected) for the changed files.
+    #
+    def getImpact(self, changedFiles):
+        impact = {}
+        for fileName in changedFiles:
+            fileName = os.path.realpath(fileName)
+            for (projectName, targetName) in self.fileTargets.get(fileName, ()):
+                if(projectName not in impact)   : impact[projectName] = set()
+                if(impact[projectName] != None) : impact[projectName].add(targetName)
+            for projectName in self.projects:
+                if(self.affectsProject(projectName, fileName)): impact[projectName] = None
+        for projectName in impact:
+            if(impact[projectName] != None): impact[projectName] = sorted(impact[projectName])
+        return impact
+
+    # Returns True if the changed file fileName affects all targets of a project
+
+    def affectsProject(self, projectName, fileName):
+        (projectDir, libDirs, targetNames) = self.projects[projectName]
+        for libDir in libDirs:
+            if(isInDirectory(fileName, libDir)):
+                relativeName = os.path.relpath(fileName, libDir)
+                return (relativeName.split(os.sep)[0] not in BUILD_DIRS)
+        if(not isInDirectory(fileName, projectDir)): return False
+        relativeName = os.path.relpath(fileName, projectDir)
+        if(relativeName.split(os.sep)[0] in BUILD_DIRS): return False
+        if(relativeName == "CMakeLists.txt"): return True
+        return (not self.isTargetFile(fileName, projectName))
+
+    def isTargetFile(self, fileName, projectName):
+        for (name, targetName) in self.fileTargets.get(fileName, ()):
+            if(name == projectName): return True
+        return False
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                               ParameterSchema.py
+#
+# Author: C. Anderson
+# Origin date : June 12, 2020
+#############################################################################
+#
+# Copyright  2020 Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+#
+# Typed schemas for XML parameter list files.
+#
+# A schema is a dictionary of parameter list name : field. A field is a
+# dictionary with the (optional) keys
+#
+#   "type"       : type of the value of the element (the value attribute,
+#                  or the text if there is no value attribute), one of the
+#                  keys of CONVERTERS. None if the element has no value.
+#   "required"   : True if the element must be specified (default False)
+#   "multiple"   : True if the element may be specified more than once
+#                  (default False)
+#   "default"    : value used if the element is not specified
+#   "parameters" : dictionary of child element name : field
+#   "other"      : field of child elements not in "parameters". If not
+#                  specified, such child elements are reported as errors.
+#
+# A schema is compiled once into a converter for each field. validate()
+# then converts all of the parameters of a document in a single pass,
+# returning the typed values along with every error found, so that all
+# errors in an input file can be reported together.
+#
+# The typed value of an element is its converted value, or, for an element
+# with child parameters, a dictionary of child name : typed value (with the
+# converted value of the element itself, if it has a type, under "#text").
+# The typed value of an element with "multiple" set is a list.
+#
+
+import re
+
+from XML_ParameterListArray import TRUE_VALS, FALSE_VALS
+
+def convertString(strVal):
+    return strVal
+
+def convertBool(strVal):
+    if(strVal in TRUE_VALS) : return True
+    if(strVal in FALSE_VALS): return False
+    raise ValueError("'" + strVal + "' is not a boolean (true/false, on/off, yes/no, 1/0)")
+
+def convertInt(strVal):
+    try:
+        return int(strVal)
+    except ValueError:
+        raise ValueError("'" + strVal + "' is not an integer") from None
+
+def convertFloat(strVal):
+    try:
+        return float(strVal)
+    except ValueError:
+        raise ValueError("'" + strVal + "' is not a number") from None
+
+def convertVersion(strVal):
+    if(re.match(r"^\d+(\.\d+){0,3}$", strVal) == None):
+        raise ValueError("'" + strVal + "' is not a version number (e.g. 3.16)")
+    return strVal
+
+# A cmake option of the form name=value, returned as (name, value)
+
+def convertCMakeOption(strVal):
+    if(strVal.find("=") < 0):
+        raise ValueError("'" + strVal + "' is not a cmake option of the form -DNAME=VALUE")
+    (name, value) = strVal.split("=",1)
+    return (name.strip(), value.strip())
+
+#
+# ctest RESOURCE_GROUPS : groups separated by ; of the form 
+# [count,]type:slots[,type:slots...]. Only the "cpus" resource, the resource
+# that CMakeRunner provides to ctest, may be used. 
+#
+def convertResourceGroups(strVal):
+    for group in strVal.split(";"):
+        fields = [f.strip() for f in group.split(",")]
+        if(re.match(r"^\d+$", fields[0])): fields = fields[1:]
+        if(not fields):
+            raise ValueError("'" + strVal + "' is not a list of resource groups (e.g. 2,cpus:1)")
+        for field in fields:
+            m = re.match(r"^([a-z_][a-z0-9_]*)\s*:\s*\d+$", field)
+            if(m == None):
+                raise ValueError("'" + strVal + "' is not a list of resource groups (e.g. 2,cpus:1)")
+            if(m.group(1) != "cpus"):
+                raise ValueError("resource '" + m.group(1) + "' is not provided by CMakeRunner, only cpus is")
+    return strVal
+
+CONVERTERS = {"string"         : convertString,
+              "bool"           : convertBool,
+              "int"            : convertInt,
+              "long"           : convertInt,
+              "float"          : convertFloat,
+              "double"         : convertFloat,
+              "version"        : convertVersion,
+              "cmakeOption"    : convertCMakeOption,
+              "resourceGroups" : convertResourceGroups}
+
+#
+# Returns the value attribute of an element, or its text if the value
+# attribute is not specified, with leading and trailing white space
+# removed. Returns None if neither is specified or the value is empty.
+#
+def getElementValue(element):
+    strVal = element.get("value")
+    if(strVal == None): strVal = element.text
+    if(strVal == None): return None
+    strVal = strVal.strip()
+    if(strVal == ""): return None
+    return strVal
+
+class SchemaField(object):
+
+    def __init__(self, name, field):
+        for key in field:
+            if(key not in ("type","required","multiple","default","parameters","other")):
+                raise Exception("Unknown schema key '" + key + "' for " + name)
+        self.required  = field.get("required", False)
+        self.multiple  = field.get("multiple", False)
+        self.default   = field.get("default")
+        self.converter = None
+        if(field.get("type") != None):
+            if(field["type"] not in CONVERTERS):
+                raise Exception("Unknown schema type '" + str(field["type"]) + "' for " + name)
+            self.converter = CONVERTERS[field["type"]]
+        self.children = None
+        if("parameters" in field):
+            self.children = {}
+            for childName in field["parameters"]:
+                self.children[childName] = SchemaField(childName, field["parameters"][childName])
+        self.other = None
+        if("other" in field):
+            self.other = SchemaField("*", field["other"])
+            if(self.children == None): self.children = {}
+
+    #
+    # Returns the typed value of instances, the elements named name of the
+    # element with path path, appending the errors found to errors.
+    #
+    def convertInstances(self, name, instances, path, errors):
+        if(path != ""): path += "/"
+        path += name
+        if(len(instances) == 0):
+            if(self.required): errors.append(path + " : required parameter not specified")
+            if(self.multiple): return []
+            return self.default
+        if((len(instances) > 1) and (not self.multiple)):
+            errors.append(path + " : specified " + str(len(instances)) + " times, only one instance allowed")
+        if(len(instances) == 1):
+            values = [self.convert(instances[0], path, errors)]
+        else:
+            values = [self.convert(instances[i], path + "[" + str(i+1) + "]", errors) for i in range(len(instances))]
+        if(self.multiple): return values
+        return values[0]
+
+    # Returns the typed value of element, the element with path path 
+
+    def convert(self, element, path, errors):
+        value = None
+        if(self.converter != None):
+            strVal = getElementValue(element)
+            if(strVal == None):
+                if(self.required): errors.append(path + " : no value specified")
+                value = self.default
+            else:
+                try:
+                    value = self.converter(strVal)
+                except ValueError as err:
+                    errors.append(path + " : " + str(err))
+        if(self.children == None): return value
+
+        values = {}
+        if(self.converter != None): values["#text"] = value
+        childInstances = {}
+        for child in element:
+            if(not isinstance(child.tag, str)): continue    # comments
+            childInstances.setdefault(child.tag, []).append(child)
+        for childName in self.children:
+            values[childName] = self.children[childName].convertInstances(childName, childInstances.get(childName, []), path, errors)
+        for childName in childInstances:
+            if(childName in self.children): continue
+            if(self.other != None):
+                values[childName] = self.other.convertInstances(childName, childInstances[childName], path, errors)
+            else:
+                errors.append((path + "/" if (path != "") else "") + childName + " : unknown parameter")
+        return values
+
+class ParameterSchema(object):
+
+    #
+    # rootTag is the tag of the root element of the documents, schema the
+    # dictionary of parameter list name : field.
+    #
+    def __init__(self, rootTag, schema):
+        self.rootTag = rootTag
+        self.root    = SchemaField(rootTag, {"parameters" : schema})
+
+    #
+    # Returns (values, errors) for the parameter lists of paramList (an
+    # XML_ParameterListArray), where values is a dictionary of parameter
+    # list name : typed value and errors is a list of the errors found.
+    #
+    def validate(self, paramList):
+        errors = []
+        if(paramList.root.tag != self.rootTag):
+            errors.append("Root element is <" + str(paramList.root.tag) + ">, <" + self.rootTag + "> expected")
+        values = self.root.convert(paramList.root, "", errors)
+        return (values, errors)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                               RunHistory.py
+#
+# Author: C. Anderson
+# Origin date : June 12, 2020
+#############################################################################
+#
+# Copyright  2020 Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+#
+# A history of the phase timings of CMakeRunner runs, stored in an SQLite
+# database.
+#
+# Each row records one phase (configure, compile or test) of one project
+# in one run: the compilation mode, the git revision of the project
+# directory (if any), the wall clock time, cpu time, peak resident set
+# size and the result of the phase.
+#
+# A phase has regressed if its wall clock time exceeds the median of the
+# last passing runs of the same project, phase and compilation mode by
+# more than a specified percentage.
+#
+
+import os
+import sqlite3
+import statistics
+import subprocess
+from datetime import datetime
+
+#
+# Increases in wall clock time smaller than this (sec) are not reported as
+# regressions, whatever the percentage.
+#
+MIN_REGRESSION_TIME = 1.0
+
+#
+# Minimum number of previous runs required to compare with
+#
+MIN_HISTORY_RUNS = 3
+
+#
+# Returns the git revision of the repository containing directory, or
+# "" if directory is not in a git repository.
+#
+def getRevision(directory):
+    try:
+        p = subprocess.run(["git","rev-parse","--short","HEAD"], cwd=directory,
+                           stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return ""
+    if(p.returncode != 0): return ""
+    return p.stdout.decode('utf-8','replace').strip()
+
+class RunHistory(object):
+
+    def __init__(self, fileName):
+        self.fileName   = fileName
+        self.connection = sqlite3.connect(str(fileName))
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS phases (
+                                   runId       INTEGER,
+                                   date        TEXT,
+                                   project     TEXT,
+                                   phase       TEXT,
+                                   compileMode TEXT,
+                                   revision    TEXT,
+                                   wallTime    REAL,
+                                   cpuTime     REAL,
+                                   maxRSS      INTEGER,
+                                   status      TEXT)""")
+        self.connection.execute("""CREATE INDEX IF NOT EXISTS phasesKey
+                                   ON phases (project, phase, compileMode, runId)""")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    #
+    # Adds the phases of the projects of a run. workingDir is the
+    # directory the project directories are relative to.
+    #
+    def addRun(self, projectTasks, compileMode, workingDir):
+        row   = self.connection.execute("SELECT MAX(runId) FROM phases").fetchone()
+        runId = 1 if (row[0] == None) else row[0] + 1
+        date  = '{0:%Y-%m-%d %H:%M:%S}'.format(datetime.now())
+        for task in projectTasks:
+            if(not task.phases): continue
+            projectDir = os.path.join(workingDir, task.projectDir)
+            revision   = getRevision(projectDir) if os.path.isdir(projectDir) else ""
+            for phase in task.phases:
+                self.connection.execute("INSERT INTO phases VALUES (?,?,?,?,?,?,?,?,?,?)",
+                                        (runId, date, os.path.normpath(task.projectDir), phase["phase"], compileMode or "",
+                                         revision, phase["wallTime"], phase["cpuTime"], phase["maxRSS"], phase["status"]))
+        self.connection.commit()
+        return runId
+
+    #
+    # Returns the median wall clock time of the last window passing runs of
+    # a project phase, or None if there are fewer than MIN_HISTORY_RUNS.
+    #
+    def getMedianTime(self, project, phase, compileMode, window):
+        rows = self.connection.execute("""SELECT wallTime FROM phases
+                                          WHERE project = ? AND phase = ? AND compileMode = ? AND status = 'passed'
+                                          ORDER BY runId DESC LIMIT ?""",
+                                       (project, phase, compileMode or "", window)).fetchall()
+        if(len(rows) < MIN_HISTORY_RUNS): return None
+        return statistics.median([r[0] for r in rows])
+
+    #
+    # Returns a dictionary with the median, over the last window runs, of the
+    # total wall clock time of the phases of each project run with the 
+    # specified compilation mode. 
+    #
+    def getProjectDurations(self, compileMode, window):
+        rows = self.connection.execute("""SELECT project, runId, SUM(wallTime) FROM phases
+                                          WHERE compileMode = ? GROUP BY project, runId
+                                          ORDER BY runId DESC""",
+                                       (compileMode or "",)).fetchall()
+        runTimes = {}
+        for (project, runId, wallTime) in rows:
+            times = runTimes.setdefault(project, [])
+            if(len(times) < window): times.append(wallTime)
+        durations = {}
+        for project in runTimes:
+            durations[project] = statistics.median(runTimes[project])
+        return durations
+
+    #
+    # Returns a list of (project, phase, wallTime, medianTime) for the passing
+    # phases of projectTasks whose wall clock time exceeds the median of the
+    # recorded history by more than threshold percent. Must be called before
+    # the run is added.
+    #
+    def findRegressions(self, projectTasks, compileMode, threshold, window):
+        regressions = []
+        for task in projectTasks:
+            project = os.path.normpath(task.projectDir)
+            for phase in task.phases:
+                if(phase["status"] != "passed"): continue
+                medianTime = self.getMedianTime(project, phase["phase"], compileMode, window)
+                if(medianTime == None): continue
+                if((phase["wallTime"] > medianTime*(1.0 + threshold/100.0))
+                   and (phase["wallTime"] - medianTime > MIN_REGRESSION_TIME)):
+                    regressions.append((project, phase["phase"], phase["wallTime"], medianTime))
+        return regressions
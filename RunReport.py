@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                               RunReport.py
+#
+# Author: C. Anderson
+# Origin date : June 12, 2020
+#############################################################################
+#
+# Copyright  2020 Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+#
+# Utility routines used by CMakeRunner to create machine readable reports
+# of a run: a JSON file and a JUnit XML file.
+#
+# Each project is reported with its status, the phases that were run
+# (configure, compile, test) and the tests run by ctest. Each phase has
+# its wall clock time (sec), cpu time (sec) and peak resident set size
+# (kB). Each test has its ctest time (sec) and status.
+#
+
+import re
+import json
+import platform
+from datetime import datetime
+
+import xml.etree.ElementTree as ET
+
+#
+# Returns a list of {"name", "time", "status"} for the tests recorded in
+# a ctest LastTest.log file.
+#
+def parseLastTestLog(fileName):
+    try:
+        f = open(fileName,'r',errors='replace')
+        lines = f.read().splitlines()
+        f.close()
+    except OSError:
+        return []
+
+    tests   = []
+    current = None
+    for line in lines:
+        m = re.match(r"^\d+/\d+ Test: (.*)$", line)
+        if(m != None):
+            current = {"name" : m.group(1).strip(), "time" : None, "status" : "failed"}
+            tests.append(current)
+            continue
+        if(current == None): continue
+        m = re.match(r"^Test time =\s*([0-9.]+) sec", line)
+        if(m != None):
+            current["time"] = float(m.group(1))
+            continue
+        if(line.startswith("Test Passed")):
+            current["status"] = "passed"
+            current = None
+        elif(line.startswith("Test Failed") or line.startswith("Test Fail")):
+            current["status"] = "failed"
+            current = None
+    return tests
+
+#
+# Updates tests, the results of a ctest run, with the results of a ctest
+# --rerun-failed run. The number of re-runs of each test is counted in 
+# "reruns".
+#
+def mergeRerunResults(tests, rerunTests):
+    testMap = {}
+    for test in tests: testMap[test["name"]] = test
+    for rerunTest in rerunTests:
+        test = testMap.get(rerunTest["name"])
+        if(test == None):
+            tests.append(rerunTest)
+            continue
+        test["reruns"] = test.get("reruns",0) + 1
+        test["status"] = rerunTest["status"]
+        test["time"]   = rerunTest["time"]
+
+def createReport(projectTasks, elapsedTime, compileMode):
+    report = {"date"        : '{0:%Y-%m-%d %H:%M:%S}'.format(datetime.now()),
+              "host"        : platform.node(),
+              "compileMode" : compileMode,
+              "elapsedTime" : elapsedTime,
+              "projects"    : []}
+    for task in projectTasks:
+        report["projects"].append({"projectDir" : task.projectDir,
+                                   "index"      : task.index,
+                                   "status"     : task.status,
+                                   "phases"     : task.phases,
+                                   "tests"      : task.tests})
+    return report
+
+def writeJSONReport(fileName, report):
+    f = open(fileName,'w')
+    json.dump(report, f, indent=2)
+    f.close()
+
+#
+# Each project is a <testsuite>. The configure, compile and test phases
+# and each test run by ctest are <testcase>s of the project.
+#
+def writeJUnitReport(fileName, report):
+    testSuites = ET.Element("testsuites", dict(name="CMakeRunner", time="{0:.3f}".format(report["elapsedTime"])))
+    for project in report["projects"]:
+        testCases = []
+        for phase in project["phases"]:
+            testCases.append(("phase." + phase["phase"], phase.get("wallTime"), phase["status"]))
+        for test in project["tests"]:
+            testCases.append(("test." + test["name"], test["time"], test["status"]))
+
+        failures  = len([t for t in testCases if (t[2] != "passed")])
+        suiteTime = sum([t[1] for t in testCases if (t[0].startswith("phase.") and (t[1] != None))])
+        testSuite = ET.SubElement(testSuites, "testsuite", dict(name=project["projectDir"], tests=str(len(testCases)),
+                                  failures=str(failures), time="{0:.3f}".format(suiteTime)))
+        if(project["status"] == "skipped"):
+            ET.SubElement(ET.SubElement(testSuite, "testcase", dict(name="project", classname=project["projectDir"])), "skipped")
+            testSuite.set("tests","1")
+            testSuite.set("skipped","1")
+        for (name, time, status) in testCases:
+            testCase = ET.SubElement(testSuite, "testcase", dict(name=name, classname=project["projectDir"]))
+            if(time != None): testCase.set("time", "{0:.3f}".format(time))
+            if(status != "passed"):
+                ET.SubElement(testCase, "failure", dict(message=name + " " + str(status)))
+
+    f = open(fileName,'w')
+    f.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n")
+    f.write(ET.tostring(testSuites).decode('utf-8'))
+    f.write("\n")
+    f.close()
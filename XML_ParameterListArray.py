@@ -34,36 +34,158 @@ import xml.etree.ElementTree as ET
 TRUE_VALS  = ( '1', 'true',  'True', 'TRUE',  'y', 'yes', 'Y', 'Yes', 'YES','ON',"on","On")
 FALSE_VALS = ( '0', 'false', 'False', 'FALSE','n', 'no',  'N', 'No',   'NO',"OFF","off","Off")
 
+# Returns text with the characters that are not allowed in XML text replaced 
+# by entities (xml.sax.saxutils.escape is not used since importing it also 
+# imports urllib and http)
+
+def escape(text):
+    return text.replace("&","&amp;").replace("<","&lt;").replace(">","&gt;")
+
+# Returns True if name is an element tag rather than an ElementTree path 
+
+def isTagName(name):
+    for c in "/.*[]{}":
+        if(c in name): return False
+    return True
+
+#
+# Lookups of parameter lists and parameters use an index, built when first 
+# needed, that maps each parameter list name to its elements and, for each 
+# parameter list, each parameter name to its elements. The index is 
+# discarded by the member functions that modify the tree. If the tree is 
+# modified directly (e.g. through an element returned by getParameterList),
+# invalidateIndex() must be called. 
+#
+# If parameterListNames is specified, only the parameter lists with these
+# names are read from the file (see parseParameterLists).
+#
 class XML_ParameterListArray:
-    def __init__(self,fileName = None):
-        self.tree     = None
-        self.root     = None
-        self.fileName = fileName
+    def __init__(self,fileName = None,parameterListNames = None):
+        self.tree       = None
+        self.root       = None
+        self.fileName   = fileName
+        self.listIndex  = None   # parameter list name : parameter list elements
+        self.paramIndex = {}     # parameter list name : {parameter name : parameter elements}
         
         if(self.fileName != None):
-            self.tree = ET.parse(fileName)
-            self.root = self.tree.getroot()
+            if(parameterListNames != None):
+                self.parseParameterLists(fileName,parameterListNames)
+            else:
+                self.tree = ET.parse(fileName)
+                self.root = self.tree.getroot()
+    
+    #
+    # Reads the parameter lists with names in parameterListNames from 
+    # fileName. The file is parsed incrementally and the elements of the 
+    # other parameter lists are discarded as soon as they have been read, 
+    # so memory use is determined by the size of the parameter lists 
+    # requested rather than by the size of the file.
+    #
+    def parseParameterLists(self,fileName,parameterListNames):
+        parameterListNames = set(parameterListNames)
+        root     = None
+        elements = []      # the elements being read, starting with the root
+        keep     = False   # True while reading a requested parameter list
+        for (event, element) in ET.iterparse(fileName,events=("start","end")):
+            if(event == "start"):
+                if(root == None): root = element
+                elements.append(element)
+                if(len(elements) == 2): keep = (element.tag in parameterListNames)
+                continue
+            elements.pop()
+            if((not keep) and (len(elements) != 0)):
+                elements[-1].remove(element)
+        self.tree = ET.ElementTree(root)
+        self.root = root
+        self.invalidateIndex()
             
     def deepcopy(self,xml_ParameterListArray):
         self.tree = deepcopy(xml_ParameterListArray)
         self.root = self.tree.getroot()
+        self.invalidateIndex()
         
     def createParameterListArray(self,listArrayName):
         self.tree = ET.ElementTree(ET.Element(listArrayName))
         self.root = self.tree.getroot()
+        self.invalidateIndex()
+    
+    def invalidateIndex(self):
+        self.listIndex  = None
+        self.paramIndex = {}
+    
+    #
+    # Returns the elements of the parameter lists with the specified name.
+    # Names that are ElementTree paths rather than tags are searched for 
+    # in the tree. 
+    #
+    def findParameterListAll(self,parameterListName):
+        if(self.listIndex != None):
+            parameterLists = self.listIndex.get(parameterListName)
+            if(parameterLists != None): return parameterLists
+        if(not isTagName(parameterListName)):
+            return self.tree.findall(parameterListName)
+        if(self.listIndex == None):
+            self.listIndex = {}
+            for parameterList in self.root:
+                self.listIndex.setdefault(parameterList.tag,[]).append(parameterList)
+        return self.listIndex.get(parameterListName,[])
+    
+    def findParameterList(self,parameterListName):
+        parameterLists = self.findParameterListAll(parameterListName)
+        if(parameterLists == []): return None
+        return parameterLists[0]
+    
+    #
+    # Returns the elements of the parameters with the specified name in the 
+    # first parameter list with the specified name.
+    #
+    def findParameters(self,parameterName,parameterListName):
+        parameters = self.paramIndex.get(parameterListName)
+        if(parameters != None):
+            instances = parameters.get(parameterName)
+            if(instances != None): return instances
+        parameterList = self.findParameterList(parameterListName)
+        if(parameterList == None): return []
+        if((not isTagName(parameterName)) or (not isTagName(parameterListName))):
+            return parameterList.findall(parameterName)
+        if(parameterListName not in self.paramIndex):
+            parameters = {}
+            for parameter in parameterList:
+                parameters.setdefault(parameter.tag,[]).append(parameter)
+            self.paramIndex[parameterListName] = parameters
+        return self.paramIndex[parameterListName].get(parameterName,[])
+    
+    def findParameter(self,parameterName,parameterListName):
+        parameters = self.findParameters(parameterName,parameterListName)
+        if(parameters == []): return None
+        return parameters[0]
+    
+    #
+    # Returns the first element of the parameter, raising an exception if
+    # the parameter list or the parameter does not exist.
+    #
+    def getParameterInstance(self,parameterName,parameterListName):
+        instance = self.findParameter(parameterName,parameterListName)
+        if(instance != None): return instance
+        if(self.findParameterList(parameterListName) == None):
+            raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
+        raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
+                         + "\n Parameter    : " + parameterName)
     
     def addParameterList(self,paramListName):
-        if(self.tree.find(paramListName) != None):
+        if(self.findParameterList(paramListName) != None):
             raise Exception("Duplicate parameter lists not allowed",paramListName)
         self.root.append(ET.Element(paramListName))
+        self.invalidateIndex()
     #
     # The type of the parameter is determined by the value specified. If
     # None is specified, then the type and value attributes are not set
     #   
     def addParameter(self,value,parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("Insertion of parameter in non-existent parameter list : ",parameterListName)
+        self.invalidateIndex()
         
         if(value == None): 
             parameterList.append(ET.Element(parameterName))
@@ -73,43 +195,22 @@ class XML_ParameterListArray:
         parameterList.append(ET.Element(parameterName,dict(type=typeStr,value=valStr)))
     
     def getParameterValue(self,parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
-        if(parameterList == None):
-            raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
-        if(instance == None):
-            raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
-                             + "\n Parameter    : " + parameterName)
-
+        instance = self.getParameterInstance(parameterName,parameterListName)
         return self.getValue(instance)
     
     def getParameterValueOrText(self,parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
-        if(parameterList == None):
-            raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
-        if(instance == None):
-            raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
-                             + "\n Parameter    : " + parameterName)
-
+        instance = self.getParameterInstance(parameterName,parameterListName)
         return self.getValueOrText(instance)
     
     def getParameterText(self,parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
-        if(parameterList == None):
-            raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
-        if(instance == None):
-            raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
-                             + "\n Parameter    : " + parameterName)
-
+        instance = self.getParameterInstance(parameterName,parameterListName)
         return instance.text.strip()
       
     def getParameterAll(self,parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        parameters = parameterList.findall(parameterName)
+        parameters = list(self.findParameters(parameterName,parameterListName))
         if(parameters == None):
             raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
                              + "\n Parameter    : " + parameterName)
@@ -117,17 +218,17 @@ class XML_ParameterListArray:
         return parameters
 
     def getParameterValueOrDefault(self,parameterName, parameterListName,defaultValue):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
+        instance = self.findParameter(parameterName,parameterListName)
         parameterValue = defaultValue;
         if(instance != None):
             parameterValue = self.getValue(instance)  
         return parameterValue
     
     def getParameterNames(self,parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
         
@@ -137,53 +238,39 @@ class XML_ParameterListArray:
         return parameterNames
     
     def isParameterList(self,parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None): return False       
         return True
     
     def isParameter(self,parameterName,parameterListName):
-        parameterList = self.tree.find(parameterListName)
-        if(parameterList == None):
+        if(self.findParameter(parameterName,parameterListName) != None): return True
+        if(self.findParameterList(parameterListName) == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
-        if(instance == None): return False
-        return True
+        return False
     
     def getParameterList(self,parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
         
         return parameterList
         
     def getParameterListAll(self, parameterListName):
-        parameterList = self.tree.findall(parameterListName)
+        parameterList = list(self.findParameterListAll(parameterListName))
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
         
         return parameterList
     
     def getParameterChildNames(self,parameterName,parameterListName):
-        parameterList = self.tree.find(parameterListName)
-        if(parameterList == None):
-            raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
-        if(instance == None):
-            raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
-                             + "\n Parameter    : " + parameterName)
+        instance = self.getParameterInstance(parameterName,parameterListName)
         childNames = []
         for childParam  in instance:
             childNames.append(childParam.tag)
         return childNames
     
     def getParameterChildValues(self,parameterChildName,parameterName,parameterListName):
-        parameterList = self.tree.find(parameterListName)
-        if(parameterList == None):
-            raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
-        if(instance == None):
-            raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
-                             + "\n Parameter    : " + parameterName)
+        instance = self.getParameterInstance(parameterName,parameterListName)
         
         childParams = instance.findall(parameterChildName)
         if(childParams == []):
@@ -201,11 +288,11 @@ class XML_ParameterListArray:
     # If the parameter specified does not exist, then it is created
     #
     def addParameterChild(self, value, childName, parameterName, parameterListName): 
-        parameterList = self.root.find(parameterListName)
-        if(parameterList.findall(parameterName) == []):
+        parameterList = self.findParameterList(parameterListName)
+        if(self.findParameters(parameterName,parameterListName) == []):
             self.addParameter(None,parameterName,parameterListName)
     
-        for instance in parameterList.findall(parameterName):
+        for instance in list(self.findParameters(parameterName,parameterListName)):
             if(instance.get("value") != None):
                 raise Exception("Adding child to a parameter with value not allowed",childName,parameterName,parameterListName)
             if(value == None):
@@ -280,31 +367,65 @@ class XML_ParameterListArray:
     # typically gets mapped to a C (C++) double and an int to 32 bit C (C++)
     # integers = long for most C (C++) compilers. 
     #
+    # The file is written one parameter list at a time, and only the 
+    # parameters whose types are changed are copied, so the tree is not 
+    # modified and no copy of the whole tree is created.
+    #
     def outputToFile(self,fileName):
-        outputTree = deepcopy(self.tree)
-        root       = outputTree.getroot()
-
-        # revert output types to longs and doubles 
- 
-        for parameterList in root:
+        fileOut   = open(fileName,"w")
+        completed = False
+        try:
+            self.writeParameterLists(fileOut)
+            completed = True
+        finally:
+            fileOut.close()
+            if(not completed): os.remove(fileName)   # no partially written file is left
+    
+    def writeParameterLists(self,fileOut):
+        fileOut.write("<?xml version=\"1.0\" standalone=\"no\" ?>\n")
+        
+        # The start tag of the root (with its attributes) is that of an empty copy of the root 
+        
+        emptyRoot = ET.Element(self.root.tag,self.root.attrib)
+        if((len(self.root) == 0) and (not self.root.text)):
+            emptyRoot.tail = self.root.tail
+            fileOut.write((ET.tostring(emptyRoot)).decode('utf-8'))
+            return
+        fileOut.write((ET.tostring(emptyRoot)).decode('utf-8')[:-3] + ">")
+        if(self.root.text): fileOut.write(escape(self.root.text))
+        
+        for parameterList in self.root:
+            outputList      = ET.Element(parameterList.tag,parameterList.attrib)
+            outputList.text = parameterList.text
+            outputList.tail = parameterList.tail
             for parameter in parameterList:
-                if(len(list(parameter)) == 0):
-                    valueType = self.getType(parameter)
-                    if(valueType != None):
-                        if(valueType == "float"): valueType = "double"
-                        if(valueType == "int")  : valueType = "long"
-                        parameter.set('type',valueType)
+                if(len(parameter) == 0):
+                    outputList.append(self.getOutputParameter(parameter))
                 else:
+                    outputParameter      = ET.Element(parameter.tag,parameter.attrib)
+                    outputParameter.text = parameter.text
+                    outputParameter.tail = parameter.tail
                     for child in parameter:
-                        valueType = self.getType(child)
-                        if(valueType == "float"): valueType = "double"
-                        if(valueType == "int")  : valueType = "long"
-                        child.set('type',valueType)
-                        child.set('type',valueType)
-        fileOut = open(fileName,"w")
-        fileOut.write("<?xml version=\"1.0\" standalone=\"no\" ?>\n")
-        fileOut.write((ET.tostring(root)).decode('utf-8'))
-        fileOut.close()
+                        outputParameter.append(self.getOutputParameter(child))
+                    outputList.append(outputParameter)
+            fileOut.write((ET.tostring(outputList)).decode('utf-8'))
+            
+        fileOut.write("</" + self.root.tag + ">")
+        if(self.root.tail): fileOut.write(escape(self.root.tail))
+    
+    # Returns paramElement, or a copy of it if its output type differs from its type 
+    
+    def getOutputParameter(self,paramElement):
+        valueType = self.getType(paramElement)
+        if(valueType == "float"): valueType = "double"
+        if(valueType == "int")  : valueType = "long"
+        if((valueType == None) or (valueType == paramElement.get('type'))): return paramElement
+        outputParameter = ET.Element(paramElement.tag,paramElement.attrib)
+        outputParameter.set('type',valueType)
+        outputParameter.text = paramElement.text
+        outputParameter.tail = paramElement.tail
+        outputParameter.extend(list(paramElement))
+        return outputParameter
                
     def getType(self,paramElement):
         valType = paramElement.get("type",None)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                       XML_ParameterListArrayBenchmark.py
+#
+# Author: C. Anderson
+# Origin date : June 12, 2020
+#############################################################################
+#
+# Copyright  2020 Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+#
+# Micro-benchmark comparing parameter lookups of XML_ParameterListArray,
+# which use an index of the parameter lists and parameters, with the
+# equivalent ElementTree searches (tree.find of the parameter list followed
+# by a search of its children) that were used before the index.
+#
+# Typical invocation
+#
+# python3 XML_ParameterListArrayBenchmark.py -l 20 -p 2000 -n 20000
+#
+# (l = number of parameter lists)
+# (p = number of parameters in each list)
+# (n = number of lookups timed)
+#
+# With -f the time to load the file specified by parsing it is compared 
+# with the time to load a pickled snapshot of its tree. 
+#
+# python3 XML_ParameterListArrayBenchmark.py -f CMakeCreatorSample.xml
+#
+
+import time
+import pickle
+import random
+import argparse
+
+import xml.etree.ElementTree as ET
+
+from XML_ParameterListArray import XML_ParameterListArray
+
+def createParameterListArray(listCount, parameterCount):
+    paramList = XML_ParameterListArray()
+    paramList.createParameterListArray("BenchmarkParameterLists")
+    for i in range(listCount):
+        listName = "List" + str(i)
+        paramList.addParameterList(listName)
+        parameterList = paramList.getParameterList(listName)
+        for j in range(parameterCount):
+            parameterList.append(parameterList.makeelement("param" + str(j), dict(type="int",value=str(j))))
+    paramList.invalidateIndex()
+    return paramList
+
+# Returns the smallest time of repeats calls of load 
+
+def timeLoad(load, repeats):
+    times = []
+    for i in range(repeats):
+        startTime = time.perf_counter()
+        load()
+        times.append(time.perf_counter() - startTime)
+    return min(times)
+
+def timeLookups(lookup, lookups):
+    startTime = time.perf_counter()
+    for (parameterName, parameterListName) in lookups:
+        lookup(parameterName, parameterListName)
+    return time.perf_counter() - startTime
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lists',      "-l", dest='listCount',      default=20,    type=int, help="Number of parameter lists")
+    parser.add_argument('--parameters', "-p", dest='parameterCount', default=2000,  type=int, help="Number of parameters in each list")
+    parser.add_argument('--lookups',    "-n", dest='lookupCount',    default=20000, type=int, help="Number of lookups timed")
+    parser.add_argument('--file',       "-f", dest='fileName',       default=None,            help="Compare parsing and unpickling this file")
+    args = parser.parse_args()
+    
+    if(args.fileName != None):
+        snapshot   = pickle.dumps(ET.parse(args.fileName).getroot(), pickle.HIGHEST_PROTOCOL)
+        parseTime  = timeLoad(lambda : ET.parse(args.fileName), 20)
+        pickleTime = timeLoad(lambda : pickle.loads(snapshot), 20)
+        print("{0:<28s} {1:>12s} {2:>12s}".format("", "parse (sec)", "pickle (sec)"))
+        print("{0:<28s} {1:12.6f} {2:12.6f}".format("load", parseTime, pickleTime))
+        exit(0)
+
+    paramList = createParameterListArray(args.listCount, args.parameterCount)
+    random.seed(1)
+    lookups = [("param" + str(random.randrange(args.parameterCount)), "List" + str(random.randrange(args.listCount)))
+               for i in range(args.lookupCount)]
+
+    def treeLookup(parameterName, parameterListName):
+        return paramList.getValue(paramList.tree.find(parameterListName).find(parameterName))
+
+    def treeIsParameter(parameterName, parameterListName):
+        return (paramList.tree.find(parameterListName).find(parameterName) != None)
+
+    treeTime    = timeLookups(treeLookup, lookups)
+    indexTime   = timeLookups(paramList.getParameterValue, lookups)
+    treeIsTime  = timeLookups(treeIsParameter, lookups)
+    indexIsTime = timeLookups(paramList.isParameter, lookups)
+
+    print("Parameter lists : " + str(args.listCount) + ", parameters per list : " + str(args.parameterCount)
+          + ", lookups : " + str(args.lookupCount) + "\n")
+    print("{0:<28s} {1:>12s} {2:>12s} {3:>9s}".format("", "tree (sec)", "index (sec)", "speedup"))
+    print("{0:<28s} {1:12.4f} {2:12.4f} {3:9.1f}".format("getParameterValue", treeTime,   indexTime,   treeTime/indexTime))
+    print("{0:<28s} {1:12.4f} {2:12.4f} {3:9.1f}".format("isParameter",       treeIsTime, indexIsTime, treeIsTime/indexIsTime))
@@ -0,0 +1,34 @@
+# 
+#  CMakeLists.txt
+#
+#  Generator      : CMakeCreator 
+#  XML data file  : $XML_InputFile
+#  Date           : $Date
+#
+
+cmake_minimum_required (VERSION $required_cmake)
+project ($project)
+
+message(STATUS "System Name $${CMAKE_SYSTEM_NAME}")
+
+# Loads helper to print messages
+ 
+include(CMakePrintHelpers)
+
+# Suppresses the creation of the install script 
+
+set(CMAKE_SKIP_INSTALL_RULES True) 
+
+# Build type : each build type is configured in a separate build
+# directory, e.g.
+#
+#   cmake -DCMAKE_BUILD_TYPE=Debug   -S . -B build/Debug
+#   cmake -DCMAKE_BUILD_TYPE=Release -S . -B build/Release
+#
+# so that switching between build types does not reconfigure
+# or rebuild either directory.
+
+if(NOT CMAKE_BUILD_TYPE)
+  set(CMAKE_BUILD_TYPE Release CACHE STRING "Build type (Debug or Release)" FORCE)
+endif()
+
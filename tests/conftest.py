@@ -0,0 +1,8 @@
+#
+# The modules of this package are imported as top level modules, as they are
+# when the programs are run from the package directory.
+#
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,90 @@
+import json
+import os
+
+import BuildFingerprint
+
+def test_hash_file(tmp_path):
+    (tmp_path/"a.cpp").write_text("int a;\n")
+    (tmp_path/"b.cpp").write_text("int a;\n")
+    assert BuildFingerprint.hashFile(str(tmp_path/"a.cpp")) == BuildFingerprint.hashFile(str(tmp_path/"b.cpp"))
+    (tmp_path/"b.cpp").write_text("int b;\n")
+    assert BuildFingerprint.hashFile(str(tmp_path/"a.cpp")) != BuildFingerprint.hashFile(str(tmp_path/"b.cpp"))
+    assert BuildFingerprint.hashFile(str(tmp_path/"missing.cpp")) == None
+
+def test_hash_strings():
+    assert BuildFingerprint.hashStrings(["a", 1]) == BuildFingerprint.hashStrings(["a", "1"])
+    assert BuildFingerprint.hashStrings(["ab", "c"]) != BuildFingerprint.hashStrings(["a", "bc"])
+
+def test_hash_toolchain(monkeypatch):
+    monkeypatch.setenv("CXXFLAGS", "-O2")
+    hashValue = BuildFingerprint.hashToolchain()
+    assert BuildFingerprint.hashToolchain() == hashValue
+    monkeypatch.setenv("CXXFLAGS", "-O3")
+    assert BuildFingerprint.hashToolchain() != hashValue
+
+def test_hash_directory_trees(tmp_path):
+    os.makedirs(tmp_path/"src"/"build")
+    os.makedirs(tmp_path/"src"/".git")
+    (tmp_path/"src"/"a.cpp").write_text("int a;\n")
+    hashValue = BuildFingerprint.hashDirectoryTrees([str(tmp_path/"src")], ("build",))
+
+    # Ignored and hidden directories are not hashed
+
+    (tmp_path/"src"/"build"/"a.o").write_text("")
+    (tmp_path/"src"/".git"/"index").write_text("")
+    assert BuildFingerprint.hashDirectoryTrees([str(tmp_path/"src")], ("build",)) == hashValue
+
+    (tmp_path/"src"/"a.cpp").write_text("int a = 1;\n")
+    assert BuildFingerprint.hashDirectoryTrees([str(tmp_path/"src")], ("build",)) != hashValue
+    assert BuildFingerprint.hashDirectoryTrees([str(tmp_path/"missing")]) != BuildFingerprint.hashDirectoryTrees([])
+
+def test_stamps(tmp_path):
+    stampFile = str(tmp_path/"configure.stamp")
+    assert BuildFingerprint.readStamp(stampFile) == None
+    BuildFingerprint.writeStamp(stampFile, {"cmakeLists" : "1234"})
+    assert BuildFingerprint.readStamp(stampFile) == {"cmakeLists" : "1234"}
+    BuildFingerprint.removeStamp(stampFile)
+    assert not os.path.exists(stampFile)
+    BuildFingerprint.removeStamp(stampFile)
+
+    (tmp_path/"configure.stamp").write_text("[1, 2]")
+    assert BuildFingerprint.readStamp(stampFile) == None
+    (tmp_path/"configure.stamp").write_text("{")
+    assert BuildFingerprint.readStamp(stampFile) == None
+
+def test_fingerprint_store(tmp_path):
+    store = BuildFingerprint.FingerprintStore(str(tmp_path/"CMakeRunner.fingerprints.json"))
+    assert not store.isUpToDate("ProjA", "debug", "1234")
+    assert store.getStatus("ProjA", "debug") == None
+    assert store.getFailedTests("ProjA", "debug") == []
+
+    store.setResult("ProjA", "debug", "1234", "passed")
+    store.setResult("ProjB", "debug", "5678", "failed", ["SecondProg"])
+    store.save()
+
+    store = BuildFingerprint.FingerprintStore(str(tmp_path/"CMakeRunner.fingerprints.json"))
+    assert store.isUpToDate("ProjA", "debug", "1234")
+    assert not store.isUpToDate("ProjA", "debug", "4321")
+    assert not store.isUpToDate("ProjB", "debug", "5678")
+    assert store.getStatus("ProjB", "debug") == "failed"
+    assert store.getFailedTests("ProjB", "debug") == ["SecondProg"]
+
+def test_fingerprint_store_keeps_each_build_type(tmp_path):
+    store = BuildFingerprint.FingerprintStore(str(tmp_path/"CMakeRunner.fingerprints.json"))
+    store.setResult("ProjA", "debug", "1234", "passed")
+    store.setResult("ProjA", "release", "5678", "passed")
+    store.setResult("ProjA", None, "9012", "failed")
+    assert store.isUpToDate("ProjA", "debug", "1234")
+    assert store.isUpToDate("ProjA", "release", "5678")
+    assert not store.isUpToDate("ProjA", "release", "1234")
+    assert store.getStatus("ProjA", None) == "failed"
+
+def test_fingerprint_store_replaces_old_format_entries(tmp_path):
+    fileName = tmp_path/"CMakeRunner.fingerprints.json"
+    fileName.write_text(json.dumps({"ProjA" : {"fingerprint" : "1234", "status" : "passed", "failedTests" : []}}))
+    store = BuildFingerprint.FingerprintStore(str(fileName))
+    assert not store.isUpToDate("ProjA", "debug", "1234")
+    assert store.getStatus("ProjA", "debug") == None
+
+    store.setResult("ProjA", "debug", "1234", "passed")
+    assert store.entries["ProjA"] == {"debug" : {"fingerprint" : "1234", "status" : "passed", "failedTests" : []}}
@@ -0,0 +1,269 @@
+import os
+import shutil
+
+import pytest
+
+import CMakeCreator
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+def createCMakeLists(xmlFile, configDirsFlag = False):
+    creator = CMakeCreator.CMakeCreator()
+    creator.CMakeCreatorDataDir = DATA_DIR
+    creator.timeStampFlag       = False
+    creator.configDirsFlag      = configDirsFlag
+    return creator.createCMakeLists(str(xmlFile), "in.xml")
+
+#
+# Returns the sample CMakeCreator XML file with the replacements (old, new)
+# made, written to directory
+#
+def writeSample(directory, replacements = ()):
+    f = open(os.path.join(DATA_DIR, "CMakeCreatorSample.xml"), 'r')
+    contents = f.read()
+    f.close()
+    for (old, new) in replacements:
+        assert old in contents
+        contents = contents.replace(old, new)
+    xmlFile = directory/"in.xml"
+    xmlFile.write_text(contents)
+    return xmlFile
+
+def test_sample(tmp_path):
+    cmakeContents = createCMakeLists(writeSample(tmp_path))
+    assert "cmake_minimum_required (VERSION 3.16)" in cmakeContents
+    assert 'OPTION(USE_OPENMP  "Option USE_OPENMP"  OFF)' in cmakeContents
+    assert 'OPTION(USE_LAPACK  "Option USE_LAPACK"  ON)' in cmakeContents
+    assert 'OPTION(USE_CCACHE  "Option USE_CCACHE"  OFF)' in cmakeContents
+    assert 'list(APPEND ExternalLibLinkDirs "/usr/local/lib")' in cmakeContents
+    assert 'set(ADDITIONAL_DEBUG_OPTIONS "-Wall" "-Wno-pessimizing-move" )' in cmakeContents
+    assert 'PROPERTIES COST "10" PROCESSORS "2" TIMEOUT "600" RESOURCE_GROUPS "cpus:2")' in cmakeContents
+    assert "set_target_properties(${mainExecName} PROPERTIES UNITY_BUILD ON)" in cmakeContents
+    assert "enable_testing()" in cmakeContents
+
+def test_typed_values(tmp_path):
+    cmakeContents = createCMakeLists(writeSample(tmp_path, [("<USE_OPENMP>   OFF", "<USE_OPENMP>   yes"),
+                                                            ("<ctestTimeout>        600 ", "<ctestTimeout>        2.5 "),
+                                                            ("<sharedObjects> true", "<sharedObjects> 0")]))
+    assert 'OPTION(USE_OPENMP  "Option USE_OPENMP"  ON)' in cmakeContents
+    assert 'TIMEOUT "2.5"' in cmakeContents
+    assert "$<TARGET_OBJECTS:" not in cmakeContents
+
+def test_config_dirs(tmp_path):
+    cmakeContents = createCMakeLists(writeSample(tmp_path), True)
+    assert '"${CMAKE_SOURCE_DIR}/../Components/Asupport/build/${CMAKE_BUILD_TYPE}")' in cmakeContents
+    assert "add_custom_target(release" not in cmakeContents
+
+@pytest.mark.parametrize("replacement", [("<USE_LAPACK>   ON", "<USE_LAPACK>   sometimes"),
+                                         ("<ctestTimeout>        600 ", "<ctestTimeout>        long "),
+                                         ("<ctestResourceGroups> cpus:2", "<ctestResourceGroups> gpus:2"),
+                                         ("<required_cmake> 3.15", "<required_cmake> latest"),
+                                         ("<ctestTimeout>        600                 </ctestTimeout>", "<ctestTimout> 600 </ctestTimout>")])
+def test_invalid_values_exit(tmp_path, capsys, replacement):
+    with pytest.raises(SystemExit):
+        createCMakeLists(writeSample(tmp_path, [replacement]))
+    assert "Invalid parameters in in.xml" in capsys.readouterr().out
+
+#
+# Returns a CMakeCreator whose data directory, in directory, contains the
+# fragment files fragments (a dictionary of file name : contents)
+#
+def createFragmentCreator(directory, fragments):
+    os.makedirs(directory/"data")
+    for fileName in fragments:
+        (directory/"data"/fileName).write_text(fragments[fileName])
+    creator = CMakeCreator.CMakeCreator()
+    creator.CMakeCreatorDataDir = str(directory/"data")
+    return creator
+
+def test_fragments(tmp_path):
+    creator = createFragmentCreator(tmp_path, {"Lib.dat" : "find_package(Lib)\n", "Set.tpl" : "set(${name} $value $$ENV)\n"})
+    assert creator.getFragment("Lib.dat") == "find_package(Lib)\n"
+    assert creator.createFragment("Set.tpl", {"name" : "A", "value" : "1"}) == "set(A 1 $ENV)\n"
+
+def test_invalid_template_placeholder_exits(tmp_path, capsys):
+    createFragmentCreator(tmp_path, {"Bad.tpl" : "set(A 1)\nset(B $1)\n"})
+    with pytest.raises(SystemExit):
+        CMakeCreator.getFragmentRegistry(str(tmp_path/"data"))
+    assert "Invalid placeholder in template fragment file Bad.tpl (line 2)" in capsys.readouterr().out
+
+@pytest.mark.parametrize("fragment, message", [(("Missing.dat", None), "Data file cannot be read"),
+                                               (("Missing.tpl", {}), "Template file cannot be read"),
+                                               (("Set.tpl", {"name" : "A", "value" : "1", "cost" : "2"}), "Template variable '$cost' is not in"),
+                                               (("Set.tpl", {"name" : "A"}), "[ value ]")])
+def test_invalid_fragment_exits(tmp_path, capsys, fragment, message):
+    creator = createFragmentCreator(tmp_path, {"Set.tpl" : "set(${name} $value)\n"})
+    (fileName, fragmentData) = fragment
+    with pytest.raises(SystemExit):
+        if(fragmentData == None): creator.getFragment(fileName)
+        else                    : creator.createFragment(fileName, fragmentData)
+    assert message in capsys.readouterr().out
+
+def test_fragment_files_are_read_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(CMakeCreator, "FRAGMENT_REGISTRIES", {})
+    shutil.copytree(DATA_DIR, tmp_path/"data")
+    xmlFiles = []
+    for name in ("ProjA", "ProjB"):
+        os.makedirs(tmp_path/name)
+        xmlFiles.append(str(writeSample(tmp_path/name)))
+
+    # The sample has two targets, the fragments of the second batch entry
+    # are those read for the first 
+
+    assert CMakeCreator.createBatchCMakeLists((xmlFiles[0], str(tmp_path/"data"), False, False)) == (xmlFiles[0], "created")
+    shutil.rmtree(tmp_path/"data")
+    assert CMakeCreator.createBatchCMakeLists((xmlFiles[1], str(tmp_path/"data"), False, False)) == (xmlFiles[1], "created")
+    assert list(CMakeCreator.FRAGMENT_REGISTRIES) == [str(tmp_path/"data")]
+    assert (tmp_path/"ProjA"/"CMakeLists.txt").read_text() == (tmp_path/"ProjB"/"CMakeLists.txt").read_text()
+
+HEADER = "#\n#  Date           : {0}\n#\n"
+
+def test_remove_time_stamp():
+    assert CMakeCreator.removeTimeStamp(HEADER.format("2020-06-12") + "project(A)\n") == "#\n#\nproject(A)\n"
+    assert CMakeCreator.removeTimeStamp(HEADER.format("")) == "#\n#\n"
+
+    # Only the Date line of the header is removed
+
+    contents = "\n"*10 + "# Date : 2020-06-12\n"
+    assert CMakeCreator.removeTimeStamp(contents) == contents
+
+def test_write_cmake_lists(tmp_path):
+    cmakeListsFile = tmp_path/"CMakeLists.txt"
+    assert CMakeCreator.writeCMakeLists(cmakeListsFile, HEADER.format("2020-06-12") + "project(A)\n") == "created"
+    os.utime(cmakeListsFile, (1000000000, 1000000000))
+
+    # A file differing only in its Date line is not written
+
+    assert CMakeCreator.writeCMakeLists(cmakeListsFile, HEADER.format("2020-06-13") + "project(A)\n") == "unchanged"
+    assert cmakeListsFile.read_text() == HEADER.format("2020-06-12") + "project(A)\n"
+    assert os.path.getmtime(cmakeListsFile) == 1000000000
+
+    assert CMakeCreator.writeCMakeLists(cmakeListsFile, HEADER.format("2020-06-13") + "project(B)\n") == "updated"
+    assert cmakeListsFile.read_text() == HEADER.format("2020-06-13") + "project(B)\n"
+    assert os.path.getmtime(cmakeListsFile) != 1000000000
+
+def test_unchanged_cmake_lists_are_not_written(tmp_path):
+    xmlFile = str(writeSample(tmp_path))
+    assert CMakeCreator.createBatchCMakeLists((xmlFile, DATA_DIR, True, False)) == (xmlFile, "created")
+    cmakeContents = (tmp_path/"CMakeLists.txt").read_text()
+    assert "Date           : " in cmakeContents
+    (tmp_path/"CMakeLists.txt").write_text(cmakeContents.replace("Date           : ", "Date           : 1999-01-01"))
+    assert CMakeCreator.createBatchCMakeLists((xmlFile, DATA_DIR, True, False)) == (xmlFile, "unchanged")
+    assert CMakeCreator.createBatchCMakeLists((xmlFile, DATA_DIR, True, True)) == (xmlFile, "updated")
+
+#
+# Returns a CMakeCreator creating the CMakeLists.txt files of the --batch
+# arguments batchFiles
+#
+def createBatchCreator(batchFiles):
+    creator = CMakeCreator.CMakeCreator()
+    creator.CMakeCreatorDataDir = DATA_DIR
+    creator.timeStampFlag       = False
+    creator.batchFiles          = [str(f) for f in batchFiles]
+    return creator
+
+def writeRunnerFile(directory, projectDirs):
+    runnerFile = directory/"runner.xml"
+    runnerFile.write_text("<CMakeRunner_ParameterLists>\n<Common> </Common>\n"
+                          + "".join(["<ProjectDir> " + p + " </ProjectDir>\n" for p in projectDirs])
+                          + "</CMakeRunner_ParameterLists>\n")
+    return runnerFile
+
+def test_batch_xml_files_of_runner_file(tmp_path, capsys):
+    for name in ("ProjA", "ProjB", "ProjC"):
+        os.makedirs(tmp_path/name)
+    xmlFiles = [str(writeSample(tmp_path/name)) for name in ("ProjA", "ProjB")]
+    (tmp_path/"ProjA"/"other.xml").write_text("<Other/>\n")
+    creator = createBatchCreator([writeRunnerFile(tmp_path, ["ProjA", "ProjB", "ProjC"])])
+    assert creator.getBatchXMLFiles() == xmlFiles
+    assert "Note : no CMakeCreator XML file in " + str(tmp_path/"ProjC") in capsys.readouterr().out
+
+def test_batch_xml_files_of_patterns(tmp_path, capsys):
+    for name in ("ProjA", "ProjB"):
+        os.makedirs(tmp_path/name)
+    xmlFiles = [str(writeSample(tmp_path/name)) for name in ("ProjA", "ProjB")]
+    (tmp_path/"ProjA"/"other.xml").write_text("<Other/>\n")
+
+    # A file specified both directly and through a pattern is used once
+
+    creator = createBatchCreator([tmp_path/"ProjA"/"in.xml", tmp_path/"*"/"*.xml"])
+    assert creator.getBatchXMLFiles() == xmlFiles
+    assert "Note : not a CMakeCreator or CMakeRunner XML file : " + str(tmp_path/"ProjA"/"other.xml") in capsys.readouterr().out
+
+@pytest.mark.parametrize("batchFiles, message", [(["*.xml"], "No file matches the --batch argument"),
+                                                 (["ProjA/*.xml"], "More than one CMakeCreator XML file in directory")])
+def test_invalid_batch_files_exit(tmp_path, capsys, batchFiles, message):
+    os.makedirs(tmp_path/"ProjA")
+    writeSample(tmp_path/"ProjA")
+    shutil.copy(tmp_path/"ProjA"/"in.xml", tmp_path/"ProjA"/"in2.xml")
+    with pytest.raises(SystemExit):
+        createBatchCreator([tmp_path/f for f in batchFiles]).getBatchXMLFiles()
+    assert message in capsys.readouterr().out
+
+def test_run_batch(tmp_path, capsys):
+    for name in ("ProjA", "ProjB", "ProjC"):
+        os.makedirs(tmp_path/name)
+        writeSample(tmp_path/name)
+    creator = createBatchCreator([writeRunnerFile(tmp_path, ["ProjA", "ProjB", "ProjC"])])
+    creator.runBatch()
+    assert "3 created" in capsys.readouterr().out
+
+    # Unchanged files are counted, a failed file is reported and the batch exits with status 1
+
+    (tmp_path/"ProjB"/"CMakeLists.txt").write_text("")
+    writeSample(tmp_path/"ProjC", [("<USE_LAPACK>   ON", "<USE_LAPACK>   sometimes")])
+    with pytest.raises(SystemExit) as exitInfo:
+        creator.runBatch()
+    assert exitInfo.value.code == 1
+    output = capsys.readouterr().out
+    assert "CMakeLists.txt not created for " + str(tmp_path/"ProjC"/"in.xml") in output
+    assert "failed     : " + str(tmp_path/"ProjC"/"CMakeLists.txt") in output
+    assert "1 failed, 1 unchanged, 1 updated" in output
+    assert "Skipped (unchanged, not written) : 1" in output
+
+def test_unity_build_and_precompiled_headers(tmp_path):
+    cmakeContents = createCMakeLists(writeSample(tmp_path, [("<unityBuild>          false", "<unityBuild>          true")]))
+    assert "set(CMAKE_UNITY_BUILD ON)\nset(CMAKE_UNITY_BUILD_BATCH_SIZE 8)\n" in cmakeContents
+    assert 'add_library(${PROJECT_NAME}_pch OBJECT "${CMAKE_BINARY_DIR}/${PROJECT_NAME}_pch.cpp")' in cmakeContents
+    assert "target_precompile_headers(${PROJECT_NAME}_pch PRIVATE <vector>)" in cmakeContents
+
+    # ProgramA replaces the shared precompiled header, ProgramB reuses it
+
+    programA = cmakeContents[cmakeContents.index("set(mainExecName ProgramA)"):cmakeContents.index("set(mainExecName ProgramB)")]
+    programB = cmakeContents[cmakeContents.index("set(mainExecName ProgramB)"):]
+    assert 'target_precompile_headers(${mainExecName} PRIVATE "ProgramA.h")' in programA
+    assert "set_target_properties(${mainExecName} PROPERTIES UNITY_BUILD ON)" in programA
+    assert "target_precompile_headers(${mainExecName} REUSE_FROM ${PROJECT_NAME}_pch)" in programB
+    assert "UNITY_BUILD" not in programB
+
+def test_unity_build_off_does_not_require_cmake_3_16(tmp_path, capsys):
+    cmakeContents = createCMakeLists(writeSample(tmp_path, [("<precompileHeader> &lt;vector&gt; </precompileHeader>", ""),
+                                                            ("<ctestResourceGroups> cpus:2              </ctestResourceGroups>", ""),
+                                                            ("<precompileHeader> ProgramA.h             </precompileHeader>", ""),
+                                                            ("<unityBuild>       true", "<unityBuild>       false")]))
+    assert "cmake_minimum_required (VERSION 3.15)" in cmakeContents
+    assert "Note : cmake_minimum_required raised" not in capsys.readouterr().out
+    assert "set_target_properties(${mainExecName} PROPERTIES UNITY_BUILD OFF)" in cmakeContents
+    assert "set(CMAKE_UNITY_BUILD ON)" not in cmakeContents
+    assert "target_precompile_headers" not in cmakeContents
+
+def test_shared_sources(tmp_path):
+    cmakeContents = createCMakeLists(writeSample(tmp_path, [("<additionalSource> SupportB1.cpp", "<additionalSource> SupportA1.cpp")]))
+    assert 'add_library(${PROJECT_NAME}_shared1 OBJECT "SupportA1.cpp" )' in cmakeContents
+    assert "target_precompile_headers(${PROJECT_NAME}_shared1 REUSE_FROM ${PROJECT_NAME}_pch)" in cmakeContents
+    assert 'target_include_directories(${PROJECT_NAME}_shared1 PUBLIC "../MoreIncludeDirA" )' in cmakeContents
+    assert 'target_include_directories(${PROJECT_NAME}_shared1 PUBLIC "../MoreIncludeDirB" )' in cmakeContents
+    assert 'add_executable( ${mainExecName} "ProgramA.cpp" "SupportA2.cpp" $<TARGET_OBJECTS:${PROJECT_NAME}_shared1> )' in cmakeContents
+    assert 'add_executable( ${mainExecName} "ProgramB.cpp" "SupportB2.cpp" $<TARGET_OBJECTS:${PROJECT_NAME}_shared1> )' in cmakeContents
+    assert cmakeContents.count('"SupportA1.cpp"') == 1
+
+def test_shared_source_groups():
+    targets = [{"main" : "ProgA.cpp", "additionalSource" : ["a.cpp", "ab.cpp", "abc.cpp"], "additionalIncludeDir" : ["incA"]},
+               {"main" : "ProgB.cpp", "additionalSource" : ["abc.cpp", "ab.cpp", "b.cpp"],  "additionalIncludeDir" : ["incB"]},
+               {"main" : "ProgC.cpp", "additionalSource" : ["abc.cpp"],                     "additionalIncludeDir" : ["incA"]}]
+
+    # Sources are grouped by the set of targets using them
+
+    assert CMakeCreator.CMakeCreator().getSharedSourceGroups(targets) == [(["ProgA", "ProgB"], ["ab.cpp"], ["incA", "incB"]),
+                                                                          (["ProgA", "ProgB", "ProgC"], ["abc.cpp"], ["incA", "incB"])]
+    assert CMakeCreator.CMakeCreator().getSharedSourceGroups(targets[:1]) == []
@@ -0,0 +1,401 @@
+import io
+import json
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import BuildFingerprint
+import CMakeRunner
+
+#
+# Returns a CMakeRunner that compiles the projects of workingDir by running
+# the script build.sh of each project, and the ProjectTasks of the projects.
+# projects is a dictionary of project name : (build.sh contents, dependsOn).
+#
+def createRunner(workingDir, projects, jobs):
+    tasks = []
+    for (index, name) in enumerate(projects):
+        (script, dependsOn) = projects[name]
+        os.makedirs(workingDir/name)
+        (workingDir/name/"build.sh").write_text(script + "\n")
+        task = CMakeRunner.ProjectTask(name, str(index + 1), "")
+        task.dependsOn += dependsOn
+        tasks.append(task)
+
+    runner = CMakeRunner.CMakeRunner()
+    runner.jobs             = jobs
+    runner.cpuBudget        = jobs
+    runner.compileMode      = "debug"
+    runner.makeCommand      = "sh ../build.sh"
+    runner.buildCommand     = runner.makeCommand
+    runner.projectDirs      = set(projects)
+    runner.projectCount     = len(tasks)
+    runner.projectStarted   = 0
+    runner.summaryString    = ""
+    runner.fingerprintStore = BuildFingerprint.FingerprintStore(workingDir/"CMakeRunner.fingerprints.json")
+    return (runner, tasks)
+
+# Creates a build directory of project name configured with the tests testNames
+
+def configureTests(workingDir, name, testNames):
+    os.makedirs(workingDir/name/"build")
+    (workingDir/name/"build"/"CTestTestfile.cmake").write_text("".join(["add_test(" + t + " \"true\")\n" for t in testNames]))
+
+#
+# Writes a CMakeLists.txt, in the form created by CMakeCreator, with the
+# target FirstProg to each project
+#
+def createCMakeLists(workingDir, names):
+    for name in names:
+        (workingDir/name/"FirstProg.cpp").write_text("int main() { return 0; }\n")
+        (workingDir/name/"CMakeLists.txt").write_text("add_custom_target(release)\n"
+            + "set(mainExecName FirstProg)\n" + 'add_executable(${mainExecName} "FirstProg.cpp")\n')
+
+def getProjectSummary(runner, name):
+    summary = runner.summaryString
+    start   = summary.index("] " + name + "\n")
+    end     = summary.find("\n[", start)
+    if(end < 0): end = len(summary)
+    return summary[start:end]
+
+def test_runs_dependency_chain_in_order(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("touch ../../done", []),
+                                              "ProjB" : ("test -f ../../done", ["ProjA"])}, 2)
+    runner.scheduleProjects(tasks, str(tmp_path))
+    assert [t.status for t in tasks] == ["passed", "passed"]
+
+def test_skips_dependents_of_failed_project(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("exit 1", []),
+                                              "ProjB" : ("exit 0", ["ProjA"])}, 2)
+    runner.scheduleProjects(tasks, str(tmp_path))
+    assert [t.status for t in tasks] == ["failed", "skipped"]
+    assert "dependency ProjA did not pass" in getProjectSummary(runner, "ProjB")
+
+def test_project_jobs_divide_cpu_budget():
+    runner = CMakeRunner.CMakeRunner()
+    runner.jobs      = 2
+    runner.cpuBudget = 8
+    assert runner.getProjectJobs(1) == 8
+    assert runner.getProjectJobs(2) == 4
+    assert runner.getProjectJobs(5) == 4
+
+def test_fail_fast_stops_running_projects(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("sleep 0.5; exit 1", []),
+                                              "ProjB" : ("sleep 30", [])}, 2)
+    runner.failFastFlag = True
+    startTime = time.monotonic()
+    runner.scheduleProjects(tasks, str(tmp_path))
+    assert time.monotonic() - startTime < 10
+    assert [t.status for t in tasks] == ["failed", "cancelled"]
+
+    summary = getProjectSummary(runner, "ProjB")
+    assert "Cancelled   : --fail-fast, ProjA failed" in summary
+    assert "Compilation : failed" not in summary
+
+@pytest.mark.skipif(os.name != "posix", reason="sends SIGINT to this process")
+def test_interrupt_stops_running_projects(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("sleep 30", []),
+                                              "ProjB" : ("sleep 30", []),
+                                              "ProjC" : ("exit 0", ["ProjA"])}, 2)
+    timer = threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGINT))
+    startTime = time.monotonic()
+    timer.start()
+    with pytest.raises(KeyboardInterrupt):
+        runner.scheduleProjects(tasks, str(tmp_path))
+    timer.join()
+    assert time.monotonic() - startTime < 10
+    assert not runner.runningProcesses
+    assert [t.status for t in tasks[:2]] == ["cancelled", "cancelled"]
+
+    for name in ("ProjA","ProjB"):
+        summary = getProjectSummary(runner, name)
+        assert "Cancelled   : run interrupted" in summary
+        assert "Compilation : failed" not in summary
+
+def test_unknown_dependency_exits(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("exit 0", ["ProjX"])}, 1)
+    with pytest.raises(SystemExit):
+        runner.scheduleProjects(tasks, str(tmp_path))
+
+@pytest.mark.skipif(shutil.which("ctest") == None, reason="requires ctest")
+def test_tests_selection_with_unselected_dependency(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("exit 0", []),
+                                              "ProjB" : ("exit 0", ["ProjA"])}, 2)
+    configureTests(tmp_path, "ProjA", ["SecondProg"])
+    configureTests(tmp_path, "ProjB", ["FirstProg", "SecondProg"])
+    runner.ctestCommand = "ctest"
+    runner.testPatterns = ["ProjB/*"]
+    selectedTasks = runner.selectProjects(tasks, str(tmp_path))
+    assert [t.projectDir for t in selectedTasks] == ["ProjB"]
+    assert selectedTasks[0].testSelection == ["FirstProg", "SecondProg"]
+
+    runner.projectCount = len(selectedTasks)
+    runner.scheduleProjects(selectedTasks, str(tmp_path))
+    assert selectedTasks[0].status == "passed"
+
+@pytest.mark.skipif(shutil.which("ctest") == None, reason="requires ctest")
+def test_tests_selection_after_configure_does_not_skip_dependents(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("exit 0", []),
+                                              "ProjB" : ("exit 0", ["ProjA"])}, 1)
+    configureTests(tmp_path, "ProjB", ["FirstProg"])
+    runner.ctestCommand = "ctest"
+    runner.testPatterns = ["First*"]
+    selectedTasks = runner.selectProjects(tasks, str(tmp_path))
+    assert len(selectedTasks) == 2
+
+    # ProjA is not configured : its tests are selected when it is run
+
+    runner.scheduleProjects(selectedTasks, str(tmp_path))
+    assert [t.status for t in tasks] == ["skipped", "passed"]
+
+def test_changed_files_with_unaffected_dependency(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("exit 0", []),
+                                              "ProjB" : ("exit 0", ["ProjA"])}, 2)
+    createCMakeLists(tmp_path, ["ProjA", "ProjB"])
+    runner.changedFiles = [str(tmp_path/"ProjB"/"FirstProg.cpp")]
+    selectedTasks = runner.selectProjects(tasks, str(tmp_path))
+    assert [t.projectDir for t in selectedTasks] == ["ProjB"]
+    assert selectedTasks[0].testSelection == ["FirstProg"]
+
+    runner.projectCount = len(selectedTasks)
+    runner.scheduleProjects(selectedTasks, str(tmp_path))
+    assert selectedTasks[0].status == "passed"
+
+@pytest.mark.skipif(shutil.which("git") == None, reason="requires git")
+def test_changed_since_with_unaffected_dependency(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("exit 0", []),
+                                              "ProjB" : ("exit 0", ["ProjA"])}, 2)
+    createCMakeLists(tmp_path, ["ProjA", "ProjB"])
+    git = ["git", "-c", "user.name=CMakeRunner", "-c", "user.email=CMakeRunner@localhost"]
+    subprocess.run(git + ["init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(git + ["add", "."], cwd=tmp_path, check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "projects"], cwd=tmp_path, check=True)
+    (tmp_path/"ProjB"/"FirstProg.cpp").write_text("int main() { return 1; }\n")
+
+    runner.changedSince = "HEAD"
+    selectedTasks = runner.selectProjects(tasks, str(tmp_path))
+    assert [t.projectDir for t in selectedTasks] == ["ProjB"]
+
+    runner.projectCount = len(selectedTasks)
+    runner.scheduleProjects(selectedTasks, str(tmp_path))
+    assert selectedTasks[0].status == "passed"
+
+def test_fingerprint_only_computed_with_skip_unchanged(tmp_path, monkeypatch):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("exit 0", [])}, 1)
+    monkeypatch.setattr(runner, "getProjectFingerprint", lambda task, projectDir : pytest.fail("fingerprint computed"))
+    runner.scheduleProjects(tasks, str(tmp_path))
+    assert tasks[0].status == "passed"
+    assert runner.fingerprintStore.getStatus("ProjA", "debug") == "passed"
+
+def test_skip_unchanged_requires_configured_build_dir(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("touch CMakeCache.txt; echo run >> ../../runs", [])}, 1)
+    runner.skipUnchangedFlag = True
+    for i in range(2):
+        runner.summaryString = ""
+        runner.scheduleProjects(tasks, str(tmp_path))
+    assert "Up to date  : inputs unchanged" in getProjectSummary(runner, "ProjA")
+    assert (tmp_path/"runs").read_text() == "run\n"
+
+    # A project whose build directory was removed is run
+
+    shutil.rmtree(tmp_path/"ProjA"/"build")
+    runner.scheduleProjects(tasks, str(tmp_path))
+    assert tasks[0].status == "passed"
+    assert (tmp_path/"runs").read_text() == "run\nrun\n"
+
+def test_resource_spec_provides_largest_cpus_request(tmp_path):
+    runner = CMakeRunner.CMakeRunner()
+    (tmp_path/"CTestTestfile.cmake").write_text('set_tests_properties(Solver1 PROPERTIES RESOURCE_GROUPS "cpus:2")\n'
+                                               + 'set_tests_properties(Solver2 PROPERTIES RESOURCE_GROUPS "2,cpus:1;cpus:2")\n')
+    resourceSpec = json.loads(runner.createResourceSpecFile(tmp_path, 1).read_text())
+    assert resourceSpec["local"] == [{"cpus" : [{"id" : "0", "slots" : 4}]}]
+    resourceSpec = json.loads(runner.createResourceSpecFile(tmp_path, 8).read_text())
+    assert resourceSpec["local"] == [{"cpus" : [{"id" : "0", "slots" : 8}]}]
+
+@pytest.mark.skipif(shutil.which("ctest") == None, reason="requires ctest")
+def test_resource_groups_above_project_jobs_run(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("exit 0", [])}, 1)
+    configureTests(tmp_path, "ProjA", ["Solver1"])
+    with open(tmp_path/"ProjA"/"build"/"CTestTestfile.cmake", 'a') as f:
+        f.write('set_tests_properties(Solver1 PROPERTIES RESOURCE_GROUPS "cpus:2")\n')
+    runner.ctestFlag       = True
+    runner.ctestCommand    = "ctest"
+    runner.ctestJobsOption = "--parallel "
+    runner.scheduleProjects(tasks, str(tmp_path))
+    assert tasks[0].jobs == 1
+    assert tasks[0].status == "passed"
+
+#
+# Writes a CMakeRunner XML file for the projects of workingDir (created
+# with createRunner), compiled by running their build.sh, and returns the
+# command running CMakeRunner with it and the options
+#
+def getRunCommand(workingDir, names, options):
+    (workingDir/"runner.xml").write_text("<CMakeRunner_ParameterLists>\n"
+        + "<Common> <linuxMakeCommand> sh ../build.sh </linuxMakeCommand> </Common>\n"
+        + "".join(["<ProjectDir> " + name + " </ProjectDir>\n" for name in names])
+        + "</CMakeRunner_ParameterLists>\n")
+    return [sys.executable, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "CMakeRunner.py"),
+            "-x", str(workingDir/"runner.xml")] + options
+
+@pytest.mark.skipif(platform.system() != "Linux", reason="uses the linux make command")
+@pytest.mark.parametrize("scripts, options, exitStatus", [(("exit 0", "exit 0"), ["-d"], 0),
+                                                           (("exit 0", "exit 1"), ["-d"], 1),
+                                                           (("sleep 30", "sleep 0.5; exit 1"), ["-d", "-j", "2", "--fail-fast"], 1)])
+def test_exit_status(tmp_path, scripts, options, exitStatus):
+    createRunner(tmp_path, {"ProjA" : (scripts[0], []), "ProjB" : (scripts[1], [])}, 1)
+    p = subprocess.run(getRunCommand(tmp_path, ["ProjA", "ProjB"], options), stdout=subprocess.PIPE, timeout=60)
+    assert p.returncode == exitStatus
+    assert b"SUMMARY" in p.stdout
+
+@pytest.mark.skipif(platform.system() != "Linux", reason="uses the linux make command")
+def test_interrupted_run_exit_status(tmp_path):
+    createRunner(tmp_path, {"ProjA" : ("touch ../../started; sleep 30", []), "ProjB" : ("sleep 30", [])}, 1)
+    p = subprocess.Popen(getRunCommand(tmp_path, ["ProjA", "ProjB"], ["-d", "-j", "2"]), stdout=subprocess.PIPE)
+    startTime = time.monotonic()
+    while((not os.path.exists(tmp_path/"started")) and (time.monotonic() - startTime < 30)): time.sleep(0.1)
+    p.send_signal(signal.SIGINT)
+    (output, error) = p.communicate(timeout=30)
+    assert p.returncode == 130
+    assert b"Cancelled   : run interrupted" in output
+
+def test_projects_sharing_a_library_do_not_compile_concurrently(tmp_path):
+    script = "mkdir ../../Lib1/building || exit 1; sleep 0.5; rmdir ../../Lib1/building"
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : (script, []), "ProjB" : (script, []), "ProjC" : ("sleep 0.5", [])}, 3)
+    os.makedirs(tmp_path/"Lib1")
+    for name in ("ProjA", "ProjB"):
+        (tmp_path/name/"CMakeLists.txt").write_text("add_custom_target(release)\n"
+            + 'add_subdirectory("${CMAKE_SOURCE_DIR}/../Lib1" "${CMAKE_SOURCE_DIR}/../Lib1/build")\n')
+    runner.scheduleProjects(tasks, str(tmp_path))
+    assert [t.status for t in tasks] == ["passed", "passed", "passed"]
+    assert tasks[0].libBuildDirs == [os.path.realpath(tmp_path/"Lib1"/"build")]
+    assert tasks[2].libBuildDirs == []
+
+def test_lib_build_dirs_of_config_dirs_layout(tmp_path):
+    (tmp_path/"CMakeLists.txt").write_text('add_subdirectory("${CMAKE_SOURCE_DIR}/../Lib1" "${CMAKE_SOURCE_DIR}/../Lib1/build/${CMAKE_BUILD_TYPE}")\n'
+                                          + 'add_subdirectory("${CMAKE_SOURCE_DIR}/Lib2" "${CMAKE_SOURCE_DIR}/Lib2/build/${CMAKE_BUILD_TYPE}")\n')
+    runner = CMakeRunner.CMakeRunner()
+    assert runner.getLibBuildDirs(str(tmp_path)) == sorted([os.path.realpath(tmp_path/".."/"Lib1"/"build"),
+                                                            os.path.realpath(tmp_path/"Lib2"/"build")])
+
+@pytest.mark.parametrize("command, jobsOption", [("make debug", False),
+                                                 ("make -k debug", False),
+                                                 ("make CXX=g++-j debug", False),
+                                                 ("make -j4 debug", True),
+                                                 ("make -j 4 debug", True),
+                                                 ("make --jobs=4 debug", True),
+                                                 ("cmake --build . --parallel 4", True),
+                                                 ("ctest -j8", True)])
+def test_has_jobs_option(command, jobsOption):
+    assert CMakeRunner.hasJobsOption(command) == jobsOption
+    if(jobsOption): assert CMakeRunner.addJobsOption(command, "-j 2") == command
+    else          : assert CMakeRunner.addJobsOption(command, "-j 2") == command + " -j 2"
+
+@pytest.mark.parametrize("makeCommand, arguments", [("sh ../build.sh debug", "debug -j 2 2"),
+                                                    ("sh ../build.sh -j 3 debug", "-j 3 debug")])
+def test_make_jobs_option(tmp_path, makeCommand, arguments):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ('echo "$@" $CMAKE_BUILD_PARALLEL_LEVEL > ../../arguments', [])}, 1)
+    runner.cpuBudget      = 2
+    runner.makeCommand    = makeCommand
+    runner.makeJobsOption = "-j "
+    runner.scheduleProjects(tasks, str(tmp_path))
+    assert (tmp_path/"arguments").read_text().strip() == arguments
+
+#
+# Sets the cpu count, affinity mask (None if not supported) and cgroup files
+# (file name : contents) seen by detectCpuCount
+#
+def setCpuLimits(monkeypatch, cpuCount, affinity, cgroupFiles):
+    monkeypatch.setattr(os, "cpu_count", lambda : cpuCount)
+    if(affinity == None): monkeypatch.delattr(os, "sched_getaffinity", raising=False)
+    else                : monkeypatch.setattr(os, "sched_getaffinity", lambda pid : set(range(affinity)), raising=False)
+    def openCgroupFile(fileName, mode = 'r'):
+        if(fileName not in cgroupFiles): raise FileNotFoundError(fileName)
+        return io.StringIO(cgroupFiles[fileName])
+    monkeypatch.setattr(CMakeRunner, "open", openCgroupFile, raising=False)
+
+@pytest.mark.parametrize("cpuCount, affinity, cgroupFiles, detectedCount", [
+    (8, None, {}, 8),
+    (8, 4, {}, 4),
+    (8, 4, {"/sys/fs/cgroup/cpu.max" : "200000 100000\n"}, 2),
+    (8, 4, {"/sys/fs/cgroup/cpu.max" : "50000 100000\n"}, 1),
+    (8, 4, {"/sys/fs/cgroup/cpu.max" : "max 100000\n"}, 4),
+    (8, 4, {"/sys/fs/cgroup/cpu.max" : "1600000 100000\n"}, 4),
+    (8, None, {"/sys/fs/cgroup/cpu/cpu.cfs_quota_us" : "300000\n", "/sys/fs/cgroup/cpu/cpu.cfs_period_us" : "100000\n"}, 3),
+    (8, None, {"/sys/fs/cgroup/cpu/cpu.cfs_quota_us" : "-1\n", "/sys/fs/cgroup/cpu/cpu.cfs_period_us" : "100000\n"}, 8)])
+def test_detect_cpu_count(monkeypatch, cpuCount, affinity, cgroupFiles, detectedCount):
+    setCpuLimits(monkeypatch, cpuCount, affinity, cgroupFiles)
+    assert CMakeRunner.detectCpuCount() == detectedCount
+
+@pytest.mark.parametrize("incremental, cacheFile, lastStamp, action", [
+    (False, True,  {"cmakeLists" : "1", "settings" : "2"}, "configure"),
+    (True,  False, {"cmakeLists" : "1", "settings" : "2"}, "configure"),
+    (True,  True,  None, "configure"),
+    (True,  True,  {"cmakeLists" : "1", "settings" : "3"}, "configure"),
+    (True,  True,  {"cmakeLists" : "0", "settings" : "2"}, "reconfigure"),
+    (True,  True,  {"cmakeLists" : "1", "settings" : "2"}, "skip")])
+def test_configure_action(tmp_path, incremental, cacheFile, lastStamp, action):
+    runner = CMakeRunner.CMakeRunner()
+    runner.incrementalFlag = incremental
+    if(cacheFile): (tmp_path/"CMakeCache.txt").write_text("")
+    if(lastStamp != None): BuildFingerprint.writeStamp(tmp_path/"CMakeRunner.configure", lastStamp)
+    assert runner.getConfigureAction(tmp_path, {"cmakeLists" : "1", "settings" : "2"}) == action
+
+def test_incremental_configure(tmp_path):
+    (runner, tasks) = createRunner(tmp_path, {"ProjA" : ("exit 0", [])}, 1)
+    createCMakeLists(tmp_path, ["ProjA"])
+    runner.buildFlag       = True
+    runner.incrementalFlag = True
+    runner.cmakeCommand    = "touch CMakeCache.txt; echo configure >> ../../runs; true"
+    for i in range(2):
+        runner.scheduleProjects(tasks, str(tmp_path))
+    assert (tmp_path/"runs").read_text() == "configure\n"
+    assert [p["phase"] for p in tasks[0].phases] == ["configure", "compile", "compile"]
+
+    # A stale stamp : CMakeLists.txt changed since the last cmake run
+
+    with open(tmp_path/"ProjA"/"CMakeLists.txt", 'a') as f: f.write("# changed\n")
+    runner.scheduleProjects(tasks, str(tmp_path))
+    assert (tmp_path/"runs").read_text() == "configure\nconfigure\n"
+    assert os.path.isfile(tmp_path/"ProjA"/"build"/"CMakeCache.txt")
+
+# Output of ccache --print-stats (ccache 4.8), abridged
+
+CCACHE_STATS = """stats_updated_timestamp\t1697620000
+stats_zeroed_timestamp\t0
+autoconf_test\t0
+bad_compiler_arguments\t1
+cache_miss\t12
+cache_size_kibibyte\t20480
+compile_failed\t2
+direct_cache_hit\t30
+direct_cache_miss\t14
+files_in_cache\t96
+preprocessed_cache_hit\t5
+preprocessed_cache_miss\t12
+"""
+
+@pytest.mark.parametrize("ccachePath, result, stats", [("/usr/bin/ccache", (0, CCACHE_STATS.encode(), None), (35, 12)),
+                                                       ("/usr/bin/ccache", (0, b"cache_miss\t3\n", None), (0, 3)),
+                                                       ("/usr/bin/ccache", (0, b"cache hit (direct)   30\ncache miss   12\n", None), None),
+                                                       ("/usr/bin/ccache", (1, b"", b"ccache: invalid option"), None),
+                                                       (None, None, None)])
+def test_ccache_stats(monkeypatch, ccachePath, result, stats):
+    monkeypatch.setattr(CMakeRunner.shutil, "which", lambda name : ccachePath)
+    monkeypatch.setattr(CMakeRunner, "execCommand", lambda command : result)
+    assert CMakeRunner.getCCacheStats() == stats
+
+@pytest.mark.parametrize("cmakeCache, usesCCache", [("USE_CCACHE:BOOL=ON\nCCACHE_PROGRAM:FILEPATH=/usr/bin/ccache\n", True),
+                                                    ("USE_CCACHE:BOOL=OFF\nCCACHE_PROGRAM:FILEPATH=/usr/bin/ccache\n", False),
+                                                    ("USE_CCACHE:BOOL=ON\nCCACHE_PROGRAM:FILEPATH=/usr/bin/sccache\n", False),
+                                                    ("USE_CCACHE:BOOL=ON\n", False)])
+def test_uses_ccache(tmp_path, cmakeCache, usesCCache):
+    (tmp_path/"CMakeCache.txt").write_text(cmakeCache)
+    assert CMakeRunner.CMakeRunner().usesCCache(tmp_path) == usesCCache
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import ChangeImpact
+
+CMAKELISTS = """
+list(APPEND IncludeDirs "${CMAKE_SOURCE_DIR}/include")
+add_subdirectory("${CMAKE_SOURCE_DIR}/../Lib1" "${CMAKE_SOURCE_DIR}/../Lib1/build")
+add_library(SharedSources OBJECT "Shared.cpp")
+
+    set(mainExecName ProgA)
+    add_executable( ${mainExecName} "ProgA.cpp" $<TARGET_OBJECTS:SharedSources> )
+    target_include_directories(${mainExecName} PUBLIC "../MoreA" )
+      file(COPY "inputA.dat"  DESTINATION "${CMAKE_SOURCE_DIR}/Testing/${mainExecName}")
+
+    set(mainExecName ProgB)
+    add_executable( ${mainExecName} "ProgB.cpp" $<TARGET_OBJECTS:SharedSources> )
+"""
+
+#
+# Creates the project Proj, with targets ProgA and ProgB, that uses the
+# library Lib1, and returns the ImpactIndex of Proj
+#
+@pytest.fixture
+def impactIndex(tmp_path):
+    files = {"Proj/CMakeLists.txt"    : CMAKELISTS,
+             "Proj/ProgA.cpp"         : '#include "a.h"\n#include <vector>\n',
+             "Proj/ProgB.cpp"         : '#include "b.h"\n',
+             "Proj/Shared.cpp"        : "",
+             "Proj/inputA.dat"        : "",
+             "Proj/notes.txt"         : "",
+             "Proj/build/ProgA.o"     : "",
+             "Proj/include/a.h"       : '  #  include "common.h"\n',
+             "Proj/include/common.h"  : "",
+             "MoreA/b.h"              : "",
+             "MoreA/unused.h"         : "",
+             "Lib1/Lib1.cpp"          : "",
+             "Lib1/build/Lib1.o"      : ""}
+    for name in files:
+        os.makedirs(os.path.dirname(tmp_path/name), exist_ok=True)
+        (tmp_path/name).write_text(files[name])
+    return ChangeImpact.ImpactIndex({"Proj" : str(tmp_path/"Proj")})
+
+def test_parse_cmakelists(tmp_path, impactIndex):
+    projectDir = os.path.realpath(tmp_path/"Proj")
+    (targets, includeDirs, libDirs) = ChangeImpact.parseCMakeLists(projectDir)
+    assert sorted(targets) == ["ProgA", "ProgB"]
+    assert targets["ProgA"]["files"] == [os.path.join(projectDir, name) for name in ("ProgA.cpp", "Shared.cpp", "inputA.dat", "ProgA.xml")]
+    assert targets["ProgA"]["includeDirs"] == [os.path.realpath(tmp_path/"MoreA")]
+    assert targets["ProgB"]["includeDirs"] == []
+    assert includeDirs == [os.path.join(projectDir, "include")]
+    assert libDirs == [os.path.realpath(tmp_path/"Lib1")]
+
+def test_parse_missing_cmakelists(tmp_path):
+    assert ChangeImpact.parseCMakeLists(str(tmp_path)) == ({}, [], [])
+
+@pytest.mark.parametrize("changedFile, impact", [("Proj/ProgA.cpp", {"Proj" : ["ProgA"]}),
+                                                 ("Proj/Shared.cpp", {"Proj" : ["ProgA", "ProgB"]}),
+                                                 ("Proj/inputA.dat", {"Proj" : ["ProgA"]}),
+                                                 ("Proj/include/common.h", {"Proj" : ["ProgA"]}),
+                                                 ("MoreA/b.h", {}),
+                                                 ("MoreA/unused.h", {}),
+                                                 ("Proj/build/ProgA.o", {}),
+                                                 ("Proj/CMakeLists.txt", {"Proj" : None}),
+                                                 ("Proj/notes.txt", {"Proj" : None}),
+                                                 ("Lib1/Lib1.cpp", {"Proj" : None}),
+                                                 ("Lib1/build/Lib1.o", {}),
+                                                 ("Other/Other.cpp", {})])
+def test_impact_of_changed_file(tmp_path, impactIndex, changedFile, impact):
+    assert impactIndex.getImpact([str(tmp_path/changedFile)]) == impact
+
+def test_impact_of_several_files(tmp_path, impactIndex):
+    assert impactIndex.getImpact([str(tmp_path/"Proj"/"ProgA.cpp"), str(tmp_path/"Proj"/"notes.txt")]) == {"Proj" : None}
+    assert impactIndex.getImpact([str(tmp_path/"Proj"/"ProgB.cpp"), str(tmp_path/"Proj"/"ProgA.cpp")]) == {"Proj" : ["ProgA", "ProgB"]}
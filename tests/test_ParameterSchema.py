@@ -0,0 +1,127 @@
+import pytest
+
+import ParameterSchema
+from XML_ParameterListArray import XML_ParameterListArray
+
+SCHEMA = {"Common"  : {"required"   : True,
+                       "parameters" : {"version"   : {"type" : "version", "required" : True},
+                                       "count"     : {"type" : "int", "default" : 4},
+                                       "timeout"   : {"type" : "float"},
+                                       "shared"    : {"type" : "bool", "default" : True},
+                                       "libDir"    : {"type" : "string", "multiple" : True},
+                                       "cmakeFlag" : {"type" : "cmakeOption"}}},
+          "Options" : {"other"      : {"type" : "bool"}},
+          "Target"  : {"multiple"   : True,
+                       "type"       : "string",
+                       "parameters" : {"resources" : {"type" : "resourceGroups"}}}}
+
+def validate(tmp_path, contents, schema = SCHEMA):
+    xmlFile = tmp_path/"in.xml"
+    xmlFile.write_text("<Parameters>\n" + contents + "</Parameters>\n")
+    return ParameterSchema.ParameterSchema("Parameters", schema).validate(XML_ParameterListArray(str(xmlFile)))
+
+@pytest.mark.parametrize("strVal, value", [("on", True), ("No", False), ("1", True), ("FALSE", False)])
+def test_convert_bool(strVal, value):
+    assert ParameterSchema.convertBool(strVal) == value
+
+@pytest.mark.parametrize("converter, strVal", [(ParameterSchema.convertBool, "sometimes"),
+                                               (ParameterSchema.convertInt, "2.5"),
+                                               (ParameterSchema.convertFloat, "long"),
+                                               (ParameterSchema.convertVersion, "3.16a"),
+                                               (ParameterSchema.convertCMakeOption, "-DUSE_MKL")])
+def test_converters_reject_invalid_values(converter, strVal):
+    with pytest.raises(ValueError):
+        converter(strVal)
+
+def test_convert_values():
+    assert ParameterSchema.convertInt("12") == 12
+    assert ParameterSchema.convertFloat("2.5") == 2.5
+    assert ParameterSchema.convertVersion("3.16.2") == "3.16.2"
+    assert ParameterSchema.convertCMakeOption(" -DUSE_MKL = ON ") == ("-DUSE_MKL", "ON")
+
+@pytest.mark.parametrize("strVal", ["cpus:2", "2,cpus:1", "cpus:1,cpus:2;4,cpus:1"])
+def test_convert_resource_groups(strVal):
+    assert ParameterSchema.convertResourceGroups(strVal) == strVal
+
+@pytest.mark.parametrize("strVal, message", [("gpus:2", "resource 'gpus' is not provided"),
+                                             ("2,cpus:1,gpus:1", "resource 'gpus' is not provided"),
+                                             ("2", "is not a list of resource groups"),
+                                             ("cpus:two", "is not a list of resource groups")])
+def test_convert_resource_groups_rejects_other_types(strVal, message):
+    with pytest.raises(ValueError, match=message):
+        ParameterSchema.convertResourceGroups(strVal)
+
+def test_unknown_schema_type_and_key():
+    with pytest.raises(Exception, match="Unknown schema type"):
+        ParameterSchema.ParameterSchema("Parameters", {"Common" : {"type" : "complex"}})
+    with pytest.raises(Exception, match="Unknown schema key"):
+        ParameterSchema.ParameterSchema("Parameters", {"Common" : {"optional" : True}})
+
+def test_typed_values(tmp_path):
+    (values, errors) = validate(tmp_path, """
+        <Common>
+            <version> 3.16 </version>
+            <timeout value="2.5"/>
+            <shared> </shared>
+            <libDir> lib1 </libDir>
+            <libDir> lib2 </libDir>
+            <!-- comment -->
+            <cmakeFlag> -DUSE_MKL=ON </cmakeFlag>
+        </Common>
+        <Options>
+            <USE_OPENMP> off </USE_OPENMP>
+            <USE_LAPACK> yes </USE_LAPACK>
+        </Options>
+        <Target> FirstProg <resources> 2,cpus:1 </resources> </Target>
+        <Target> SecondProg </Target>
+        """)
+    assert errors == []
+    assert values["Common"] == {"version" : "3.16", "count" : 4, "timeout" : 2.5, "shared" : True,
+                                "libDir" : ["lib1", "lib2"], "cmakeFlag" : ("-DUSE_MKL", "ON")}
+    assert list(values["Options"].items()) == [("USE_OPENMP", False), ("USE_LAPACK", True)]
+    assert values["Target"] == [{"#text" : "FirstProg", "resources" : "2,cpus:1"},
+                                {"#text" : "SecondProg", "resources" : None}]
+
+def test_missing_elements(tmp_path):
+    (values, errors) = validate(tmp_path, "")
+    assert errors == ["Common : required parameter not specified"]
+    assert values == {"Common" : None, "Options" : None, "Target" : []}
+
+def test_reports_all_errors(tmp_path):
+    (values, errors) = validate(tmp_path, """
+        <Common>
+            <version/>
+            <count> four </count>
+            <timeout> 1 </timeout>
+            <timeout> 2 </timeout>
+        </Common>
+        <Options> <USE_OPENMP> sometimes </USE_OPENMP> </Options>
+        <Target> FirstProg </Target>
+        <Target> SecondProg <resources> gpus:1 </resources> </Target>
+        """)
+    assert errors == ["Common/version : no value specified",
+                      "Common/count : 'four' is not an integer",
+                      "Common/timeout : specified 2 times, only one instance allowed",
+                      "Options/USE_OPENMP : 'sometimes' is not a boolean (true/false, on/off, yes/no, 1/0)",
+                      "Target[2]/resources : resource 'gpus' is not provided by CMakeRunner, only cpus is"]
+    assert values["Common"]["timeout"] == 1.0
+
+def test_root_tag_mismatch(tmp_path):
+    xmlFile = tmp_path/"in.xml"
+    xmlFile.write_text("<Other><Common><version>3.16</version></Common></Other>\n")
+    (values, errors) = ParameterSchema.ParameterSchema("Parameters", SCHEMA).validate(XML_ParameterListArray(str(xmlFile)))
+    assert errors == ["Root element is <Other>, <Parameters> expected"]
+
+def test_unknown_parameters(tmp_path):
+    (values, errors) = validate(tmp_path, """
+        <Common>
+            <version> 3.16 </version>
+            <timout> 2.5 </timout>
+        </Common>
+        <Target> FirstProg <resource> cpus:1 </resource> </Target>
+        <Option> <USE_OPENMP> on </USE_OPENMP> </Option>
+        """)
+    assert errors == ["Common/timout : unknown parameter",
+                      "Target/resource : unknown parameter",
+                      "Option : unknown parameter"]
+    assert values["Common"]["timeout"] == None
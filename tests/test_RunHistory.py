@@ -0,0 +1,72 @@
+import pytest
+
+import CMakeRunner
+import RunHistory
+
+def createTask(projectDir, phases):
+    task = CMakeRunner.ProjectTask(projectDir, "1", "")
+    task.phases = [{"phase" : phase, "wallTime" : wallTime, "cpuTime" : wallTime, "maxRSS" : 1000, "status" : status}
+                   for (phase, wallTime, status) in phases]
+    return task
+
+@pytest.fixture
+def history(tmp_path):
+    history = RunHistory.RunHistory(tmp_path/"CMakeRunner.history.db")
+    yield history
+    history.close()
+
+def addRuns(history, tmp_path, compileTimes, compileMode = "debug"):
+    for compileTime in compileTimes:
+        tasks = [createTask("ProjA/", [("configure", 1.0, "passed"), ("compile", compileTime, "passed")]),
+                 createTask("ProjB", [])]
+        history.addRun(tasks, compileMode, str(tmp_path))
+
+def test_add_run(tmp_path, history):
+    task = createTask("ProjA", [("configure", 1.0, "passed"), ("compile", 2.0, "failed")])
+    assert history.addRun([task], "debug", str(tmp_path)) == 1
+    assert history.addRun([task], None, str(tmp_path)) == 2
+
+    rows = history.connection.execute("SELECT runId, project, phase, compileMode, revision, wallTime, status FROM phases").fetchall()
+    assert rows == [(1, "ProjA", "configure", "debug", "", 1.0, "passed"),
+                    (1, "ProjA", "compile", "debug", "", 2.0, "failed"),
+                    (2, "ProjA", "configure", "", "", 1.0, "passed"),
+                    (2, "ProjA", "compile", "", "", 2.0, "failed")]
+
+def test_history_is_persistent(tmp_path, history):
+    addRuns(history, tmp_path, [10.0])
+    reopened = RunHistory.RunHistory(tmp_path/"CMakeRunner.history.db")
+    assert reopened.addRun([createTask("ProjA", [("compile", 1.0, "passed")])], "debug", str(tmp_path)) == 2
+    reopened.close()
+
+def test_median_time(tmp_path, history):
+    addRuns(history, tmp_path, [10.0, 20.0])
+    assert history.getMedianTime("ProjA", "compile", "debug", 5) == None
+
+    addRuns(history, tmp_path, [30.0, 40.0])
+    assert history.getMedianTime("ProjA", "compile", "debug", 5) == 25.0
+    assert history.getMedianTime("ProjA", "compile", "debug", 3) == 30.0
+    assert history.getMedianTime("ProjA", "compile", "release", 5) == None
+
+def test_median_time_ignores_failed_phases(tmp_path, history):
+    addRuns(history, tmp_path, [10.0, 10.0, 10.0])
+    history.addRun([createTask("ProjA", [("compile", 100.0, "failed")])], "debug", str(tmp_path))
+    assert history.getMedianTime("ProjA", "compile", "debug", 3) == 10.0
+
+def test_project_durations(tmp_path, history):
+    addRuns(history, tmp_path, [10.0, 20.0, 60.0])
+    addRuns(history, tmp_path, [100.0], "release")
+    assert history.getProjectDurations("debug", 2) == {"ProjA" : 41.0}
+    assert history.getProjectDurations("release", 2) == {"ProjA" : 101.0}
+    assert history.getProjectDurations(None, 2) == {}
+
+def test_find_regressions(tmp_path, history):
+    addRuns(history, tmp_path, [10.0, 10.0, 12.0])
+    tasks = [createTask("ProjA", [("configure", 1.5, "passed"), ("compile", 12.0, "passed")])]
+    assert history.findRegressions(tasks, "debug", 25, 5) == []
+
+    tasks = [createTask("ProjA", [("configure", 1.5, "passed"), ("compile", 14.0, "passed")])]
+    assert history.findRegressions(tasks, "debug", 25, 5) == [("ProjA", "compile", 14.0, 10.0)]
+    assert history.findRegressions(tasks, "release", 25, 5) == []
+
+    tasks = [createTask("ProjA", [("compile", 14.0, "failed")])]
+    assert history.findRegressions(tasks, "debug", 25, 5) == []
@@ -0,0 +1,88 @@
+import json
+
+import xml.etree.ElementTree as ET
+
+import CMakeRunner
+import RunReport
+
+LAST_TEST_LOG = """Start testing: Oct 18 10:00 UTC
+----------------------------------------------------------
+1/3 Testing: FirstProg
+1/3 Test: FirstProg
+Command: "/work/ProjA/Debug/FirstProg"
+Output:
+----------------------------------------------------------
+Test time =   0.25 sec
+----------------------------------------------------------
+Test Passed.
+"FirstProg" end time: Oct 18 10:00 UTC
+2/3 Testing: SecondProg
+2/3 Test: SecondProg
+Test time =   1.50 sec
+----------------------------------------------------------
+Test Failed.
+3/3 Testing: ThirdProg
+3/3 Test: ThirdProg
+End testing: Oct 18 10:00 UTC
+"""
+
+def test_parse_last_test_log(tmp_path):
+    (tmp_path/"LastTest.log").write_text(LAST_TEST_LOG)
+    assert RunReport.parseLastTestLog(str(tmp_path/"LastTest.log")) == [{"name" : "FirstProg",  "time" : 0.25, "status" : "passed"},
+                                                                        {"name" : "SecondProg", "time" : 1.5,  "status" : "failed"},
+                                                                        {"name" : "ThirdProg",  "time" : None, "status" : "failed"}]
+
+def test_parse_missing_last_test_log(tmp_path):
+    assert RunReport.parseLastTestLog(str(tmp_path/"LastTest.log")) == []
+
+def test_merge_rerun_results():
+    tests = [{"name" : "FirstProg",  "time" : 0.25, "status" : "passed"},
+             {"name" : "SecondProg", "time" : 1.5,  "status" : "failed"}]
+    RunReport.mergeRerunResults(tests, [{"name" : "SecondProg", "time" : 1.0, "status" : "passed"},
+                                        {"name" : "ThirdProg",  "time" : 2.0, "status" : "failed"}])
+    RunReport.mergeRerunResults(tests, [{"name" : "SecondProg", "time" : 0.5, "status" : "failed"}])
+    assert tests == [{"name" : "FirstProg",  "time" : 0.25, "status" : "passed"},
+                     {"name" : "SecondProg", "time" : 0.5,  "status" : "failed", "reruns" : 2},
+                     {"name" : "ThirdProg",  "time" : 2.0,  "status" : "failed"}]
+
+def createReport():
+    taskA = CMakeRunner.ProjectTask("ProjA", "1", "")
+    taskA.status = "failed"
+    taskA.phases = [{"phase" : "configure", "wallTime" : 1.0, "cpuTime" : 0.5, "maxRSS" : 1000, "status" : "passed"},
+                    {"phase" : "compile",   "wallTime" : 2.0, "cpuTime" : 1.5, "maxRSS" : 2000, "status" : "passed"},
+                    {"phase" : "test",      "wallTime" : 3.0, "cpuTime" : 2.5, "maxRSS" : 3000, "status" : "failed"}]
+    taskA.tests  = [{"name" : "FirstProg",  "time" : 0.25, "status" : "passed"},
+                    {"name" : "SecondProg", "time" : None, "status" : "failed"}]
+    taskB = CMakeRunner.ProjectTask("ProjB", "2", "")
+    taskB.status = "skipped"
+    return RunReport.createReport([taskA, taskB], 6.5, "debug")
+
+def test_create_report():
+    report = createReport()
+    assert (report["compileMode"], report["elapsedTime"]) == ("debug", 6.5)
+    assert [(p["projectDir"], p["index"], p["status"]) for p in report["projects"]] == [("ProjA", "1", "failed"), ("ProjB", "2", "skipped")]
+    assert [p["phase"] for p in report["projects"][0]["phases"]] == ["configure", "compile", "test"]
+    assert report["projects"][1]["tests"] == []
+
+def test_write_json_report(tmp_path):
+    report = createReport()
+    RunReport.writeJSONReport(str(tmp_path/"report.json"), report)
+    assert json.loads((tmp_path/"report.json").read_text()) == report
+
+def test_write_junit_report(tmp_path):
+    RunReport.writeJUnitReport(str(tmp_path/"report.xml"), createReport())
+    testSuites = ET.parse(str(tmp_path/"report.xml")).getroot()
+    assert (testSuites.tag, testSuites.get("time")) == ("testsuites", "6.500")
+
+    (suiteA, suiteB) = list(testSuites)
+    assert (suiteA.get("name"), suiteA.get("tests"), suiteA.get("failures"), suiteA.get("time")) == ("ProjA", "5", "2", "6.000")
+    assert [(t.get("name"), t.get("classname"), t.get("time")) for t in suiteA] == [("phase.configure", "ProjA", "1.000"),
+                                                                                   ("phase.compile", "ProjA", "2.000"),
+                                                                                   ("phase.test", "ProjA", "3.000"),
+                                                                                   ("test.FirstProg", "ProjA", "0.250"),
+                                                                                   ("test.SecondProg", "ProjA", None)]
+    assert [t.find("failure") != None for t in suiteA] == [False, False, True, False, True]
+    assert suiteA[4].find("failure").get("message") == "test.SecondProg failed"
+
+    assert (suiteB.get("name"), suiteB.get("tests"), suiteB.get("skipped")) == ("ProjB", "1", "1")
+    assert [(t.get("name"), t.find("skipped") != None) for t in suiteB] == [("project", True)]
@@ -0,0 +1,138 @@
+import os
+
+import pytest
+
+import xml.etree.ElementTree as ET
+
+from XML_ParameterListArray import XML_ParameterListArray
+
+PARAMETERS = """<?xml version="1.0" ?>
+<Parameters>
+    <Common>
+        <project value="ProjA"/>
+        <count value="4"/>
+        <libDir> lib1 </libDir>
+        <libDir> lib2 </libDir>
+        <Compiler> <flag value="-O2"/> <flag value="-g"/> </Compiler>
+    </Common>
+    <Target> <name value="FirstProg"/> </Target>
+    <Target> <name value="SecondProg"/> </Target>
+    <Options>
+        <USE_OPENMP value="off"/>
+    </Options>
+</Parameters>
+"""
+
+@pytest.fixture
+def xmlFile(tmp_path):
+    (tmp_path/"in.xml").write_text(PARAMETERS)
+    return str(tmp_path/"in.xml")
+
+def test_parameter_list_lookups(xmlFile):
+    paramList = XML_ParameterListArray(xmlFile)
+    assert paramList.isParameterList("Common")
+    assert not paramList.isParameterList("Other")
+    assert len(paramList.getParameterListAll("Target")) == 2
+    assert paramList.getParameterList("Target") is paramList.getParameterListAll("Target")[0]
+    assert paramList.findParameterList("Other") == None
+    with pytest.raises(Exception, match="ParameterList not found"):
+        paramList.getParameterList("Other")
+
+    # ElementTree paths are searched for in the tree
+
+    assert paramList.findParameterListAll("./Target[2]") == [paramList.getParameterListAll("Target")[1]]
+
+def test_parameter_lookups(xmlFile):
+    paramList = XML_ParameterListArray(xmlFile)
+    assert paramList.getParameterValue("project", "Common") == "ProjA"
+    assert paramList.getParameterValue("count", "Common") == 4
+    assert paramList.getParameterValue("USE_OPENMP", "Options") == False
+    assert paramList.getParameterValueOrDefault("jobs", "Common", 2) == 2
+    assert paramList.getParameterValue("name", "Target") == "FirstProg"
+    assert [paramList.getValueOrText(p) for p in paramList.getParameterAll("libDir", "Common")] == ["lib1", "lib2"]
+    assert paramList.getParameterText("libDir", "Common") == "lib1"
+    assert paramList.getParameterNames("Common") == ["project", "count", "libDir", "libDir", "Compiler"]
+    assert paramList.getParameterChildNames("Compiler", "Common") == ["flag", "flag"]
+    assert paramList.getParameterChildValues("flag", "Compiler", "Common") == ["-O2", "-g"]
+    assert paramList.isParameter("count", "Common")
+    assert not paramList.isParameter("jobs", "Common")
+    assert paramList.getParameterAll("jobs", "Common") == []
+    assert paramList.findParameters("Compiler/flag", "Common") == paramList.getParameterInstance("Compiler", "Common").findall("flag")
+
+    with pytest.raises(Exception, match="Parameter not found"):
+        paramList.getParameterValue("jobs", "Common")
+    with pytest.raises(Exception, match="ParameterList not found"):
+        paramList.getParameterValue("count", "Other")
+    with pytest.raises(Exception, match="ParameterList not found"):
+        paramList.isParameter("count", "Other")
+
+def test_modification_updates_index(xmlFile):
+    paramList = XML_ParameterListArray(xmlFile)
+    assert paramList.getParameterAll("libDir", "Common") != []
+    paramList.addParameter(8, "jobs", "Common")
+    assert paramList.getParameterValue("jobs", "Common") == 8
+    paramList.addParameterList("Build")
+    assert paramList.isParameterList("Build")
+    paramList.addParameterChild("-Wall", "warning", "Compiler", "Common")
+    assert paramList.getParameterChildValues("warning", "Compiler", "Common") == ["-Wall"]
+
+    with pytest.raises(Exception, match="Duplicate parameter lists"):
+        paramList.addParameterList("Build")
+    with pytest.raises(Exception, match="non-existent parameter list"):
+        paramList.addParameter(1, "jobs", "Other")
+
+def test_invalidate_index(xmlFile):
+    paramList = XML_ParameterListArray(xmlFile)
+    assert not paramList.isParameter("jobs", "Common")
+    paramList.getParameterList("Common").append(ET.Element("jobs", dict(value="8")))
+    paramList.root.append(ET.Element("Build"))
+    paramList.invalidateIndex()
+    assert paramList.getParameterValue("jobs", "Common") == 8
+    assert paramList.isParameterList("Build")
+
+def test_read_selected_parameter_lists(xmlFile):
+    paramList = XML_ParameterListArray(xmlFile, ["Target", "Options"])
+    assert paramList.root.tag == "Parameters"
+    assert [p.tag for p in paramList.root] == ["Target", "Target", "Options"]
+    assert not paramList.isParameterList("Common")
+    assert paramList.getParameterValue("name", "Target") == "FirstProg"
+    assert paramList.getParameterValue("USE_OPENMP", "Options") == False
+
+def test_output_to_file(tmp_path):
+    paramList = XML_ParameterListArray()
+    paramList.createParameterListArray("Parameters")
+    paramList.addParameterList("Common")
+    paramList.addParameter(2.5, "timeout", "Common")
+    paramList.addParameter(4, "count", "Common")
+    paramList.addParameter(True, "shared", "Common")
+    paramList.addParameter("ProjA", "project", "Common")
+    paramList.addParameterChild("-O2", "flag", "Compiler", "Common")
+    paramList.outputToFile(str(tmp_path/"out.xml"))
+
+    # float and int are written as double and long, without modifying the tree
+
+    assert paramList.getParameterInstance("count", "Common").get("type") == "int"
+    outputList = XML_ParameterListArray(str(tmp_path/"out.xml"))
+    assert [(p.tag, p.get("type")) for p in outputList.getParameterList("Common")] == [("timeout", "double"), ("count", "long"),
+                                                                                      ("shared", "bool"), ("project", "string"),
+                                                                                      ("Compiler", None)]
+    assert outputList.getParameterValue("timeout", "Common") == 2.5
+    assert outputList.getParameterValue("count", "Common") == 4
+    assert outputList.getParameterValue("shared", "Common") == True
+    assert outputList.getParameterChildValues("flag", "Compiler", "Common") == ["-O2"]
+
+    # A file that is read is written back with its layout and attributes unchanged
+
+    (tmp_path/"in.xml").write_text('<Parameters>\n    <Common>\n        <count value="4" unit="s"/>\n    </Common>\n</Parameters>')
+    XML_ParameterListArray(str(tmp_path/"in.xml")).outputToFile(str(tmp_path/"out.xml"))
+    assert (tmp_path/"out.xml").read_text() == ('<?xml version="1.0" standalone="no" ?>\n<Parameters>\n    <Common>\n'
+                                                '        <count value="4" unit="s" type="long" />\n    </Common>\n</Parameters>')
+
+def test_output_to_file_removes_partial_file(tmp_path):
+    paramList = XML_ParameterListArray()
+    paramList.createParameterListArray("Parameters")
+    paramList.addParameterList("Common")
+    paramList.addParameter(None, "project", "Common")
+    with pytest.raises(ValueError):
+        paramList.outputToFile(str(tmp_path/"out.xml"))
+    assert not os.path.exists(tmp_path/"out.xml")